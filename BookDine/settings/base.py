@@ -233,6 +233,9 @@ else:
         }
     }
 
+# Count hits and misses of the cached dashboards (one extra cache write per request)
+CACHE_ACCESS_COUNTERS = env_validator.require_var('CACHE_ACCESS_COUNTERS', bool, 'False')
+
 # Session
 SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
 SESSION_CACHE_ALIAS = 'default'
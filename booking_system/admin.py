@@ -1,9 +1,13 @@
+from collections import defaultdict
 from django.contrib import admin
+from django.db import transaction
 from django.utils.html import format_html
 from django.urls import reverse
-from django.db.models import Count, Avg
 from django.utils import timezone
 from .models import Restaurant, Table, Reservation, Review
+from .availability import invalidate_occupancy
+from .rollups import rebuild_daily_stats, rebuild_user_stats
+from .cache_utils import STAFF_DASHBOARD_NAMESPACE, bump_version
 
 @admin.register(Restaurant)
 class RestaurantAdmin(admin.ModelAdmin):
@@ -13,7 +17,7 @@ class RestaurantAdmin(admin.ModelAdmin):
     ]
     list_filter = ['cuisine', 'is_active', 'created_at']
     search_fields = ['name', 'location', 'description']
-    readonly_fields = ['id', 'created_at', 'updated_at', 'avg_rating_display']
+    readonly_fields = ['id', 'created_at', 'updated_at', 'avg_rating_display', 'review_count']
     fieldsets = (
         ('Basic Information', {
             'fields': ('id', 'name', 'location', 'cuisine', 'description', 'image')
@@ -28,7 +32,7 @@ class RestaurantAdmin(admin.ModelAdmin):
             'fields': ('rating', 'is_active', 'user')
         }),
         ('Statistics', {
-            'fields': ('avg_rating_display',),
+            'fields': ('avg_rating_display', 'review_count'),
             'classes': ('collapse',)
         }),
         ('Timestamps', {
@@ -37,23 +41,11 @@ class RestaurantAdmin(admin.ModelAdmin):
         }),
     )
     
-    def get_queryset(self, request):
-        return super().get_queryset(request).annotate(
-            avg_rating=Avg('reviews__rating'),
-            review_count=Count('reviews')
-        )
-    
     def avg_rating_display(self, obj):
-        if hasattr(obj, 'avg_rating') and obj.avg_rating:
-            return f"{obj.avg_rating:.2f}"
+        if obj.review_count:
+            return f"{obj.average_rating:.2f}"
         return "No reviews"
     avg_rating_display.short_description = "Average Rating"
-    
-    def review_count(self, obj):
-        if hasattr(obj, 'review_count'):
-            return obj.review_count
-        return 0
-    review_count.short_description = "Reviews"
 
 class TableInline(admin.TabularInline):
     model = Table
@@ -98,18 +90,43 @@ class ReservationAdmin(admin.ModelAdmin):
     
     actions = ['mark_as_confirmed', 'mark_as_completed', 'mark_as_cancelled']
     
+    def _update_status(self, queryset, status):
+        # Bulk updates skip model signals, so refresh availability, the
+        # stats rollups and cached dashboards by hand
+        affected_days = defaultdict(set)
+        affected_users = set()
+        for restaurant_id, date, user_id in queryset.values_list(
+            'restaurant_id', 'date', 'user_id'
+        ).distinct():
+            affected_days[restaurant_id].add(date)
+            affected_users.add(user_id)
+        
+        with transaction.atomic():
+            updated = queryset.update(status=status)
+            for restaurant_id, dates in affected_days.items():
+                rebuild_daily_stats(restaurant_ids=[restaurant_id], dates=dates)
+            rebuild_user_stats(user_ids=affected_users)
+        
+        for restaurant_id in affected_days:
+            invalidate_occupancy(restaurant_id)
+            bump_version('restaurant', restaurant_id)
+        bump_version(*STAFF_DASHBOARD_NAMESPACE)
+        for user_id in affected_users:
+            bump_version('user', user_id)
+        return updated
+    
     def mark_as_confirmed(self, request, queryset):
-        updated = queryset.update(status='confirmed')
+        updated = self._update_status(queryset, 'confirmed')
         self.message_user(request, f'{updated} reservations marked as confirmed.')
     mark_as_confirmed.short_description = "Mark selected reservations as confirmed"
     
     def mark_as_completed(self, request, queryset):
-        updated = queryset.update(status='completed')
+        updated = self._update_status(queryset, 'completed')
         self.message_user(request, f'{updated} reservations marked as completed.')
     mark_as_completed.short_description = "Mark selected reservations as completed"
     
     def mark_as_cancelled(self, request, queryset):
-        updated = queryset.update(status='cancelled')
+        updated = self._update_status(queryset, 'cancelled')
         self.message_user(request, f'{updated} reservations marked as cancelled.')
     mark_as_cancelled.short_description = "Mark selected reservations as cancelled"
 
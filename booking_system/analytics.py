@@ -1,10 +1,207 @@
-from django.db.models import Count, Avg, Sum, Q, F
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Count, Avg, Sum, Q, F, Case, When, Value, DurationField, FloatField
+from django.db.models.functions import Cast, Coalesce, ExtractHour, ExtractWeekDay, TruncDate
 from django.utils import timezone
 from datetime import timedelta, datetime
-from collections import defaultdict
+from bisect import bisect_left, bisect_right
+from collections import Counter, defaultdict
 import json
+import numpy as np
 
-from .models import Restaurant, Reservation, Review, Table
+from .models import Restaurant, Reservation, Review, Table, DailyReservationStats
+from .availability import get_occupancy, DEFAULT_DURATION
+from .forecasting import DailySeries, fit, summarize
+
+def booked_duration(prefix=''):
+    """Length of a reservation as a database expression"""
+    start = F(f'{prefix}start_time')
+    end = F(f'{prefix}end_time')
+    return Case(
+        When(**{f'{prefix}end_time__isnull': True}, then=Value(DEFAULT_DURATION)),
+        When(**{f'{prefix}end_time__gte': start}, then=end - start),
+        # Bookings running past midnight wrap around
+        default=end - start + Value(timedelta(days=1)),
+        output_field=DurationField()
+    )
+
+def completed_revenue(prefix='', filter=None):
+    """Sum of completed payments, or 0 while reservations have no payments"""
+    try:
+        Reservation._meta.get_field('payment')
+    except FieldDoesNotExist:
+        return Value(0)
+    completed = Q(**{f'{prefix}payment__status': 'completed'})
+    if filter is not None:
+        completed &= filter
+    return Sum(f'{prefix}payment__amount', filter=completed)
+
+def table_usage(tables, start_date, end_date):
+    """Annotate tables with their bookings, booked time and revenue over a period"""
+    booked = Q(
+        reservations__date__range=[start_date, end_date],
+        reservations__status__in=['confirmed', 'completed']
+    )
+    return tables.annotate(
+        total_bookings=Count('reservations', filter=booked),
+        booked_time=Sum(booked_duration('reservations__'), filter=booked),
+        revenue=completed_revenue('reservations__', filter=booked)
+    )
+
+def opening_minutes(opening_time, closing_time, days):
+    """Minutes a table can be booked over `days` days of opening hours"""
+    today = timezone.now().date()
+    opening = datetime.combine(today, opening_time)
+    closing = datetime.combine(today, closing_time)
+    return days * (closing - opening).total_seconds() / 60
+
+def summarize_utilization(tables, available_minutes):
+    """Per-table and average utilization from table_usage() rows"""
+    utilization_data = []
+    for table in tables:
+        booked_minutes = table['booked_time'].total_seconds() / 60 if table['booked_time'] else 0
+        utilization_rate = (booked_minutes / available_minutes * 100) if available_minutes > 0 else 0
+        
+        utilization_data.append({
+            'table_number': table['table_number'],
+            'capacity': table['capacity'],
+            'utilization_rate': utilization_rate,
+            'booked_minutes': booked_minutes,
+            'total_bookings': table['total_bookings'],
+            'revenue': table['revenue'] or 0
+        })
+    
+    return {
+        'table_utilization': utilization_data,
+        'avg_utilization': sum(t['utilization_rate'] for t in utilization_data) / len(utilization_data) if utilization_data else 0
+    }
+
+def average_guests():
+    """Average party size over DailyReservationStats rows"""
+    return Cast(Sum('guests'), FloatField()) / Sum('bookings')
+
+# Day names indexed like PostgreSQL's EXTRACT(dow): Sunday is 0
+WEEKDAY_NAMES = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
+
+class ReservationFacts:
+    """
+    Columnar snapshot of a restaurant's reservation history.
+    
+    Loaded from the DailyReservationStats rollup with a single query and
+    kept as parallel lists sorted by date (one entry per date, hour and
+    status), so reports that need several views of the same history
+    (trends, seasonality, peak times, no-shows) don't each rescan it.
+    """
+    
+    def __init__(self, dates, hours, statuses, bookings, guests, revenue):
+        self.dates = dates
+        self.hours = hours
+        self.statuses = statuses
+        self.bookings = bookings
+        self.guests = guests
+        self.revenue = revenue
+    
+    @classmethod
+    def load(cls, restaurant=None):
+        stats = DailyReservationStats.objects.all()
+        if restaurant:
+            stats = stats.filter(restaurant=restaurant)
+        
+        # Merge restaurants when looking at the whole platform
+        rows = stats.values('date', 'hour', 'status').annotate(
+            total_bookings=Sum('bookings'),
+            total_guests=Sum('guests'),
+            total_revenue=Sum('revenue')
+        ).order_by('date').values_list(
+            'date', 'hour', 'status', 'total_bookings', 'total_guests', 'total_revenue'
+        )
+        
+        columns = [[], [], [], [], [], []]
+        for row in rows:
+            for column, value in zip(columns, row):
+                column.append(value)
+        return cls(*columns)
+    
+    def __len__(self):
+        return len(self.dates)
+    
+    def _between(self, start=None, end=None):
+        # Dates are sorted, so a date range is a contiguous slice
+        low = bisect_left(self.dates, start) if start else 0
+        high = bisect_right(self.dates, end) if end else len(self.dates)
+        return range(low, high)
+    
+    def daily_counts(self, start=None, end=None):
+        """Bookings per day, for days with at least one booking"""
+        counts = Counter()
+        for i in self._between(start, end):
+            counts[self.dates[i]] += self.bookings[i]
+        return [{'date': date, 'count': count} for date, count in sorted(counts.items()) if count]
+    
+    def daily_revenue(self, start=None, end=None):
+        """Completed payment revenue per day, for days with any revenue"""
+        totals = defaultdict(int)
+        for i in self._between(start, end):
+            if self.revenue[i]:
+                totals[self.dates[i]] += self.revenue[i]
+        return [{'date': date, 'revenue': revenue} for date, revenue in sorted(totals.items())]
+    
+    def revenue_per_booking(self, start=None, end=None):
+        """Average revenue per completed booking in the period"""
+        indices = self._between(start, end)
+        revenue = sum(self.revenue[i] for i in indices)
+        completed = sum(self.bookings[i] for i in indices if self.statuses[i] == 'completed')
+        return revenue / completed if completed else 0
+    
+    def monthly_patterns(self):
+        """Bookings, average party size and revenue per calendar month"""
+        months = defaultdict(lambda: {'count': 0, 'guests': 0, 'revenue': 0})
+        for date, bookings, guests, revenue in zip(self.dates, self.bookings, self.guests, self.revenue):
+            month = months[date.month]
+            month['count'] += bookings
+            month['guests'] += guests
+            month['revenue'] += revenue
+        
+        return [
+            {
+                'month': number,
+                'count': month['count'],
+                'avg_guests': month['guests'] / month['count'],
+                'revenue': month['revenue']
+            }
+            for number, month in sorted(months.items())
+            if month['count']
+        ]
+    
+    def hourly_counts(self):
+        """Bookings per starting hour, busiest first"""
+        hours = Counter()
+        for hour, bookings in zip(self.hours, self.bookings):
+            hours[hour] += bookings
+        return [
+            {'hour': hour, 'count': count}
+            for hour, count in hours.most_common()
+            if count
+        ]
+    
+    def weekday_counts(self):
+        """Bookings per day of the week (0 = Sunday), busiest first"""
+        weekdays = Counter()
+        for date, bookings in zip(self.dates, self.bookings):
+            weekdays[date.isoweekday() % 7] += bookings
+        return [
+            {'weekday': weekday, 'count': count}
+            for weekday, count in weekdays.most_common()
+            if count
+        ]
+    
+    def status_rate(self, status, before=None):
+        """Percentage of bookings (optionally before a date) with the given status"""
+        indices = self._between(end=before - timedelta(days=1)) if before else self._between()
+        total = sum(self.bookings[i] for i in indices)
+        if not total:
+            return 0
+        matching = sum(self.bookings[i] for i in indices if self.statuses[i] == status)
+        return matching / total * 100
 
 class AnalyticsEngine:
     """Advanced analytics for restaurant performance and booking patterns"""
@@ -12,50 +209,52 @@ class AnalyticsEngine:
     def __init__(self, restaurant=None):
         self.restaurant = restaurant
     
+    def get_daily_stats(self):
+        """Daily reservation rollup rows in scope for this engine"""
+        stats = DailyReservationStats.objects.all()
+        if self.restaurant:
+            stats = stats.filter(restaurant=self.restaurant)
+        return stats
+    
     def get_booking_trends(self, days=30):
         """Get booking trends over specified period"""
         end_date = timezone.now().date()
         start_date = end_date - timedelta(days=days)
         
-        queryset = Reservation.objects.filter(
+        stats = self.get_daily_stats().filter(
             date__range=[start_date, end_date]
         )
         
-        if self.restaurant:
-            queryset = queryset.filter(restaurant=self.restaurant)
-        
         # Daily booking counts
-        daily_bookings = queryset.values('date').annotate(
-            count=Count('id'),
-            confirmed=Count('id', filter=Q(status='confirmed')),
-            cancelled=Count('id', filter=Q(status='cancelled')),
-            revenue=Sum('payment__amount', filter=Q(payment__status='completed'))
+        daily_bookings = stats.values('date').annotate(
+            count=Sum('bookings'),
+            confirmed=Coalesce(Sum('bookings', filter=Q(status='confirmed')), 0),
+            cancelled=Coalesce(Sum('bookings', filter=Q(status='cancelled')), 0),
+            revenue=Sum('revenue')
         ).order_by('date')
         
-        # Weekly patterns
-        weekly_patterns = queryset.extra(
-            select={'weekday': 'EXTRACT(dow FROM date)'}
+        # Weekly patterns (0 = Sunday)
+        weekly_patterns = stats.annotate(
+            weekday=ExtractWeekDay('date') - 1
         ).values('weekday').annotate(
-            count=Count('id'),
-            avg_guests=Avg('number_of_guests')
+            count=Sum('bookings'),
+            avg_guests=average_guests()
         ).order_by('weekday')
         
         # Hourly patterns
-        hourly_patterns = queryset.extra(
-            select={'hour': 'EXTRACT(hour FROM time)'}
-        ).values('hour').annotate(
-            count=Count('id'),
-            avg_guests=Avg('number_of_guests')
+        hourly_patterns = stats.values('hour').annotate(
+            count=Sum('bookings'),
+            avg_guests=average_guests()
         ).order_by('hour')
         
+        totals = stats.aggregate(bookings=Sum('bookings'), revenue=Sum('revenue'))
+        
         return {
             'daily_bookings': list(daily_bookings),
             'weekly_patterns': list(weekly_patterns),
             'hourly_patterns': list(hourly_patterns),
-            'total_bookings': queryset.count(),
-            'total_revenue': queryset.aggregate(
-                revenue=Sum('payment__amount', filter=Q(payment__status='completed'))
-            )['revenue'] or 0
+            'total_bookings': totals['bookings'] or 0,
+            'total_revenue': totals['revenue'] or 0
         }
     
     def get_customer_insights(self):
@@ -101,34 +300,17 @@ class AnalyticsEngine:
         end_date = timezone.now().date()
         start_date = end_date - timedelta(days=days)
         
-        tables = self.restaurant.tables.all()
-        utilization_data = []
-        
-        for table in tables:
-            reservations = Reservation.objects.filter(
-                table=table,
-                date__range=[start_date, end_date],
-                status__in=['confirmed', 'completed']
-            )
-            
-            total_slots = days * 14  # Assuming 14 time slots per day (9 AM - 11 PM)
-            booked_slots = reservations.count()
-            utilization_rate = (booked_slots / total_slots * 100) if total_slots > 0 else 0
-            
-            utilization_data.append({
-                'table_number': table.table_number,
-                'capacity': table.capacity,
-                'utilization_rate': utilization_rate,
-                'total_bookings': booked_slots,
-                'revenue': reservations.aggregate(
-                    revenue=Sum('payment__amount', filter=Q(payment__status='completed'))
-                )['revenue'] or 0
-            })
+        # One grouped query for every table, including the ones never booked
+        tables = table_usage(self.restaurant.tables.all(), start_date, end_date).values(
+            'table_number', 'capacity', 'total_bookings', 'booked_time', 'revenue'
+        ).order_by('table_number')
         
-        return {
-            'table_utilization': utilization_data,
-            'avg_utilization': sum(t['utilization_rate'] for t in utilization_data) / len(utilization_data) if utilization_data else 0
-        }
+        available_minutes = opening_minutes(
+            self.restaurant.opening_time,
+            self.restaurant.closing_time,
+            (end_date - start_date).days + 1
+        )
+        return summarize_utilization(tables, available_minutes)
     
     def get_revenue_analytics(self, days=30):
         """Get detailed revenue analytics"""
@@ -155,8 +337,8 @@ class AnalyticsEngine:
         ).order_by('number_of_guests')
         
         # Peak revenue hours
-        revenue_by_hour = queryset.extra(
-            select={'hour': 'EXTRACT(hour FROM time)'}
+        revenue_by_hour = queryset.annotate(
+            hour=ExtractHour('time')
         ).values('hour').annotate(
             revenue=Sum('payment__amount'),
             count=Count('id')
@@ -176,26 +358,22 @@ class AnalyticsEngine:
     
     def get_predictive_insights(self):
         """Generate predictive insights for future bookings"""
-        # Get historical data for the last 90 days
-        historical_data = self.get_booking_trends(days=90)
-        
-        # Simple trend analysis
-        daily_bookings = historical_data['daily_bookings']
-        if len(daily_bookings) >= 7:
-            recent_avg = sum(day['count'] for day in daily_bookings[-7:]) / 7
-            previous_avg = sum(day['count'] for day in daily_bookings[-14:-7]) / 7
-            trend = ((recent_avg - previous_avg) / previous_avg * 100) if previous_avg > 0 else 0
-        else:
-            trend = 0
+        # Every sub-report below is derived from this one snapshot
+        facts = ReservationFacts.load(self.restaurant)
+        today = timezone.now().date()
+        
+        # Week-on-week change of the 7-day moving average of bookings
+        series = DailySeries.from_facts(facts, end=today)
+        trend = float(fit(series.bookings, series.start).weekly_change[0])
         
         # Seasonal patterns
-        seasonal_data = self.analyze_seasonal_patterns()
+        seasonal_data = self.analyze_seasonal_patterns(facts)
         
         # Capacity recommendations
         capacity_insights = self.get_capacity_recommendations()
         
         # Revenue forecasting
-        revenue_forecast = self.forecast_revenue()
+        revenue_forecast = self.forecast_revenue(facts=facts)
         
         return {
             'booking_trend': {
@@ -206,27 +384,25 @@ class AnalyticsEngine:
             'seasonal_patterns': seasonal_data,
             'capacity_insights': capacity_insights,
             'revenue_forecast': revenue_forecast,
-            'peak_times': self.identify_peak_times(),
-            'optimization_suggestions': self.get_optimization_suggestions()
+            'peak_times': self.identify_peak_times(facts),
+            'optimization_suggestions': self.get_optimization_suggestions(facts)
         }
     
-    def analyze_seasonal_patterns(self):
+    def get_trend_recommendation(self, trend):
+        """Suggest an action for the current booking trend"""
+        if trend > 5:
+            return 'Bookings are growing; review staffing for busy periods'
+        if trend < -5:
+            return 'Bookings are declining; consider promotions or special events'
+        return 'Bookings are stable'
+    
+    def analyze_seasonal_patterns(self, facts=None):
         """Analyze seasonal booking patterns"""
-        queryset = Reservation.objects.all()
-        if self.restaurant:
-            queryset = queryset.filter(restaurant=self.restaurant)
-        
-        # Monthly patterns
-        monthly_data = queryset.extra(
-            select={'month': 'EXTRACT(month FROM date)'}
-        ).values('month').annotate(
-            count=Count('id'),
-            avg_guests=Avg('number_of_guests'),
-            revenue=Sum('payment__amount', filter=Q(payment__status='completed'))
-        ).order_by('month')
+        facts = facts or ReservationFacts.load(self.restaurant)
+        monthly_data = facts.monthly_patterns()
         
         return {
-            'monthly_patterns': list(monthly_data),
+            'monthly_patterns': monthly_data,
             'peak_months': sorted(monthly_data, key=lambda x: x['count'], reverse=True)[:3],
             'low_months': sorted(monthly_data, key=lambda x: x['count'])[:3]
         }
@@ -264,70 +440,48 @@ class AnalyticsEngine:
         
         return recommendations
     
-    def forecast_revenue(self, days_ahead=30):
-        """Simple revenue forecasting based on historical trends"""
-        historical_revenue = self.get_revenue_analytics(days=90)
+    def forecast_revenue(self, days_ahead=30, facts=None):
+        """Revenue forecast from the trend and weekday pattern of the last 90 days"""
+        facts = facts or ReservationFacts.load(self.restaurant)
+        series = DailySeries.from_facts(facts)
         
-        if not historical_revenue['daily_revenue']:
+        if not series.revenue.any():
             return {'forecast': 0, 'confidence': 'low'}
         
-        # Calculate average daily revenue
-        daily_revenues = [day['revenue'] for day in historical_revenue['daily_revenue']]
-        avg_daily_revenue = sum(daily_revenues) / len(daily_revenues)
-        
-        # Simple linear trend
-        if len(daily_revenues) >= 30:
-            recent_avg = sum(daily_revenues[-15:]) / 15
-            older_avg = sum(daily_revenues[-30:-15]) / 15
-            growth_rate = (recent_avg - older_avg) / older_avg if older_avg > 0 else 0
-        else:
-            growth_rate = 0
-        
-        # Forecast
-        forecasted_daily = avg_daily_revenue * (1 + growth_rate)
-        forecasted_total = forecasted_daily * days_ahead
-        
-        confidence = 'high' if len(daily_revenues) >= 60 else 'medium' if len(daily_revenues) >= 30 else 'low'
-        
-        return {
-            'forecast': forecasted_total,
-            'daily_average': forecasted_daily,
-            'growth_rate': growth_rate * 100,
-            'confidence': confidence
-        }
+        return summarize(fit(series.revenue, series.start, days_ahead), 0)
     
-    def identify_peak_times(self):
+    def identify_peak_times(self, facts=None):
         """Identify peak booking times and patterns"""
-        queryset = Reservation.objects.all()
-        if self.restaurant:
-            queryset = queryset.filter(restaurant=self.restaurant)
-        
-        # Peak hours
-        hourly_data = queryset.extra(
-            select={'hour': 'EXTRACT(hour FROM time)'}
-        ).values('hour').annotate(
-            count=Count('id')
-        ).order_by('-count')
-        
-        # Peak days of week
-        weekly_data = queryset.extra(
-            select={'weekday': 'EXTRACT(dow FROM date)'}
-        ).values('weekday').annotate(
-            count=Count('id')
-        ).order_by('-count')
+        facts = facts or ReservationFacts.load(self.restaurant)
+        hourly_data = facts.hourly_counts()
+        weekly_data = facts.weekday_counts()
         
         return {
-            'peak_hours': list(hourly_data[:3]),
-            'peak_days': list(weekly_data[:3]),
+            'peak_hours': hourly_data[:3],
+            'peak_days': weekly_data[:3],
             'recommendations': self.get_peak_time_recommendations(hourly_data, weekly_data)
         }
     
-    def get_optimization_suggestions(self):
+    def get_peak_time_recommendations(self, hourly_data, weekly_data):
+        """Suggest actions for the busiest hours and days"""
+        recommendations = []
+        if hourly_data:
+            recommendations.append(
+                f"Busiest hour starts at {hourly_data[0]['hour']}:00; schedule extra staff"
+            )
+        if weekly_data:
+            day_name = WEEKDAY_NAMES[weekly_data[0]['weekday']]
+            recommendations.append(f'{day_name} is the busiest day; consider requiring deposits')
+        return recommendations
+    
+    def get_optimization_suggestions(self, facts=None):
         """Generate optimization suggestions based on analytics"""
+        facts = facts or ReservationFacts.load(self.restaurant)
+        today = timezone.now().date()
         suggestions = []
         
         # Analyze no-show rates
-        no_show_rate = self.calculate_no_show_rate()
+        no_show_rate = facts.status_rate('no_show', before=today)
         if no_show_rate > 15:
             suggestions.append({
                 'category': 'operations',
@@ -337,67 +491,170 @@ class AnalyticsEngine:
             })
         
         # Analyze cancellation patterns
-        cancellation_data = self.analyze_cancellation_patterns()
-        if cancellation_data['rate'] > 20:
+        cancellation_rate = facts.status_rate('cancelled')
+        if cancellation_rate > 20:
             suggestions.append({
                 'category': 'policy',
                 'suggestion': 'Review cancellation policy and implement deposits',
                 'impact': 'medium',
-                'cancellation_rate': cancellation_data['rate']
+                'cancellation_rate': cancellation_rate
             })
         
         # Revenue optimization
-        revenue_data = self.get_revenue_analytics()
-        if revenue_data['avg_revenue_per_booking'] < 50:
+        avg_revenue_per_booking = facts.revenue_per_booking(today - timedelta(days=30), today)
+        if avg_revenue_per_booking < 50:
             suggestions.append({
                 'category': 'revenue',
                 'suggestion': 'Consider implementing minimum spend requirements',
                 'impact': 'high',
-                'current_avg': revenue_data['avg_revenue_per_booking']
+                'current_avg': avg_revenue_per_booking
             })
         
         return suggestions
     
     def calculate_no_show_rate(self):
         """Calculate no-show rate for reservations"""
-        queryset = Reservation.objects.filter(
+        totals = self.get_daily_stats().filter(
             date__lt=timezone.now().date()
+        ).aggregate(
+            total=Sum('bookings'),
+            no_shows=Sum('bookings', filter=Q(status='no_show'))
         )
-        if self.restaurant:
-            queryset = queryset.filter(restaurant=self.restaurant)
         
-        total_reservations = queryset.count()
-        no_shows = queryset.filter(status='no_show').count()
+        total_reservations = totals['total'] or 0
+        no_shows = totals['no_shows'] or 0
         
         return (no_shows / total_reservations * 100) if total_reservations > 0 else 0
     
     def analyze_cancellation_patterns(self):
         """Analyze cancellation patterns and timing"""
+        totals = self.get_daily_stats().aggregate(
+            total=Sum('bookings'),
+            cancelled=Sum('bookings', filter=Q(status='cancelled'))
+        )
+        total_cancelled = totals['cancelled'] or 0
+        cancellation_rate = (total_cancelled / totals['total'] * 100) if totals['total'] else 0
+        
         queryset = Reservation.objects.filter(status='cancelled')
         if self.restaurant:
             queryset = queryset.filter(restaurant=self.restaurant)
         
-        total_reservations = Reservation.objects.all()
-        if self.restaurant:
-            total_reservations = total_reservations.filter(restaurant=self.restaurant)
-        
-        cancellation_rate = (queryset.count() / total_reservations.count() * 100) if total_reservations.count() > 0 else 0
-        
-        # Analyze timing of cancellations
-        cancellation_timing = queryset.extra(
-            select={
-                'hours_before': 'EXTRACT(EPOCH FROM (date + time - created_at)) / 3600'
-            }
-        ).values('hours_before').annotate(
+        # Analyze how far ahead cancelled reservations were booked
+        cancellation_timing = queryset.annotate(
+            lead_time=F('date') - TruncDate('created_at')
+        ).annotate(
+            booked_ahead=Case(
+                When(lead_time__lt=timedelta(days=1), then=Value('same_day')),
+                When(lead_time__lt=timedelta(days=2), then=Value('day_before')),
+                When(lead_time__lt=timedelta(days=8), then=Value('within_week')),
+                default=Value('earlier')
+            )
+        ).values('booked_ahead').annotate(
             count=Count('id')
-        )
+        ).order_by('booked_ahead')
         
         return {
             'rate': cancellation_rate,
             'timing_patterns': list(cancellation_timing),
-            'total_cancelled': queryset.count()
+            'total_cancelled': total_cancelled
         }
 
+def load_insights_inputs(days=30):
+    """
+    Gather what the insights snapshots need for every active restaurant.
+    
+    A fixed set of grouped queries covers all restaurants at once; the rows
+    are then split into one plain-data payload per restaurant, ready to be
+    handed to build_insights_snapshots in worker processes.
+    """
+    end_date = timezone.now().date()
+    start_date = end_date - timedelta(days=days)
+    open_days = days + 1
+    
+    restaurants = list(
+        Restaurant.objects.filter(is_active=True).values_list(
+            'id', 'opening_time', 'closing_time'
+        )
+    )
+    
+    series = DailySeries.load(days=open_days, end=end_date)
+    series_rows = {restaurant_id: row for row, restaurant_id in enumerate(series.restaurant_ids)}
+    
+    tables = defaultdict(list)
+    for table in table_usage(
+        Table.objects.filter(restaurant__is_active=True), start_date, end_date
+    ).values(
+        'restaurant_id', 'table_number', 'capacity', 'total_bookings', 'booked_time', 'revenue'
+    ).order_by('restaurant_id', 'table_number'):
+        tables[table.pop('restaurant_id')].append(table)
+    
+    rates = {
+        row.pop('restaurant_id'): row
+        for row in DailyReservationStats.objects.filter(
+            restaurant__is_active=True
+        ).values('restaurant_id').annotate(
+            total=Sum('bookings'),
+            past=Sum('bookings', filter=Q(date__lt=end_date)),
+            no_shows=Sum('bookings', filter=Q(date__lt=end_date, status='no_show')),
+            cancelled=Sum('bookings', filter=Q(status='cancelled'))
+        )
+    }
+    
+    payloads = []
+    for restaurant_id, opening_time, closing_time in restaurants:
+        row = series_rows.get(restaurant_id)
+        payloads.append({
+            'restaurant_id': restaurant_id,
+            'start': series.start,
+            'bookings': series.bookings[row].tolist() if row is not None else [0] * open_days,
+            'revenue': series.revenue[row].tolist() if row is not None else [0] * open_days,
+            'tables': tables.get(restaurant_id, []),
+            'available_minutes': opening_minutes(opening_time, closing_time, open_days),
+            'rates': rates.get(restaurant_id, {}),
+        })
+    return payloads
+
+def build_insights_snapshots(payloads):
+    """
+    Turn load_insights_inputs() payloads into dashboard snapshots.
+    
+    Pure computation on plain data, so chunks can run in separate processes.
+    """
+    if not payloads:
+        return []
+    
+    start = payloads[0]['start']
+    bookings = fit(np.array([payload['bookings'] for payload in payloads], dtype=float), start)
+    revenue = fit(np.array([payload['revenue'] for payload in payloads], dtype=float), start)
+    generated_at = timezone.now().isoformat()
+    
+    snapshots = []
+    for row, payload in enumerate(payloads):
+        rates = payload['rates']
+        total = rates.get('total') or 0
+        past = rates.get('past') or 0
+        
+        snapshots.append({
+            'restaurant_id': str(payload['restaurant_id']),
+            'generated_at': generated_at,
+            'booking_trends': {
+                'daily_bookings': [
+                    {'date': (start + timedelta(days=day)).isoformat(), 'count': int(count)}
+                    for day, count in enumerate(payload['bookings'])
+                ],
+                'total_bookings': int(sum(payload['bookings'])),
+                'weekly_change': float(bookings.weekly_change[row]),
+                'booking_forecast': summarize(bookings, row),
+                'revenue_forecast': summarize(revenue, row),
+            },
+            'table_utilization': summarize_utilization(
+                payload['tables'], payload['available_minutes']
+            ),
+            'no_show_rate': (rates.get('no_shows') or 0) / past * 100 if past else 0,
+            'cancellation_rate': (rates.get('cancelled') or 0) / total * 100 if total else 0,
+        })
+    return snapshots
+
 class RealtimeAnalytics:
     """Real-time analytics for live dashboard"""
     
@@ -439,35 +696,18 @@ class RealtimeAnalytics:
         if not self.restaurant:
             return {}
         
-        # Get all time slots (9 AM to 11 PM, 30-minute intervals)
-        time_slots = []
-        for hour in range(9, 23):
-            for minute in [0, 30]:
-                time_slots.append(f"{hour:02d}:{minute:02d}")
-        
-        # Get reservations for the date
-        reservations = Reservation.objects.filter(
-            restaurant=self.restaurant,
-            date=date,
-            status__in=['confirmed', 'pending']
-        )
+        occupancy = get_occupancy(self.restaurant.id, date)
+        total_tables = occupancy.total_tables
         
-        # Calculate availability for each time slot
         heatmap_data = []
-        total_tables = self.restaurant.tables.count()
-        
-        for time_slot in time_slots:
-            hour, minute = map(int, time_slot.split(':'))
-            slot_time = timezone.datetime.strptime(time_slot, '%H:%M').time()
-            
-            booked_tables = reservations.filter(time=slot_time).count()
-            available_tables = total_tables - booked_tables
+        for slot in occupancy.slots():
+            available_tables = slot['available_tables']
             availability_percentage = (available_tables / total_tables * 100) if total_tables > 0 else 0
             
             heatmap_data.append({
-                'time': time_slot,
+                'time': slot['time'],
                 'available_tables': available_tables,
-                'booked_tables': booked_tables,
+                'booked_tables': slot['booked_tables'],
                 'availability_percentage': availability_percentage
             })
         
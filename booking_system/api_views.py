@@ -1,18 +1,34 @@
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
+from rest_framework.permissions import IsAdminUser, IsAuthenticated, IsAuthenticatedOrReadOnly
 from django_filters.rest_framework import DjangoFilterBackend
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import StreamingHttpResponse
+from django.conf import settings
 from django.utils import timezone
 from django.db.models import Count, Avg, Q
 from datetime import datetime, timedelta
 
 from .models import Restaurant, Reservation, Review, Table
 from .serializers import (
-    RestaurantSerializer, ReservationSerializer, ReviewSerializer,
-    TableSerializer, AvailabilitySerializer, DashboardStatsSerializer
+    RestaurantSerializer, ReservationSerializer, ReservationListSerializer,
+    ReviewSerializer, TableSerializer, AvailabilitySerializer, DashboardStatsSerializer
 )
 from .filters import RestaurantFilter
+from .availability import SLOT_MINUTES, get_occupancy, find_available_tables, busy_table_ids
+from .booking import book_reservation, NoTableAvailable, BookingLockTimeout
+from .rollups import get_user_stats
+from .exports import EXPORT_FORMATS, filter_reservations, stream_export
+from .exceptions import BookingBusy
+from .cache_utils import (
+    STAFF_DASHBOARD_NAMESPACE, get_namespaced, get_cache_counters, get_cuisines,
+    get_insights_snapshots
+)
+
+# Dashboards are invalidated by signals and keyed to the current booking
+# slot; the timeout only bounds memory use
+DASHBOARD_CACHE_TIMEOUT = SLOT_MINUTES * 60
 
 class RestaurantViewSet(viewsets.ReadOnlyModelViewSet):
     """
@@ -27,21 +43,26 @@ class RestaurantViewSet(viewsets.ReadOnlyModelViewSet):
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_class = RestaurantFilter
     search_fields = ['name', 'location', 'cuisine']
-    ordering_fields = ['name', 'rating', 'created_at']
+    ordering_fields = ['name', 'rating', 'avg_rating', 'review_count', 'created_at']
     ordering = ['-rating']
 
+    def get_queryset(self):
+        # Ratings come from SQL so serializing a page never touches reviews
+        return super().get_queryset().annotate(
+            avg_rating=Restaurant.average_rating_expression()
+        )
+
     @action(detail=False, methods=['get'])
     def featured(self, request):
         """Get featured restaurants (top-rated)"""
-        featured = self.queryset.order_by('-rating')[:6]
+        featured = self.get_queryset().order_by('-rating')[:6]
         serializer = self.get_serializer(featured, many=True)
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
     def cuisines(self, request):
         """Get list of available cuisines"""
-        cuisines = self.queryset.values_list('cuisine', flat=True).distinct()
-        return Response({'cuisines': list(cuisines)})
+        return Response({'cuisines': get_cuisines()})
 
     @action(detail=True, methods=['get'])
     def availability(self, request, pk=None):
@@ -63,29 +84,16 @@ class RestaurantViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Get time slots with availability
-        time_slots = []
-        for hour in range(9, 23):  # 9 AM to 10 PM
-            for minute in [0, 30]:
-                slot_time = f"{hour:02d}:{minute:02d}"
-                time_obj = datetime.strptime(slot_time, '%H:%M').time()
-                
-                # Count available tables for this time slot
-                booked_tables = Reservation.objects.filter(
-                    restaurant=restaurant,
-                    date=date,
-                    time=time_obj,
-                    status__in=['confirmed', 'pending']
-                ).count()
-                
-                total_tables = restaurant.tables.count()
-                available_tables = total_tables - booked_tables
-                
-                time_slots.append({
-                    'time': slot_time,
-                    'available_tables': available_tables,
-                    'is_available': available_tables > 0
-                })
+        # Availability for every slot comes from the cached occupancy index
+        occupancy = get_occupancy(restaurant.id, date)
+        time_slots = [
+            {
+                'time': slot['time'],
+                'available_tables': slot['available_tables'],
+                'is_available': slot['available_tables'] > 0
+            }
+            for slot in occupancy.slots()
+        ]
         
         return Response({
             'restaurant': restaurant.name,
@@ -116,39 +124,39 @@ class ReservationViewSet(viewsets.ModelViewSet):
     """
     serializer_class = ReservationSerializer
     permission_classes = [IsAuthenticated]
+    list_actions = ['list', 'upcoming', 'history']
 
     def get_queryset(self):
+        queryset = Reservation.objects.select_related('user', 'restaurant', 'table')
         if self.request.user.is_staff:
-            return Reservation.objects.all()
-        return Reservation.objects.filter(user=self.request.user)
+            return queryset
+        return queryset.filter(user=self.request.user)
+
+    def get_serializer_class(self):
+        if self.action in self.list_actions:
+            return ReservationListSerializer
+        return ReservationSerializer
 
     def perform_create(self, serializer):
-        # Find available table
-        restaurant_id = serializer.validated_data['restaurant_id']
+        restaurant_id = serializer.validated_data.pop('restaurant_id')
         restaurant = Restaurant.objects.get(id=restaurant_id)
-        date = serializer.validated_data['date']
-        time = serializer.validated_data['time']
-        guests = serializer.validated_data['number_of_guests']
         
-        available_tables = Table.objects.filter(
+        reservation = Reservation(
+            user=self.request.user,
             restaurant=restaurant,
-            capacity__gte=guests,
-            is_active=True
-        ).exclude(
-            reservations__date=date,
-            reservations__time=time,
-            reservations__status__in=['confirmed', 'pending']
+            **serializer.validated_data
         )
         
-        if not available_tables.exists():
+        # Table assignment and save happen under the (restaurant, date) booking lock
+        try:
+            book_reservation(reservation)
+        except NoTableAvailable:
             from rest_framework.exceptions import ValidationError
-            raise ValidationError("No tables available for the selected time")
+            raise ValidationError({'detail': 'No tables available for the selected time'})
+        except BookingLockTimeout:
+            raise BookingBusy()
         
-        serializer.save(
-            user=self.request.user,
-            restaurant=restaurant,
-            table=available_tables.first()
-        )
+        serializer.instance = reservation
 
     @action(detail=True, methods=['post'])
     def cancel(self, request, pk=None):
@@ -176,6 +184,33 @@ class ReservationViewSet(viewsets.ModelViewSet):
         
         return Response({'message': 'Reservation cancelled successfully'})
 
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def export(self, request):
+        """
+        Stream reservations as CSV or NDJSON (staff only).
+        
+        Filters: restaurant, status, date_from, date_to; `output` picks
+        the format (csv by default).
+        """
+        export_format = request.query_params.get('output', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {'error': f"output must be one of: {', '.join(EXPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            reservations = filter_reservations(request.query_params)
+        except DjangoValidationError as e:
+            return Response({'error': e.message_dict}, status=status.HTTP_400_BAD_REQUEST)
+        
+        response = StreamingHttpResponse(
+            stream_export(reservations, export_format),
+            content_type=EXPORT_FORMATS[export_format]
+        )
+        response['Content-Disposition'] = f'attachment; filename="reservations.{export_format}"'
+        return response
+
     @action(detail=False, methods=['get'])
     def upcoming(self, request):
         """Get upcoming reservations for the user"""
@@ -228,7 +263,7 @@ class ReviewViewSet(viewsets.ModelViewSet):
         
         if existing_review:
             from rest_framework.exceptions import ValidationError
-            raise ValidationError("You have already reviewed this restaurant")
+            raise ValidationError({'detail': 'You have already reviewed this restaurant'})
         
         serializer.save(user=self.request.user, restaurant=restaurant)
 
@@ -258,39 +293,31 @@ def check_availability(request):
             status=status.HTTP_404_NOT_FOUND
         )
     
-    # Find available tables
-    available_tables = Table.objects.filter(
-        restaurant=restaurant,
-        capacity__gte=data['guests'],
-        is_active=True
-    ).exclude(
-        reservations__date=data['date'],
-        reservations__time=data['time'],
-        reservations__status__in=['confirmed', 'pending']
+    # Find available tables, best fit first
+    table_ids = find_available_tables(
+        restaurant.id, data['date'], data['time'], data['guests']
     )
+    available_tables = Table.objects.filter(id__in=table_ids).order_by('capacity', 'table_number')
     
-    table_serializer = TableSerializer(available_tables, many=True)
+    # One query tells which candidate tables are occupied right now
+    table_serializer = TableSerializer(
+        available_tables,
+        many=True,
+        context={'busy_table_ids': busy_table_ids(table_ids)}
+    )
     
     return Response({
-        'available': available_tables.exists(),
+        'available': bool(table_ids),
         'available_tables': table_serializer.data,
-        'count': available_tables.count(),
+        'count': len(table_ids),
         'restaurant': restaurant.name,
         'requested_date': data['date'].isoformat(),
         'requested_time': data['time'].strftime('%H:%M'),
         'requested_guests': data['guests']
     })
 
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
-def dashboard_stats(request):
-    """
-    Get dashboard statistics for the authenticated user.
-    
-    Returns different data based on user role:
-    - Regular users: Personal reservation statistics
-    - Staff users: Overall system statistics
-    """
+def build_dashboard_stats(request):
+    """Compute the dashboard payload for the requesting user (uncached)"""
     if request.user.is_staff:
         # Admin dashboard stats
         today = timezone.now().date()
@@ -317,29 +344,68 @@ def dashboard_stats(request):
         user_reservations = Reservation.objects.filter(user=request.user)
         
         stats = {
-            'total_reservations': user_reservations.count(),
-            'upcoming_reservations': user_reservations.filter(
-                date__gte=timezone.now().date(),
-                status__in=['confirmed', 'pending']
-            ).count(),
-            'completed_reservations': user_reservations.filter(
-                status='completed'
-            ).count(),
-            'cancelled_reservations': user_reservations.filter(
-                status='cancelled'
-            ).count(),
+            # Counters maintained by signals, constant time however many bookings
+            **get_user_stats(request.user.id),
             'favorite_restaurants': list(
                 user_reservations.values('restaurant__name', 'restaurant__id')
                 .annotate(count=Count('id'))
                 .order_by('-count')[:5]
             ),
-            'recent_reservations': ReservationSerializer(
-                user_reservations.order_by('-created_at')[:5],
+            'recent_reservations': ReservationListSerializer(
+                user_reservations.select_related('user', 'restaurant', 'table')
+                .order_by('-created_at')[:5],
                 many=True,
                 context={'request': request}
             ).data
         }
     
+    stats['owned_restaurant_ids'] = list(
+        request.user.owned_restaurants.values_list('id', flat=True)
+    )
+    return stats
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def dashboard_stats(request):
+    """
+    Get dashboard statistics for the authenticated user.
+    
+    Returns different data based on user role:
+    - Regular users: Personal reservation statistics
+    - Staff users: Overall system statistics
+    
+    Payloads are cached per user and dropped by signals as soon as the
+    reservations, reviews or restaurants they show change. They also show
+    values that depend on the current time (table availability, time until
+    a booking, whether it can still be cancelled), so each booking slot
+    gets fresh entries.
+    """
+    now = timezone.now()
+    slot = now.replace(
+        minute=now.minute - now.minute % SLOT_MINUTES, second=0, microsecond=0
+    ).isoformat()
+    if request.user.is_staff:
+        # Every staff member shares one generation; entries stay per user
+        # because the restaurants each of them owns differ
+        namespace = STAFF_DASHBOARD_NAMESPACE
+    else:
+        namespace = ('user', request.user.id)
+    
+    stats = get_namespaced(
+        namespace,
+        'dashboard_stats',
+        lambda: build_dashboard_stats(request),
+        request.user.id,
+        slot,
+        cache_timeout=DASHBOARD_CACHE_TIMEOUT
+    )
+    
+    # Owners get the insights precomputed by the compute_insights command
+    if stats['owned_restaurant_ids']:
+        stats['restaurant_insights'] = get_insights_snapshots(stats['owned_restaurant_ids'])
+    if request.user.is_staff and getattr(settings, 'CACHE_ACCESS_COUNTERS', False):
+        stats['cache_stats'] = get_cache_counters('dashboard_stats')
+    
     serializer = DashboardStatsSerializer(stats)
     return Response(serializer.data)
 
@@ -0,0 +1,214 @@
+"""
+Per-restaurant slot occupancy index and table assignment.
+
+A restaurant's bookings for one day are loaded with a single reservation
+query and kept in the cache as a tables x slots bitmap, so availability
+lookups don't have to count reservations slot by slot. The same snapshot
+keeps each table's sorted booking intervals, which is what table
+assignment uses to find a free, best-fitting table in memory.
+"""
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+from .cache_utils import (
+    cached, get_cache_key, get_version_key, bump_version, bump_version_on_commit
+)
+from .models import Reservation, Table
+
+# Bookable slots: 9:00 AM to 10:30 PM in 30-minute steps
+SLOT_MINUTES = 30
+FIRST_SLOT_HOUR = 9
+LAST_SLOT_HOUR = 23
+SLOT_TIMES = [
+    time(hour, minute)
+    for hour in range(FIRST_SLOT_HOUR, LAST_SLOT_HOUR)
+    for minute in range(0, 60, SLOT_MINUTES)
+]
+
+# Reservations in these states hold on to their table
+BLOCKING_STATUSES = ['pending', 'confirmed', 'seated']
+
+# Length of a booking when no end time is given
+DEFAULT_DURATION = timedelta(hours=2)
+
+OCCUPANCY_CACHE_TIMEOUT = 60 * 60
+DAY_MINUTES = 24 * 60
+
+
+def to_minutes(value):
+    """Convert a time to minutes after midnight"""
+    return value.hour * 60 + value.minute
+
+
+def reservation_interval(start, end):
+    """Return a reservation's (start, end) in minutes, clamping overnight bookings"""
+    start_minutes = to_minutes(start)
+    end_minutes = to_minutes(end) if end else start_minutes + 120
+    if end_minutes <= start_minutes:
+        end_minutes = DAY_MINUTES
+    return start_minutes, end_minutes
+
+
+class OccupancyIndex:
+    """Which of a restaurant's tables are booked in each slot of a day"""
+
+    def __init__(self, restaurant_id, date, tables, intervals, masks=None):
+        self.restaurant_id = restaurant_id
+        self.date = date
+        # (table_id, capacity) pairs for every bookable table
+        self.tables = tables
+        # table_id -> sorted list of (start, end) minute intervals
+        self.intervals = intervals
+        # table_id -> bitmask with bit i set when slot i is booked
+        if masks is None:
+            masks = {
+                table_id: self._slot_mask(intervals.get(table_id, ()))
+                for table_id, _ in tables
+            }
+        self.masks = masks
+
+    @classmethod
+    def build(cls, restaurant_id, date):
+        """Load tables and the day's reservations from the database"""
+        tables = list(
+            Table.objects.filter(restaurant_id=restaurant_id, is_active=True)
+            .exclude(status='maintenance')
+            .order_by('capacity', 'table_number')
+            .values_list('id', 'capacity')
+        )
+
+        intervals = defaultdict(list)
+        reservations = Reservation.objects.filter(
+            restaurant_id=restaurant_id,
+            date=date,
+            status__in=BLOCKING_STATUSES
+        ).values_list('table_id', 'time', 'start_time', 'end_time')
+
+        for table_id, booked_time, start_time, end_time in reservations:
+            intervals[table_id].append(
+                reservation_interval(start_time or booked_time, end_time)
+            )
+
+        for table_intervals in intervals.values():
+            table_intervals.sort()
+
+        return cls(restaurant_id, date, tables, dict(intervals))
+
+    @staticmethod
+    def _slot_mask(intervals):
+        mask = 0
+        for index, slot in enumerate(SLOT_TIMES):
+            slot_start = to_minutes(slot)
+            slot_end = slot_start + SLOT_MINUTES
+            if any(start < slot_end and end > slot_start for start, end in intervals):
+                mask |= 1 << index
+        return mask
+
+    @property
+    def total_tables(self):
+        return len(self.tables)
+
+    def booked_tables(self, slot_index):
+        """Number of tables booked during the given slot"""
+        bit = 1 << slot_index
+        return sum(1 for mask in self.masks.values() if mask & bit)
+
+    def available_tables(self, slot_index):
+        return self.total_tables - self.booked_tables(slot_index)
+
+    def is_free(self, table_id, start, end):
+        """Check a table has no booking overlapping the (start, end) minute interval"""
+        intervals = self.intervals.get(table_id, ())
+        # Only bookings starting before `end` can overlap
+        candidates = bisect_left(intervals, (end,))
+        return not any(booked_end > start for _, booked_end in intervals[:candidates])
+
+    def free_tables(self, start, end, guests):
+        """IDs of tables that seat the party and are free, smallest capacity first"""
+        return [
+            table_id for table_id, capacity in self.tables
+            if capacity >= guests and self.is_free(table_id, start, end)
+        ]
+
+    def slots(self):
+        """Per-slot booked/available table counts for the whole day"""
+        return [
+            {
+                'time': slot.strftime('%H:%M'),
+                'booked_tables': self.booked_tables(index),
+                'available_tables': self.available_tables(index),
+            }
+            for index, slot in enumerate(SLOT_TIMES)
+        ]
+
+    def to_cache(self):
+        return {
+            'tables': self.tables,
+            'intervals': self.intervals,
+            'masks': self.masks,
+        }
+
+    @classmethod
+    def from_cache(cls, restaurant_id, date, data):
+        return cls(
+            restaurant_id, date, data['tables'], data['intervals'], data['masks']
+        )
+
+
+def get_occupancy(restaurant_id, date):
+    """Get the occupancy index for a restaurant and date, building it on a cache miss"""
+    # Never answer availability from a superseded index
+    data = cached(
+        get_cache_key('occupancy', restaurant_id, date.isoformat()),
+        lambda: OccupancyIndex.build(restaurant_id, date).to_cache(),
+        OCCUPANCY_CACHE_TIMEOUT,
+        version_key=get_version_key('occupancy', restaurant_id),
+        serve_stale=False
+    )
+    return OccupancyIndex.from_cache(restaurant_id, date, data)
+
+
+def booking_interval(date, start_time, duration=DEFAULT_DURATION):
+    """Minute interval a booking starting at `start_time` would occupy"""
+    end_time = (datetime.combine(date, start_time) + duration).time()
+    return reservation_interval(start_time, end_time)
+
+
+def find_available_tables(restaurant_id, date, start_time, guests, duration=DEFAULT_DURATION):
+    """IDs of all tables free for the booking, best fit (smallest capacity) first"""
+    occupancy = get_occupancy(restaurant_id, date)
+    start, end = booking_interval(date, start_time, duration)
+    return occupancy.free_tables(start, end, guests)
+
+
+def assign_table(restaurant_id, date, start_time, guests, duration=DEFAULT_DURATION):
+    """Pick the best-fitting free table for a booking, or None when fully booked"""
+    table_ids = find_available_tables(restaurant_id, date, start_time, guests, duration)
+    return table_ids[0] if table_ids else None
+
+
+def busy_table_ids(table_ids, at=None):
+    """IDs among `table_ids` that have a booking in progress at `at` (default: now), in one query"""
+    at = at or timezone.now()
+    return set(
+        Reservation.objects.filter(
+            table_id__in=table_ids,
+            date=at.date(),
+            status__in=BLOCKING_STATUSES,
+            start_time__lte=at.time(),
+            end_time__gt=at.time()
+        ).values_list('table_id', flat=True)
+    )
+
+
+def invalidate_occupancy(restaurant_id):
+    """Drop every cached occupancy index of a restaurant"""
+    bump_version('occupancy', restaurant_id)
+
+
+def invalidate_occupancy_on_commit(restaurant_id):
+    """Invalidate now and again once the current transaction commits"""
+    bump_version_on_commit('occupancy', restaurant_id)
@@ -0,0 +1,167 @@
+"""
+Race-free reservation booking.
+
+On PostgreSQL the database itself rejects overlapping bookings of a table
+(see the `reservation_table_no_overlap` exclusion constraint), so bookings
+are inserted optimistically against the cached occupancy index and simply
+move on to the next candidate table when the constraint fires.
+
+Elsewhere (or with BOOKING_OPTIMISTIC_INSERTS = False) bookings for the
+same restaurant and date are serialized instead: PostgreSQL takes an
+advisory lock, other databases lock the restaurant's table rows, and
+contention is retried with backoff until a bounded deadline.
+"""
+import time
+import zlib
+
+from django.conf import settings
+from django.db import IntegrityError, OperationalError, connection, transaction
+
+from .availability import OccupancyIndex, booking_interval, find_available_tables
+from .models import Table
+
+# SQLSTATE raised by PostgreSQL when an exclusion constraint is violated
+EXCLUSION_VIOLATION = '23P01'
+
+BOOKING_LOCK_TIMEOUT = 5.0
+RETRY_DELAY = 0.01
+MAX_RETRY_DELAY = 0.2
+
+
+class BookingError(Exception):
+    """Base class for booking failures"""
+    pass
+
+
+class NoTableAvailable(BookingError):
+    """No table seats the party for the requested time"""
+    pass
+
+
+class BookingLockTimeout(BookingError):
+    """The booking lock could not be taken within the allowed wait"""
+    pass
+
+
+def has_overlap_constraint():
+    """Whether the database enforces non-overlapping bookings per table"""
+    return (
+        connection.vendor == 'postgresql' and
+        getattr(settings, 'BOOKING_OPTIMISTIC_INSERTS', True)
+    )
+
+
+def _is_overlap_violation(error):
+    return getattr(error.__cause__, 'pgcode', None) == EXCLUSION_VIOLATION
+
+
+def _insert_first_free(reservation, table_ids):
+    for table_id in table_ids:
+        reservation.table_id = table_id
+        try:
+            with transaction.atomic():
+                reservation.save()
+            return True
+        except IntegrityError as error:
+            if not _is_overlap_violation(error):
+                raise
+            # Someone else booked this table in the meantime
+            reservation._state.adding = True
+    return False
+
+
+def _book_optimistically(reservation):
+    # Candidates come from the cached index, so the common case is a single INSERT
+    table_ids = find_available_tables(
+        reservation.restaurant_id,
+        reservation.date,
+        reservation.time,
+        reservation.number_of_guests
+    )
+    if _insert_first_free(reservation, table_ids):
+        return reservation
+
+    # The cache may be behind a cancellation; retry once against the database
+    occupancy = OccupancyIndex.build(reservation.restaurant_id, reservation.date)
+    start, end = booking_interval(reservation.date, reservation.time)
+    fresh_ids = [
+        table_id
+        for table_id in occupancy.free_tables(start, end, reservation.number_of_guests)
+        if table_id not in table_ids
+    ]
+    if _insert_first_free(reservation, fresh_ids):
+        return reservation
+
+    raise NoTableAvailable('No tables available for the selected time')
+
+
+def _advisory_lock_key(restaurant_id):
+    # pg advisory locks take two signed 32-bit keys
+    key = zlib.crc32(str(restaurant_id).encode())
+    return key - (1 << 32) if key >= (1 << 31) else key
+
+
+def _try_booking_lock(restaurant_id, date):
+    """Try to take the (restaurant, date) booking lock for the current transaction"""
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT pg_try_advisory_xact_lock(%s, %s)',
+                [_advisory_lock_key(restaurant_id), date.toordinal()]
+            )
+            return cursor.fetchone()[0]
+
+    nowait = connection.features.has_select_for_update_nowait
+    list(
+        Table.objects.select_for_update(nowait=nowait)
+        .filter(restaurant_id=restaurant_id)
+        .values_list('id', flat=True)
+    )
+    return True
+
+
+def _assign_and_save(reservation):
+    # Read the day's bookings straight from the database while holding the lock
+    occupancy = OccupancyIndex.build(reservation.restaurant_id, reservation.date)
+    start, end = booking_interval(reservation.date, reservation.time)
+    table_ids = occupancy.free_tables(start, end, reservation.number_of_guests)
+
+    if not table_ids:
+        raise NoTableAvailable('No tables available for the selected time')
+
+    reservation.table_id = table_ids[0]
+    reservation.save()
+    return reservation
+
+
+def book_reservation(reservation, timeout=BOOKING_LOCK_TIMEOUT):
+    """
+    Assign the best-fitting free table to an unsaved reservation and save it.
+
+    Raises NoTableAvailable when the restaurant is fully booked for that time
+    and BookingLockTimeout when the lock stays contended past `timeout` seconds.
+    """
+    if has_overlap_constraint():
+        return _book_optimistically(reservation)
+
+    deadline = time.monotonic() + timeout
+    delay = RETRY_DELAY
+
+    while True:
+        try:
+            with transaction.atomic():
+                if _try_booking_lock(reservation.restaurant_id, reservation.date):
+                    return _assign_and_save(reservation)
+        except OperationalError:
+            # Lock contention reported by the database itself, e.g. NOWAIT
+            # failures or SQLite's "database is locked"
+            pass
+
+        if time.monotonic() + delay > deadline:
+            raise BookingLockTimeout(
+                f'Could not lock bookings for restaurant {reservation.restaurant_id} '
+                f'on {reservation.date} within {timeout} seconds'
+            )
+
+        time.sleep(delay)
+        delay = min(delay * 2, MAX_RETRY_DELAY)
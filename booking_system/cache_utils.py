@@ -1,96 +1,396 @@
+from django.conf import settings
 from django.core.cache import cache
-from django.db.models import Avg, Count
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
 from .models import Restaurant, Reservation, Review
 import hashlib
+import math
+import random
+import threading
+import time
+from collections import OrderedDict
 
 def get_cache_key(prefix, *args):
     """Generate a cache key from prefix and arguments"""
     key_data = f"{prefix}:{'_'.join(str(arg) for arg in args)}"
     return hashlib.md5(key_data.encode()).hexdigest()
 
-def get_restaurant_stats(restaurant_id, cache_timeout=300):
-    """Get cached restaurant statistics"""
-    cache_key = get_cache_key('restaurant_stats', restaurant_id)
-    stats = cache.get(cache_key)
+# Generation counters
+#
+# Every cached entry belongs to a namespace such as ('restaurant', id) and is
+# stored together with the namespace's generation at build time. Bumping
+# the generation (one integer) invalidates the whole namespace at once,
+# whatever keys its entries live under.
+
+# Restaurant listings shared by everyone: popular restaurants, cuisines
+RESTAURANTS_NAMESPACE = ('restaurants',)
+# The staff dashboard summarises every restaurant and booking
+STAFF_DASHBOARD_NAMESPACE = ('dashboard', 'staff')
+
+def _new_version():
+    # Seeded from the clock so an evicted counter never reuses an old version
+    return int(time.time() * 1000)
+
+def get_version_key(scope, *args):
+    """Cache key of the generation counter for a namespace"""
+    return get_cache_key(f'{scope}_version', *args)
+
+def bump_version(scope, *args):
+    """Invalidate every entry stored under the current generation of a namespace"""
+    version_key = get_version_key(scope, *args)
+    try:
+        cache.incr(version_key)
+    except ValueError:
+        cache.set(version_key, _new_version(), None)
+    # This worker sees the new generation at once, the others within
+    # LOCAL_VERSION_CHECK_INTERVAL
+    local_cache.delete(version_key)
+
+def bump_version_on_commit(scope, *args):
+    """
+    Bump now, so the writing transaction sees its own changes, and again on
+    commit, in case another worker cached the pre-commit state meanwhile.
+    """
+    bump_version(scope, *args)
+    transaction.on_commit(lambda: bump_version(scope, *args))
+
+def count_cache_access(name, hit):
+    """Count a hit or miss for one cached resource, if CACHE_ACCESS_COUNTERS is on"""
+    if not getattr(settings, 'CACHE_ACCESS_COUNTERS', False):
+        return
+    counter_key = get_cache_key('cache_counter', name, 'hits' if hit else 'misses')
+    try:
+        cache.incr(counter_key)
+    except ValueError:
+        cache.set(counter_key, 1, None)
+
+def get_cache_counters(name):
+    """Hits, misses and hit rate recorded for a cached resource"""
+    hits = cache.get(get_cache_key('cache_counter', name, 'hits'), 0)
+    misses = cache.get(get_cache_key('cache_counter', name, 'misses'), 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': hits / total * 100 if total else 0,
+    }
+
+# Stampede protection
+#
+# Entries stay in the cache for STALE_FACTOR times their TTL. Past the TTL
+# (or once their namespace is bumped) one worker takes a short lock and
+# rebuilds while the others keep serving the stale value. Shortly before
+# expiry, workers also volunteer to rebuild early at random, with a
+# probability that grows with how slow the entry is to build, so hot
+# entries are usually refreshed before anyone sees them expire.
+
+STALE_FACTOR = 2
+# Longest a rebuild may hold its lock before another worker takes over
+REBUILD_LOCK_TIMEOUT = 30
+# How long a worker with nothing to serve waits for another one's rebuild
+REBUILD_WAIT = 2
+REBUILD_POLL_INTERVAL = 0.05
+# Higher values refresh earlier (the XFetch beta)
+EARLY_REFRESH_BETA = 1.0
+
+def _is_current(entry, version, early=0):
+    stored_version, _, expires_at, _ = entry
+    if stored_version != version:
+        return False
+    return expires_at is None or time.time() + early < expires_at
+
+def _is_fresh(entry, version):
+    # 1 - random() lies in (0, 1], so the log is defined and <= 0
+    early = entry[3] * EARLY_REFRESH_BETA * -math.log(1 - random.random())
+    return _is_current(entry, version, early)
+
+def _wait_for_rebuild(cache_key, version):
+    deadline = time.monotonic() + REBUILD_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(REBUILD_POLL_INTERVAL)
+        entry = cache.get(cache_key)
+        if entry is not None and _is_current(entry, version):
+            return entry
+    return None
+
+def cached(cache_key, build, cache_timeout=300, version_key=None, name=None, serve_stale=True):
+    """
+    Return the cached result of `build()`, rebuilding it at most once across
+    workers when it expires or was stored under an older version of
+    `version_key`. Hits and misses are counted under `name` when given.
+    
+    With `serve_stale=False` workers wait for the rebuild instead of
+    returning an expired or invalidated value.
+    """
+    keys = [cache_key] if version_key is None else [version_key, cache_key]
+    found = cache.get_many(keys)
+    version = None
+    if version_key is not None:
+        version = found.get(version_key)
+        if version is None:
+            cache.add(version_key, _new_version(), None)
+            version = cache.get(version_key)
     
-    if stats is None:
+    entry = found.get(cache_key)
+    if entry is not None and _is_fresh(entry, version):
+        if name:
+            count_cache_access(name, hit=True)
+        return entry[1]
+    
+    lock_key = get_cache_key('cache_rebuild_lock', cache_key)
+    locked = cache.add(lock_key, 1, REBUILD_LOCK_TIMEOUT)
+    if not locked:
+        # Someone else is rebuilding: serve what we have, or wait for theirs
+        if entry is None or not (serve_stale or _is_current(entry, version)):
+            entry = _wait_for_rebuild(cache_key, version)
+        if entry is not None:
+            if name:
+                count_cache_access(name, hit=True)
+            return entry[1]
+    
+    if name:
+        count_cache_access(name, hit=False)
+    try:
+        started = time.monotonic()
+        value = build()
+        build_seconds = time.monotonic() - started
+        if cache_timeout is None:
+            cache.set(cache_key, (version, value, None, build_seconds), None)
+        else:
+            cache.set(
+                cache_key,
+                (version, value, time.time() + cache_timeout, build_seconds),
+                cache_timeout * STALE_FACTOR
+            )
+    finally:
+        # A worker that gave up waiting must not release the rebuilder's lock
+        if locked:
+            cache.delete(lock_key)
+    return value
+
+def get_namespaced(namespace, name, build, *args, cache_timeout=300):
+    """Cached `build()` for `name(*args)`, invalidated with its namespace"""
+    return cached(
+        get_cache_key(name, *namespace, *args),
+        build,
+        cache_timeout,
+        version_key=get_version_key(*namespace),
+        name=name
+    )
+
+# Process-local tier
+#
+# Hot reference data (cuisines, popular restaurants) is read on nearly
+# every request. A small LRU in each worker serves it without a round trip
+# to the shared cache. Local copies are tagged with their namespace
+# generation, which each worker re-reads from the shared cache at most
+# once per LOCAL_VERSION_CHECK_INTERVAL, so other workers' invalidations
+# reach it within that interval.
+
+LOCAL_CACHE_MAX_ENTRIES = 500
+LOCAL_CACHE_TIMEOUT = 60
+LOCAL_VERSION_CHECK_INTERVAL = 5
+
+class LocalCache:
+    """Thread-safe LRU with per-entry expiry, private to one worker process"""
+
+    def __init__(self, max_entries=LOCAL_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + timeout)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+local_cache = LocalCache()
+
+def _local_version(version_key):
+    version = local_cache.get(version_key)
+    if version is None:
+        version = cache.get(version_key)
+        if version is None:
+            cache.add(version_key, _new_version(), None)
+            version = cache.get(version_key)
+        local_cache.set(version_key, version, LOCAL_VERSION_CHECK_INTERVAL)
+    return version
+
+def get_local_namespaced(namespace, name, build, *args, cache_timeout=300,
+                         local_timeout=LOCAL_CACHE_TIMEOUT):
+    """Like get_namespaced, with a process-local copy in front of the shared cache"""
+    cache_key = get_cache_key(name, *namespace, *args)
+    version = _local_version(get_version_key(*namespace))
+    entry = local_cache.get(cache_key)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+    
+    value = get_namespaced(namespace, name, build, *args, cache_timeout=cache_timeout)
+    local_cache.set(cache_key, (version, value), min(local_timeout, cache_timeout))
+    return value
+
+def invalidate_namespaces_for(instance):
+    """Bump every namespace holding cached data derived from a model instance"""
+    if isinstance(instance, Restaurant):
+        namespaces = [
+            RESTAURANTS_NAMESPACE,
+            ('restaurant', instance.pk),
+            # Owners see their restaurants on their own dashboard
+            ('user', instance.user_id),
+        ]
+    elif isinstance(instance, Reservation):
+        namespaces = [
+            ('restaurant', instance.restaurant_id),
+            ('user', instance.user_id),
+        ]
+    elif isinstance(instance, Review):
+        namespaces = [
+            RESTAURANTS_NAMESPACE,
+            ('restaurant', instance.restaurant_id),
+        ]
+    else:
+        return
+    
+    for namespace in namespaces + [STAFF_DASHBOARD_NAMESPACE]:
+        bump_version_on_commit(*namespace)
+
+def get_restaurant_stats(restaurant_id, cache_timeout=6 * 60 * 60):
+    """Get cached restaurant statistics"""
+    def build():
         try:
             restaurant = Restaurant.objects.get(id=restaurant_id)
-            stats = {
-                'total_reservations': restaurant.reservations.count(),
-                'avg_rating': restaurant.reviews.aggregate(
-                    avg=Avg('rating')
-                )['avg'] or 0,
-                'review_count': restaurant.reviews.count(),
-                'completed_reservations': restaurant.reservations.filter(
-                    status='completed'
-                ).count(),
-            }
-            cache.set(cache_key, stats, cache_timeout)
         except Restaurant.DoesNotExist:
-            stats = {}
+            return {}
+        return {
+            'total_reservations': restaurant.reservations.count(),
+            'avg_rating': restaurant.average_rating,
+            'review_count': restaurant.review_count,
+            'completed_reservations': restaurant.reservations.filter(
+                status='completed'
+            ).count(),
+        }
     
-    return stats
+    return get_namespaced(
+        ('restaurant', restaurant_id), 'restaurant_stats', build, cache_timeout=cache_timeout
+    )
 
-def get_popular_restaurants(limit=10, cache_timeout=600):
+def popular_restaurants():
+    """Active restaurants, most popular first"""
+    return Restaurant.objects.filter(is_active=True).annotate(
+        avg_rating=Restaurant.average_rating_expression()
+    ).order_by('-avg_rating', '-review_count')
+
+def get_popular_restaurants(limit=10, cache_timeout=6 * 60 * 60):
     """Get cached list of popular restaurants"""
-    cache_key = get_cache_key('popular_restaurants', limit)
-    restaurants = cache.get(cache_key)
-    
-    if restaurants is None:
-        restaurants = list(
-            Restaurant.objects.active()
-            .with_ratings()
-            .order_by('-avg_rating', '-review_count')[:limit]
+    def build():
+        return list(
+            popular_restaurants()[:limit]
             .values('id', 'name', 'cuisine', 'location', 'avg_rating', 'review_count')
         )
-        cache.set(cache_key, restaurants, cache_timeout)
     
-    return restaurants
+    return get_local_namespaced(
+        RESTAURANTS_NAMESPACE, 'popular_restaurants', build, limit, cache_timeout=cache_timeout
+    )
 
-def get_cuisine_stats(cache_timeout=1800):
+def get_cuisine_stats(cache_timeout=24 * 60 * 60):
     """Get cached cuisine statistics"""
-    cache_key = 'cuisine_stats'
-    stats = cache.get(cache_key)
-    
-    if stats is None:
+    def build():
         stats = list(
-            Restaurant.objects.active()
+            Restaurant.objects.filter(is_active=True)
             .values('cuisine')
             .annotate(
                 count=Count('id'),
-                avg_rating=Avg('reviews__rating')
+                review_total=Sum('review_count'),
+                rating_total=Sum('review_sum')
             )
             .order_by('-count')
         )
-        cache.set(cache_key, stats, cache_timeout)
+        # Weighted average over each cuisine's stored review aggregates
+        for row in stats:
+            review_total = row.pop('review_total') or 0
+            rating_total = row.pop('rating_total') or 0
+            row['avg_rating'] = rating_total / review_total if review_total else None
+        return stats
+    
+    return get_local_namespaced(
+        RESTAURANTS_NAMESPACE, 'cuisine_stats', build, cache_timeout=cache_timeout
+    )
+
+def get_cuisines(cache_timeout=24 * 60 * 60):
+    """Get the cached list of cuisines offered by active restaurants"""
+    def build():
+        return list(
+            Restaurant.objects.filter(is_active=True)
+            .values_list('cuisine', flat=True)
+            .distinct()
+            .order_by('cuisine')
+        )
     
-    return stats
+    return get_local_namespaced(
+        RESTAURANTS_NAMESPACE, 'cuisines', build, cache_timeout=cache_timeout
+    )
 
 def invalidate_restaurant_cache(restaurant_id):
     """Invalidate all cache entries related to a restaurant"""
-    cache_keys = [
-        get_cache_key('restaurant_stats', restaurant_id),
-        'popular_restaurants_10',
-        'cuisine_stats',
-        'home_stats',
-    ]
-    
-    cache.delete_many(cache_keys)
+    bump_version('restaurant', restaurant_id)
+    bump_version(*RESTAURANTS_NAMESPACE)
 
-def get_user_reservation_stats(user_id, cache_timeout=300):
+def get_user_reservation_stats(user_id, cache_timeout=60 * 60):
     """Get cached user reservation statistics"""
-    cache_key = get_cache_key('user_reservation_stats', user_id)
-    stats = cache.get(cache_key)
+    from .rollups import get_user_stats
+    today = timezone.now().date()
     
-    if stats is None:
-        reservations = Reservation.objects.filter(user_id=user_id)
-        stats = {
-            'total_reservations': reservations.count(),
-            'upcoming_reservations': reservations.upcoming().count(),
-            'completed_reservations': reservations.filter(status='completed').count(),
-            'cancelled_reservations': reservations.filter(status='cancelled').count(),
-        }
-        cache.set(cache_key, stats, cache_timeout)
+    def build():
+        # Read from the maintained counters, whatever the user's history
+        return get_user_stats(user_id, as_of=today)
     
-    return stats
\ No newline at end of file
+    # "Upcoming" depends on the date, so each day gets its own entry
+    return get_namespaced(
+        ('user', user_id), 'user_reservation_stats', build, today.isoformat(),
+        cache_timeout=cache_timeout
+    )
+
+# Insights snapshots are rebuilt nightly; keep them until the next run lands
+INSIGHTS_SNAPSHOT_TIMEOUT = 26 * 60 * 60
+
+def set_insights_snapshots(snapshots, cache_timeout=INSIGHTS_SNAPSHOT_TIMEOUT):
+    """Store precomputed per-restaurant insights snapshots"""
+    cache.set_many(
+        {
+            get_cache_key('insights_snapshot', snapshot['restaurant_id']): snapshot
+            for snapshot in snapshots
+        },
+        cache_timeout
+    )
+
+def get_insights_snapshots(restaurant_ids):
+    """Get the cached insights snapshots for the given restaurants, skipping missing ones"""
+    keys = {
+        get_cache_key('insights_snapshot', restaurant_id): restaurant_id
+        for restaurant_id in restaurant_ids
+    }
+    found = cache.get_many(keys)
+    return [found[key] for key in keys if key in found]
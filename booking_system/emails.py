@@ -0,0 +1,97 @@
+"""
+Reservation email rendering.
+
+The emails/* templates are looked up and compiled once per process and
+kept here, so rendering an email never touches the template loaders. The
+HTML and plain-text variants are rendered from one context pass: the
+values are computed (dates and times formatted) once per email and pushed
+onto a Context shared by both variants, and by every email of a
+render_many() run. Plain text is rendered without HTML autoescaping.
+"""
+import threading
+
+from django.dispatch import receiver
+from django.template import Context
+from django.template.loader import get_template
+from django.utils.autoreload import file_changed
+from django.utils.formats import date_format, time_format
+
+from .mailer import build_message
+
+# Subject and template (without extension) of each reservation email
+RESERVATION_EMAILS = {
+    'confirmation': ('Reservation Confirmation - {name}', 'emails/reservation_confirmation'),
+    'cancellation': ('Reservation Cancelled - {name}', 'emails/reservation_cancellation'),
+    'reminder': ('Reminder: Your reservation at {name}', 'emails/reservation_reminder'),
+}
+
+_compiled = {}
+_compiled_lock = threading.Lock()
+
+def get_email_templates(kind):
+    """The compiled (html, text) templates of an email kind"""
+    templates = _compiled.get(kind)
+    if templates is None:
+        with _compiled_lock:
+            templates = _compiled.get(kind)
+            if templates is None:
+                _, name = RESERVATION_EMAILS[kind]
+                # The engine-level templates render a Context directly
+                templates = (
+                    get_template(f'{name}.html').template,
+                    get_template(f'{name}.txt').template,
+                )
+                _compiled[kind] = templates
+    return templates
+
+def preload_email_templates():
+    """Compile every reservation email template up front"""
+    for kind in RESERVATION_EMAILS:
+        get_email_templates(kind)
+
+def clear_email_templates():
+    """Forget the compiled templates, e.g. after they were edited"""
+    with _compiled_lock:
+        _compiled.clear()
+
+@receiver(file_changed, dispatch_uid='booking_system_email_templates_changed')
+def email_template_changed(sender, file_path, **kwargs):
+    # The development server keeps running when only templates change
+    if file_path.suffix in ('.html', '.txt'):
+        clear_email_templates()
+
+def email_context(reservation):
+    """Template values of a reservation email, formatted once for both variants"""
+    return {
+        'reservation': reservation,
+        'user': reservation.user,
+        'restaurant': reservation.restaurant,
+        'reservation_date': date_format(reservation.date, 'l, F j, Y'),
+        'reservation_time': time_format(reservation.time, 'g:i A'),
+    }
+
+def _render(context, kind, reservation):
+    subject, _ = RESERVATION_EMAILS[kind]
+    html_template, text_template = get_email_templates(kind)
+    with context.push(email_context(reservation)):
+        context.autoescape = True
+        html_body = html_template.render(context)
+        context.autoescape = False
+        text_body = text_template.render(context)
+
+    return build_message(
+        subject.format(name=reservation.restaurant.name),
+        text_body,
+        html_body,
+        reservation.contact_email or reservation.user.email
+    )
+
+def render_email(reservation, kind):
+    """Render one reservation email, ready to send"""
+    return _render(Context(), kind, reservation)
+
+def render_many(reservations, kind):
+    """Lazily render one email of `kind` per reservation, sharing a single Context"""
+    context = Context()
+    for reservation in reservations:
+        yield _render(context, kind, reservation)
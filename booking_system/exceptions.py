@@ -1,10 +1,17 @@
 from rest_framework.views import exception_handler
 from rest_framework.response import Response
+from rest_framework.exceptions import APIException
 from rest_framework import status
 import logging
 
 logger = logging.getLogger(__name__)
 
+class BookingBusy(APIException):
+    """Raised when concurrent bookings keep a restaurant's booking lock contended"""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'The restaurant is handling too many bookings right now, please try again.'
+    default_code = 'booking_busy'
+
 def custom_exception_handler(exc, context):
     """
     Custom exception handler that provides consistent error responses
@@ -22,11 +29,17 @@ def custom_exception_handler(exc, context):
             f"{exc.__class__.__name__}: {str(exc)}"
         )
         
-        # Customize the error response format
+        # Customize the error response format; ValidationError data may be a list
+        if isinstance(response.data, dict):
+            message = response.data.get('detail', str(exc))
+        elif isinstance(response.data, list) and response.data:
+            message = response.data[0]
+        else:
+            message = str(exc)
         custom_response_data = {
             'error': True,
             'status_code': response.status_code,
-            'message': response.data.get('detail', str(exc)),
+            'message': message,
             'errors': response.data if isinstance(response.data, dict) else None
         }
         
@@ -0,0 +1,83 @@
+"""
+Streaming reservation exports.
+
+Reservations are read as flat tuples with values_list() and iterated in
+chunks (a server-side cursor on PostgreSQL), then encoded line by line as
+CSV or NDJSON, so exporting millions of rows holds only one chunk in
+memory whether it goes to an HTTP response or a file.
+"""
+import csv
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .filters import ReservationFilter
+from .models import Reservation
+
+EXPORT_CHUNK_SIZE = 2000
+
+# Column name and the field it is read from
+EXPORT_COLUMNS = [
+    ('id', 'id'),
+    ('restaurant_id', 'restaurant_id'),
+    ('restaurant', 'restaurant__name'),
+    ('table', 'table__table_number'),
+    ('user_id', 'user_id'),
+    ('username', 'user__username'),
+    ('date', 'date'),
+    ('time', 'time'),
+    ('guests', 'number_of_guests'),
+    ('status', 'status'),
+    ('contact_email', 'contact_email'),
+    ('contact_phone', 'contact_phone'),
+    ('created_at', 'created_at'),
+]
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+def filter_reservations(params, queryset=None):
+    """Apply ReservationFilter (restaurant, status, date_from, date_to) to the reservations"""
+    queryset = Reservation.objects.all() if queryset is None else queryset
+    filterset = ReservationFilter(params, queryset=queryset)
+    if not filterset.is_valid():
+        raise ValidationError(filterset.errors)
+    return filterset.qs
+
+def export_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield one tuple per reservation in EXPORT_COLUMNS order"""
+    # Dropping select_related and the default ordering keeps the query flat
+    return queryset.select_related(None).order_by('date', 'time', 'id').values_list(
+        *(field for _, field in EXPORT_COLUMNS)
+    ).iterator(chunk_size=chunk_size)
+
+class _Echo:
+    """File-like object handing back what csv.writer writes, instead of buffering it"""
+
+    def write(self, value):
+        return value
+
+def stream_csv(rows):
+    """Yield a CSV header line, then one line per row"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow([name for name, _ in EXPORT_COLUMNS])
+    for row in rows:
+        yield writer.writerow(row)
+
+def stream_ndjson(rows):
+    """Yield one JSON object per row and line"""
+    names = [name for name, _ in EXPORT_COLUMNS]
+    encoder = DjangoJSONEncoder()
+    for row in rows:
+        yield encoder.encode(dict(zip(names, row))) + '\n'
+
+def stream_export(queryset, export_format, chunk_size=EXPORT_CHUNK_SIZE):
+    """Lines of the export of `queryset` in the given format"""
+    rows = export_rows(queryset, chunk_size)
+    if export_format == 'csv':
+        return stream_csv(rows)
+    if export_format == 'ndjson':
+        return stream_ndjson(rows)
+    raise ValueError(f'Unknown export format: {export_format}')
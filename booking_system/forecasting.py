@@ -0,0 +1,176 @@
+"""
+Vectorized booking and revenue forecasting.
+
+Daily series for any number of restaurants are loaded from the
+DailyReservationStats rollup with a single query into restaurants x days
+NumPy matrices. A linear trend, weekday seasonality, moving averages and
+confidence bands are then fitted for every row at once, so a nightly run
+over thousands of restaurants costs one query and a few array operations.
+"""
+from collections import namedtuple
+from datetime import timedelta
+
+import numpy as np
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import DailyReservationStats
+
+HISTORY_DAYS = 90
+FORECAST_DAYS = 30
+MOVING_AVERAGE_DAYS = 7
+
+# Shorter histories are forecast without a trend
+MIN_TREND_DAYS = 14
+
+# Two-sided 95% normal quantile for the confidence bands
+CONFIDENCE_Z = 1.96
+
+Forecast = namedtuple('Forecast', [
+    'daily',           # rows x horizon predicted values
+    'level',           # mean daily value over the history
+    'slope',           # fitted change per day
+    'sigma',           # spread of what trend and seasonality don't explain
+    'moving_average',  # latest moving average
+    'weekly_change',   # % change of the moving average on the week before
+    'active_days',     # days in the history with any activity
+])
+
+class DailySeries:
+    """Daily bookings and revenue for several restaurants as restaurants x days arrays"""
+
+    def __init__(self, restaurant_ids, start, bookings, revenue):
+        self.restaurant_ids = restaurant_ids
+        self.start = start
+        self.bookings = bookings
+        self.revenue = revenue
+
+    @property
+    def days(self):
+        return self.bookings.shape[1]
+
+    @classmethod
+    def empty(cls, restaurant_ids, start, days):
+        shape = (len(restaurant_ids), days)
+        return cls(list(restaurant_ids), start, np.zeros(shape), np.zeros(shape))
+
+    @classmethod
+    def load(cls, restaurant_ids=None, days=HISTORY_DAYS, end=None):
+        """Load the series ending on `end` (today) for the given or all restaurants"""
+        end = end or timezone.now().date()
+        start = end - timedelta(days=days - 1)
+
+        stats = DailyReservationStats.objects.filter(date__range=[start, end])
+        if restaurant_ids is not None:
+            stats = stats.filter(restaurant_id__in=restaurant_ids)
+
+        rows = list(
+            stats.values('restaurant_id', 'date').annotate(
+                total_bookings=Sum('bookings'),
+                total_revenue=Sum('revenue')
+            ).values_list('restaurant_id', 'date', 'total_bookings', 'total_revenue')
+        )
+
+        if restaurant_ids is None:
+            restaurant_ids = sorted({row[0] for row in rows}, key=str)
+        series = cls.empty(restaurant_ids, start, days)
+
+        positions = {restaurant_id: i for i, restaurant_id in enumerate(series.restaurant_ids)}
+        for restaurant_id, date, bookings, revenue in rows:
+            row, day = positions[restaurant_id], (date - start).days
+            series.bookings[row, day] = bookings
+            series.revenue[row, day] = revenue
+        return series
+
+    @classmethod
+    def from_facts(cls, facts, restaurant_id=None, days=HISTORY_DAYS, end=None):
+        """Build a one-row series from an already loaded ReservationFacts snapshot"""
+        end = end or timezone.now().date()
+        start = end - timedelta(days=days - 1)
+        series = cls.empty([restaurant_id], start, days)
+
+        for day in facts.daily_counts(start, end):
+            series.bookings[0, (day['date'] - start).days] = day['count']
+        for day in facts.daily_revenue(start, end):
+            series.revenue[0, (day['date'] - start).days] = day['revenue']
+        return series
+
+def moving_average(values, window=MOVING_AVERAGE_DAYS):
+    """Trailing moving average along each row"""
+    cumulative = np.cumsum(np.pad(values, ((0, 0), (1, 0))), axis=1)
+    return (cumulative[:, window:] - cumulative[:, :-window]) / window
+
+def _design(start, first_day, days, trend=True):
+    # Columns: days since the start of the history, then one indicator per weekday
+    x = np.arange(first_day, first_day + days, dtype=float) * trend
+    weekdays = (start.weekday() + np.arange(first_day, first_day + days)) % 7
+    return np.column_stack([x, np.eye(7)[weekdays]])
+
+def fit(values, start, horizon=FORECAST_DAYS):
+    """Fit a linear trend plus weekday seasonality to every row and extrapolate it"""
+    rows, days = values.shape
+    trend = days >= MIN_TREND_DAYS
+    history = _design(start, 0, days, trend)
+
+    # One least-squares solve fits every row at once
+    coefficients = np.linalg.lstsq(history, values.T, rcond=None)[0]
+    residual = values - (history @ coefficients).T
+
+    level = values.mean(axis=1)
+    slope = coefficients[0]
+    sigma = residual.std(axis=1)
+    daily = (_design(start, days, horizon, trend) @ coefficients).T
+
+    averages = moving_average(values)
+    if averages.shape[1] > MOVING_AVERAGE_DAYS:
+        latest, week_before = averages[:, -1], averages[:, -1 - MOVING_AVERAGE_DAYS]
+        weekly_change = np.divide(
+            (latest - week_before) * 100, week_before,
+            out=np.zeros(rows), where=week_before > 0
+        )
+    else:
+        latest = averages[:, -1] if averages.size else level
+        weekly_change = np.zeros(rows)
+
+    return Forecast(
+        daily=np.clip(daily, 0, None),
+        level=level,
+        slope=slope,
+        sigma=sigma,
+        moving_average=latest,
+        weekly_change=weekly_change,
+        active_days=(values > 0).sum(axis=1),
+    )
+
+def summarize(forecast, row):
+    """Plain-Python summary of one row of a forecast, as returned by AnalyticsEngine"""
+    horizon = forecast.daily.shape[1]
+    total = float(forecast.daily[row].sum())
+    # Daily errors are treated as independent, so the band widens with sqrt(days)
+    margin = CONFIDENCE_Z * float(forecast.sigma[row]) * horizon ** 0.5
+    level = float(forecast.level[row])
+    active_days = int(forecast.active_days[row])
+
+    return {
+        'forecast': total,
+        'daily_average': total / horizon if horizon else 0,
+        'lower': max(total - margin, 0),
+        'upper': total + margin,
+        'moving_average': float(forecast.moving_average[row]),
+        'growth_rate': float(forecast.slope[row]) * horizon / level * 100 if level > 0 else 0,
+        'confidence': 'high' if active_days >= 60 else 'medium' if active_days >= 30 else 'low'
+    }
+
+def forecast_restaurants(restaurant_ids=None, horizon=FORECAST_DAYS, days=HISTORY_DAYS):
+    """Forecast bookings and revenue for the given (or every) restaurant in one batch"""
+    series = DailySeries.load(restaurant_ids, days=days)
+    bookings = fit(series.bookings, series.start, horizon)
+    revenue = fit(series.revenue, series.start, horizon)
+
+    return {
+        restaurant_id: {
+            'bookings': summarize(bookings, row),
+            'revenue': summarize(revenue, row),
+        }
+        for row, restaurant_id in enumerate(series.restaurant_ids)
+    }
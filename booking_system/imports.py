@@ -0,0 +1,222 @@
+"""
+Bulk reservation import.
+
+Used to onboard a restaurant group's booking history. Rows are read in
+batches; each batch resolves its restaurants, tables and users with one
+query per kind into in-memory maps (reused by later batches), is
+validated entirely in Python, and is written with one bulk INSERT. Model
+save() and its per-row full_clean() queries and signals are skipped, so
+the stats rollups and caches are refreshed once at the end instead.
+
+Historical dates are allowed, unlike in Reservation.clean(). On
+PostgreSQL a batch holding a live booking that overlaps another on the
+same table is retried row by row, and the overlapping rows are reported.
+"""
+import time as time_module
+import uuid
+from datetime import date, datetime, time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+
+from .availability import invalidate_occupancy
+from .booking import _is_overlap_violation
+from .cache_utils import RESTAURANTS_NAMESPACE, STAFF_DASHBOARD_NAMESPACE, bump_version
+from .models import Reservation, Table
+from .rollups import rebuild_daily_stats, rebuild_user_stats
+
+User = get_user_model()
+
+IMPORT_BATCH_SIZE = 5000
+# Errors kept for the report; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+
+REQUIRED_COLUMNS = ['restaurant_id', 'table', 'username', 'date', 'time', 'guests']
+OPTIONAL_COLUMNS = ['status', 'contact_email', 'contact_phone', 'special_requests']
+
+STATUSES = {value for value, _ in Reservation.STATUS_CHOICES}
+MAX_GUESTS = 20
+BOOKING_DURATION = timedelta(hours=2)
+
+class ImportReport:
+    """What an import read, wrote and rejected"""
+
+    def __init__(self):
+        self.read = 0
+        self.imported = 0
+        self.error_count = 0
+        self.errors = []
+        self.started = time_module.perf_counter()
+        self.elapsed = 0
+
+    def error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+    @property
+    def rows_per_second(self):
+        return self.read / self.elapsed if self.elapsed else 0
+
+class ReservationImporter:
+    """Validate and insert reservation rows (dicts keyed by column name) in batches"""
+
+    def __init__(self, batch_size=IMPORT_BATCH_SIZE, dry_run=False):
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        # (restaurant_id, table_number) -> (table_id, capacity)
+        self.tables = {}
+        self.loaded_restaurants = set()
+        # username -> user id, or None for unknown users
+        self.users = {}
+        self.affected = {'restaurants': set(), 'users': set()}
+
+    def run(self, rows):
+        """Import every row, returning an ImportReport"""
+        report = ImportReport()
+        batch = []
+        # Line 1 is the header
+        for line, row in enumerate(rows, start=2):
+            batch.append((line, row))
+            if len(batch) >= self.batch_size:
+                self.import_batch(batch, report)
+                batch = []
+        self.import_batch(batch, report)
+
+        if report.imported and not self.dry_run:
+            self.refresh_derived_data()
+        report.elapsed = time_module.perf_counter() - report.started
+        return report
+
+    def import_batch(self, batch, report):
+        report.read += len(batch)
+        if not batch:
+            return
+
+        self.resolve(batch)
+        reservations = []
+        for line, row in batch:
+            try:
+                reservations.append((line, self.build(row)))
+            except ValueError as e:
+                report.error(line, str(e))
+
+        if self.dry_run:
+            report.imported += len(reservations)
+            return
+        report.imported += self.insert(reservations, report)
+
+    def resolve(self, batch):
+        """Load the tables and users this batch refers to that aren't mapped yet"""
+        restaurant_ids = set()
+        usernames = set()
+        for _, row in batch:
+            try:
+                restaurant_ids.add(uuid.UUID(row.get('restaurant_id') or ''))
+            except ValueError:
+                pass
+            usernames.add(row.get('username'))
+
+        restaurant_ids -= self.loaded_restaurants
+        if restaurant_ids:
+            for restaurant_id, number, table_id, capacity in Table.objects.filter(
+                restaurant_id__in=restaurant_ids
+            ).values_list('restaurant_id', 'table_number', 'id', 'capacity'):
+                self.tables[(restaurant_id, number)] = (table_id, capacity)
+            self.loaded_restaurants |= restaurant_ids
+
+        usernames -= self.users.keys()
+        if usernames:
+            self.users.update(dict.fromkeys(usernames))
+            self.users.update(
+                User.objects.filter(username__in=usernames).values_list('username', 'id')
+            )
+
+    def build(self, row):
+        """An unsaved Reservation for one row, or ValueError saying what is wrong"""
+        missing = [column for column in REQUIRED_COLUMNS if not row.get(column)]
+        if missing:
+            raise ValueError(f"missing {', '.join(missing)}")
+
+        try:
+            restaurant_id = uuid.UUID(row['restaurant_id'])
+        except ValueError:
+            raise ValueError(f"invalid restaurant_id {row['restaurant_id']!r}")
+        table = self.tables.get((restaurant_id, row['table']))
+        if table is None:
+            raise ValueError(f"unknown table {row['table']!r} of restaurant {restaurant_id}")
+        table_id, capacity = table
+
+        user_id = self.users.get(row['username'])
+        if user_id is None:
+            raise ValueError(f"unknown user {row['username']!r}")
+
+        try:
+            booking_date = date.fromisoformat(row['date'])
+            booking_time = time.fromisoformat(row['time'])
+            guests = int(row['guests'])
+        except ValueError as e:
+            raise ValueError(f'invalid date, time or guests: {e}')
+        if not 1 <= guests <= MAX_GUESTS:
+            raise ValueError(f'guests must be between 1 and {MAX_GUESTS}')
+        if guests > capacity:
+            raise ValueError(f"{guests} guests exceed the capacity of table {row['table']!r}")
+
+        status = row.get('status') or 'pending'
+        if status not in STATUSES:
+            raise ValueError(f'invalid status {status!r}')
+
+        self.affected['restaurants'].add(restaurant_id)
+        self.affected['users'].add(user_id)
+        return Reservation(
+            restaurant_id=restaurant_id,
+            table_id=table_id,
+            user_id=user_id,
+            date=booking_date,
+            time=booking_time,
+            # What Reservation.save() would fill in
+            start_time=booking_time,
+            end_time=(datetime.combine(booking_date, booking_time) + BOOKING_DURATION).time(),
+            number_of_guests=guests,
+            status=status,
+            contact_email=row.get('contact_email') or '',
+            contact_phone=row.get('contact_phone') or '',
+            special_requests=row.get('special_requests') or None
+        )
+
+    def insert(self, reservations, report):
+        """Bulk insert a batch of (line, reservation), returning how many rows were written"""
+        try:
+            with transaction.atomic():
+                Reservation.objects.bulk_create([reservation for _, reservation in reservations])
+            return len(reservations)
+        except IntegrityError as error:
+            if not _is_overlap_violation(error):
+                raise
+
+        # Some live booking overlaps another; find which, one row at a time
+        inserted = 0
+        for line, reservation in reservations:
+            try:
+                with transaction.atomic():
+                    Reservation.objects.bulk_create([reservation])
+                inserted += 1
+            except IntegrityError as error:
+                if not _is_overlap_violation(error):
+                    raise
+                report.error(line, 'overlaps another booking of the table')
+        return inserted
+
+    def refresh_derived_data(self):
+        """Rebuild what the skipped signals would have kept up to date"""
+        restaurant_ids = list(self.affected['restaurants'])
+        rebuild_daily_stats(restaurant_ids=restaurant_ids)
+        rebuild_user_stats(user_ids=list(self.affected['users']))
+
+        for restaurant_id in restaurant_ids:
+            invalidate_occupancy(restaurant_id)
+            bump_version('restaurant', restaurant_id)
+        for user_id in self.affected['users']:
+            bump_version('user', user_id)
+        bump_version(*RESTAURANTS_NAMESPACE)
+        bump_version(*STAFF_DASHBOARD_NAMESPACE)
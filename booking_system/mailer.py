@@ -0,0 +1,101 @@
+"""
+Batched email delivery.
+
+Messages are sent in batches, each batch over a single reused mail
+connection, with a small thread pool keeping several batches in flight.
+A connection failure reopens the connection and retries only the messages
+of the batch that were not sent yet, so nobody receives the same email
+twice. A message the server rejects (e.g. a refused recipient) is counted
+as failed and skipped, without holding up the rest of the batch.
+"""
+import logging
+import time
+from smtplib import SMTPException, SMTPServerDisconnected
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+
+logger = logging.getLogger(__name__)
+
+MAIL_BATCH_SIZE = 100
+MAIL_WORKERS = 4
+MAIL_RETRIES = 3
+# Doubled after each failed attempt
+MAIL_RETRY_DELAY = 2
+
+def build_message(subject, text_body, html_body, recipient):
+    """A plain-text email with an HTML alternative, ready to send"""
+    message = EmailMultiAlternatives(
+        subject=subject,
+        body=text_body,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[recipient]
+    )
+    message.attach_alternative(html_body, 'text/html')
+    return message
+
+def chunked(iterable, size):
+    """Yield lists of up to `size` items without materializing the iterable"""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+def send_batch(messages, retries=MAIL_RETRIES, retry_delay=MAIL_RETRY_DELAY):
+    """Send a batch over one connection, returning (sent, failed) counts"""
+    pending = list(messages)
+    sent = rejected = 0
+    for attempt in range(retries + 1):
+        connection = get_connection()
+        try:
+            connection.open()
+            while pending:
+                try:
+                    connection.send_messages([pending[0]])
+                    sent += 1
+                except SMTPServerDisconnected:
+                    raise
+                except SMTPException as e:
+                    # The server refused this message; resending it would not help
+                    logger.warning(f"Mail to {', '.join(pending[0].to)} rejected: {str(e)}")
+                    rejected += 1
+                pending.pop(0)
+            break
+        except Exception as e:
+            logger.warning(
+                f"Mail batch attempt {attempt + 1} failed with {len(pending)} messages left: {str(e)}"
+            )
+            if attempt < retries:
+                time.sleep(retry_delay * 2 ** attempt)
+        finally:
+            connection.close()
+
+    if pending:
+        logger.error(f"Gave up on {len(pending)} messages after {retries + 1} attempts")
+    return sent, rejected + len(pending)
+
+def send_in_batches(messages, batch_size=MAIL_BATCH_SIZE, workers=MAIL_WORKERS, **retry_options):
+    """
+    Send an iterable of messages in batches across a thread pool, returning
+    (sent, failed) totals. Only a few batches are built ahead of the senders,
+    so memory stays flat however many messages there are.
+    """
+    sent = failed = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        in_flight = set()
+        for batch in chunked(messages, batch_size):
+            if len(in_flight) >= workers * 2:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    batch_sent, batch_failed = future.result()
+                    sent += batch_sent
+                    failed += batch_failed
+            in_flight.add(executor.submit(send_batch, batch, **retry_options))
+
+        for future in in_flight:
+            batch_sent, batch_failed = future.result()
+            sent += batch_sent
+            failed += batch_failed
+
+    return sent, failed
@@ -0,0 +1,157 @@
+"""
+Management command to benchmark the analytics date/time aggregations on a
+large synthetic dataset and print the database's query plans.
+
+All generated rows are inserted inside a transaction that is rolled back
+at the end, so the command is safe to run against a development database.
+"""
+import random
+import time as time_module
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import ExtractHour, ExtractWeekDay, TruncDate, TruncMonth
+
+from booking_system.availability import SLOT_TIMES
+from booking_system.models import DailyReservationStats, Reservation, Restaurant, Table
+from booking_system.rollups import rebuild_daily_stats
+
+User = get_user_model()
+
+# Rows land on random tables and slots, so they must not be blocking
+# (pending/confirmed/seated): on PostgreSQL the exclusion constraint
+# rejects overlapping live bookings of a table
+STATUSES = ['completed', 'completed', 'completed', 'cancelled', 'no_show']
+
+class Command(BaseCommand):
+    help = 'Benchmark analytics aggregations on a synthetic reservation dataset'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=1000000,
+            help='Number of reservations to generate (default 1,000,000)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Rows per bulk insert'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Runs per query; the fastest is reported'
+        )
+        parser.add_argument(
+            '--explain',
+            action='store_true',
+            help='Print the query plan for each aggregation'
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            restaurant = self.generate(options['rows'], options['batch_size'])
+
+            for name, queryset in self.get_cases(restaurant):
+                self.run_case(name, queryset, options['repeat'], options['explain'])
+
+            # Leave the database as we found it
+            transaction.set_rollback(True)
+
+    def generate(self, rows, batch_size):
+        user, _ = User.objects.get_or_create(username='analytics_benchmark')
+        restaurant = Restaurant.objects.create(
+            name='Analytics Benchmark',
+            location='Benchmark',
+            cuisine='other',
+            rating=0,
+            user=user
+        )
+        tables = Table.objects.bulk_create([
+            Table(restaurant=restaurant, table_number=f'B{number}', capacity=6)
+            for number in range(50)
+        ])
+
+        started = time_module.perf_counter()
+        first_day = date.today() - timedelta(days=730)
+        created = 0
+        while created < rows:
+            size = min(batch_size, rows - created)
+            # bulk_create skips the per-row rollup signals; the rollup is rebuilt below
+            Reservation.objects.bulk_create([
+                Reservation(
+                    user=user,
+                    restaurant=restaurant,
+                    table=random.choice(tables),
+                    date=first_day + timedelta(days=random.randrange(730)),
+                    time=random.choice(SLOT_TIMES),
+                    number_of_guests=random.randint(1, 6),
+                    status=random.choice(STATUSES)
+                )
+                for _ in range(size)
+            ])
+            created += size
+
+        rebuild_daily_stats(restaurant_ids=[restaurant.id])
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(f'ANALYZE {Reservation._meta.db_table}')
+                cursor.execute(f'ANALYZE {DailyReservationStats._meta.db_table}')
+
+        self.stdout.write(
+            f'Generated {rows} reservations in {time_module.perf_counter() - started:.1f}s'
+        )
+        return restaurant
+
+    def get_cases(self, restaurant):
+        reservations = Reservation.objects.filter(restaurant=restaurant)
+        stats = DailyReservationStats.objects.filter(restaurant=restaurant)
+
+        cases = [
+            ('hourly (ExtractHour)', reservations.annotate(
+                hour=ExtractHour('time')
+            ).values('hour').annotate(count=Count('id')).order_by('hour')),
+            ('weekly (ExtractWeekDay)', reservations.annotate(
+                weekday=ExtractWeekDay('date')
+            ).values('weekday').annotate(count=Count('id')).order_by('weekday')),
+            ('monthly (TruncMonth)', reservations.annotate(
+                month=TruncMonth('date')
+            ).values('month').annotate(count=Count('id')).order_by('month')),
+            ('cancellation lead time (TruncDate)', reservations.filter(
+                status='cancelled'
+            ).annotate(
+                lead_time=F('date') - TruncDate('created_at')
+            ).values('lead_time').annotate(count=Count('id'))),
+            ('weekly (rollup)', stats.annotate(
+                weekday=ExtractWeekDay('date')
+            ).values('weekday').annotate(count=Sum('bookings')).order_by('weekday')),
+        ]
+
+        if connection.vendor == 'postgresql':
+            # The raw SQL the analytics used before, for comparison
+            cases += [
+                ('hourly (.extra)', reservations.extra(
+                    select={'hour': 'EXTRACT(hour FROM time)'}
+                ).values('hour').annotate(count=Count('id')).order_by('hour')),
+                ('weekly (.extra)', reservations.extra(
+                    select={'weekday': 'EXTRACT(dow FROM date)'}
+                ).values('weekday').annotate(count=Count('id')).order_by('weekday')),
+            ]
+        return cases
+
+    def run_case(self, name, queryset, repeat, explain):
+        timings = []
+        for _ in range(max(repeat, 1)):
+            started = time_module.perf_counter()
+            list(queryset)
+            timings.append(time_module.perf_counter() - started)
+
+        self.stdout.write(self.style.SUCCESS(f'{name}: {min(timings) * 1000:.1f} ms'))
+        if explain:
+            self.stdout.write(queryset.explain())
@@ -0,0 +1,79 @@
+"""
+Management command to measure the per-email cost of rendering reservation
+emails: render_to_string for each variant (as the email paths used to) against
+the compiled templates and shared Context of booking_system.emails.
+
+Reservations are built in memory, so the database is not touched.
+"""
+import time as time_module
+from datetime import date, time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+
+from booking_system.emails import (
+    RESERVATION_EMAILS, email_context, preload_email_templates, render_many
+)
+from booking_system.mailer import build_message
+from booking_system.models import Reservation, Restaurant
+
+User = get_user_model()
+
+class Command(BaseCommand):
+    help = 'Benchmark per-email rendering cost before and after template precompilation'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--count',
+            type=int,
+            default=2000,
+            help='Emails rendered per run'
+        )
+        parser.add_argument(
+            '--kind',
+            choices=sorted(RESERVATION_EMAILS),
+            default='reminder',
+            help='Email to render'
+        )
+
+    def handle(self, *args, **options):
+        restaurant = Restaurant(name='Benchmark Bistro', location='Benchmark Street 1')
+        reservations = [
+            Reservation(
+                user=User(username=f'guest{number}', email=f'guest{number}@example.com'),
+                restaurant=restaurant,
+                date=date.today(),
+                time=time(19, 30),
+                number_of_guests=2,
+                special_requests='Window seat' if number % 2 else ''
+            )
+            for number in range(options['count'])
+        ]
+        kind = options['kind']
+
+        before = self.measure(lambda: list(self.render_to_string(reservations, kind)))
+        preload_email_templates()
+        after = self.measure(lambda: list(render_many(reservations, kind)))
+
+        for label, seconds in (('render_to_string', before), ('render_many', after)):
+            self.stdout.write(
+                f'{label}: {seconds / len(reservations) * 1e6:.0f} us per email'
+            )
+        self.stdout.write(self.style.SUCCESS(f'Speed-up: {before / after:.1f}x'))
+
+    def measure(self, render):
+        started = time_module.perf_counter()
+        render()
+        return time_module.perf_counter() - started
+
+    def render_to_string(self, reservations, kind):
+        subject, name = RESERVATION_EMAILS[kind]
+        for reservation in reservations:
+            context = email_context(reservation)
+            yield build_message(
+                subject.format(name=reservation.restaurant.name),
+                render_to_string(f'{name}.txt', context),
+                render_to_string(f'{name}.html', context),
+                reservation.contact_email or reservation.user.email
+            )
@@ -0,0 +1,68 @@
+"""
+Management command to send the transactional emails waiting in the
+EmailOutbox. Run it from cron, or keep it running with --watch.
+"""
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from booking_system.emails import preload_email_templates
+from booking_system.outbox import OUTBOX_BATCH_SIZE, drain_outbox
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Send queued confirmation and cancellation emails'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=OUTBOX_BATCH_SIZE,
+            help='Emails claimed and sent per mail connection'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=2,
+            help='Threads claiming and sending batches in parallel'
+        )
+        parser.add_argument(
+            '--watch',
+            action='store_true',
+            help='Keep polling for new emails instead of exiting once the outbox is empty'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Seconds between polls with --watch'
+        )
+
+    def handle(self, *args, **options):
+        # Fail at startup, not per email, if a template is missing or broken
+        preload_email_templates()
+        while True:
+            try:
+                sent, failed = drain_outbox(
+                    batch_size=options['batch_size'],
+                    workers=options['workers']
+                )
+            except Exception:
+                if not options['watch']:
+                    raise
+                # A database or mail server hiccup must not stop the watcher;
+                # unsent emails stay in the outbox for the next poll
+                logger.exception('Draining the email outbox failed')
+                close_old_connections()
+                time.sleep(options['interval'])
+                continue
+            
+            if sent or failed or not options['watch']:
+                style = self.style.SUCCESS if not failed else self.style.WARNING
+                self.stdout.write(style(f'Sent {sent} emails ({failed} failed)'))
+            if not options['watch']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,65 @@
+"""
+Management command to bulk import reservations from a CSV file, e.g. the
+booking history of a newly onboarded restaurant group. Reads the columns
+written by export_reservations; see booking_system.imports.
+"""
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from booking_system.imports import IMPORT_BATCH_SIZE, REQUIRED_COLUMNS, ReservationImporter
+
+class Command(BaseCommand):
+    help = 'Bulk import reservations from a CSV file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=str, help='CSV file with a header row')
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate every row without writing anything'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=IMPORT_BATCH_SIZE,
+            help='Rows validated and inserted at a time'
+        )
+        parser.add_argument(
+            '--show-errors',
+            type=int,
+            default=20,
+            help='How many invalid rows to list'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            source = open(options['path'], newline='', encoding='utf-8')
+        except OSError as e:
+            raise CommandError(f"Cannot read {options['path']}: {e}")
+
+        with source:
+            rows = csv.DictReader(source)
+            missing = set(REQUIRED_COLUMNS) - set(rows.fieldnames or [])
+            if missing:
+                raise CommandError(f"Missing columns: {', '.join(sorted(missing))}")
+
+            importer = ReservationImporter(
+                batch_size=options['batch_size'],
+                dry_run=options['dry_run']
+            )
+            report = importer.run(rows)
+
+        shown = options['show_errors']
+        for line, message in report.errors[:shown]:
+            self.stderr.write(f'Line {line}: {message}')
+        if report.error_count > shown:
+            self.stderr.write(f'... and {report.error_count - shown} more')
+
+        verb = 'Validated' if options['dry_run'] else 'Imported'
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{verb} {report.imported} of {report.read} rows ({report.error_count} rejected) '
+                f'in {report.elapsed:.1f}s, {report.rows_per_second:.0f} rows/s'
+            )
+        )
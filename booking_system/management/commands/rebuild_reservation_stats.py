@@ -0,0 +1,25 @@
+"""
+Management command to backfill or repair the DailyReservationStats rollup
+from the reservations table.
+"""
+from django.core.management.base import BaseCommand
+
+from booking_system.rollups import rebuild_daily_stats
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily reservation stats rollup from the reservations table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--restaurant',
+            type=str,
+            help='Only rebuild the restaurant with this ID'
+        )
+
+    def handle(self, *args, **options):
+        restaurant_ids = [options['restaurant']] if options['restaurant'] else None
+        written = rebuild_daily_stats(restaurant_ids=restaurant_ids)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt {written} daily reservation stats rows')
+        )
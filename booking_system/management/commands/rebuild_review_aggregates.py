@@ -0,0 +1,44 @@
+"""
+Management command to recompute the denormalized review aggregates
+(review_count / review_sum) stored on each restaurant.
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from booking_system.models import Restaurant, Review
+
+class Command(BaseCommand):
+    help = 'Rebuild restaurant review counts and rating sums from the reviews table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--restaurant',
+            type=str,
+            help='Only rebuild the restaurant with this ID'
+        )
+
+    def handle(self, *args, **options):
+        restaurants = Restaurant.objects.all()
+        if options['restaurant']:
+            restaurants = restaurants.filter(id=options['restaurant'])
+
+        reviews = Review.objects.filter(
+            restaurant=OuterRef('pk')
+        ).order_by().values('restaurant')
+
+        # One UPDATE with correlated subqueries, no rows loaded into Python
+        with transaction.atomic():
+            updated = restaurants.update(
+                review_count=Coalesce(
+                    Subquery(reviews.annotate(total=Count('id')).values('total')), 0
+                ),
+                review_sum=Coalesce(
+                    Subquery(reviews.annotate(total=Sum('rating')).values('total')), 0
+                ),
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt review aggregates for {updated} restaurants')
+        )
@@ -0,0 +1,26 @@
+"""
+Management command to recount the per-user reservation counters from the
+reservations table. Run it nightly: besides repairing any drift it moves
+every user's upcoming count on to the new day.
+"""
+from django.core.management.base import BaseCommand
+
+from booking_system.rollups import rebuild_user_stats
+
+class Command(BaseCommand):
+    help = 'Recount user reservation stats from the reservations table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=int,
+            help='Only reconcile the user with this ID'
+        )
+
+    def handle(self, *args, **options):
+        user_ids = [options['user']] if options['user'] else None
+        written = rebuild_user_stats(user_ids=user_ids)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Reconciled reservation stats for {written} users')
+        )
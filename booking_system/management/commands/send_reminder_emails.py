@@ -0,0 +1,34 @@
+"""
+Management command to email a reminder for every reservation tomorrow.
+Meant to run daily from cron.
+"""
+from django.core.management.base import BaseCommand
+
+from booking_system.mailer import MAIL_BATCH_SIZE, MAIL_WORKERS
+from booking_system.utils import send_reminder_emails
+
+class Command(BaseCommand):
+    help = "Send reminder emails for tomorrow's reservations"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=MAIL_BATCH_SIZE,
+            help='Emails sent per mail connection'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=MAIL_WORKERS,
+            help='Batches sent concurrently'
+        )
+
+    def handle(self, *args, **options):
+        sent, failed = send_reminder_emails(
+            batch_size=options['batch_size'],
+            workers=options['workers']
+        )
+
+        style = self.style.SUCCESS if not failed else self.style.WARNING
+        self.stdout.write(style(f'Sent {sent} reminder emails ({failed} failed)'))
@@ -0,0 +1,50 @@
+"""
+Management command to precompute the hot cache entries after a deploy.
+
+Popular restaurants, cuisine stats, and per-restaurant stats and today's
+occupancy for the top restaurants are built concurrently, stopping once
+the time budget is spent.
+"""
+from django.core.management.base import BaseCommand
+
+from booking_system.warmup import (
+    DEFAULT_BUDGET_SECONDS, DEFAULT_TOP_RESTAURANTS, DEFAULT_WORKERS, warm_caches
+)
+
+class Command(BaseCommand):
+    help = 'Warm the restaurant, cuisine and availability caches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=DEFAULT_TOP_RESTAURANTS,
+            help='Number of most popular restaurants to warm stats and availability for'
+        )
+        parser.add_argument(
+            '--budget',
+            type=float,
+            default=DEFAULT_BUDGET_SECONDS,
+            help='Seconds to spend before giving up on the remaining entries'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=DEFAULT_WORKERS,
+            help='Threads building entries concurrently (1 runs inline)'
+        )
+
+    def handle(self, *args, **options):
+        report = warm_caches(
+            top=options['top'],
+            budget=options['budget'],
+            workers=options['workers']
+        )
+
+        style = self.style.SUCCESS if not report['failed'] else self.style.WARNING
+        self.stdout.write(
+            style(
+                f"Warmed {report['warmed']} cache entries in {report['elapsed']:.2f}s "
+                f"({report['failed']} failed, {report['skipped']} skipped)"
+            )
+        )
@@ -10,9 +10,9 @@ class RestaurantManager(models.Manager):
         return self.filter(is_active=True)
     
     def with_ratings(self):
+        # review_count is a stored column; the average comes from the stored sum
         return self.annotate(
-            avg_rating=models.Avg('reviews__rating'),
-            review_count=models.Count('reviews')
+            avg_rating=self.model.average_rating_expression()
         )
     
     def by_cuisine(self, cuisine):
@@ -0,0 +1,104 @@
+from django.db import migrations
+
+# The booked period and the overlap constraint only exist on PostgreSQL;
+# other databases rely on the booking lock in booking_system.booking.
+#
+# Databases written before the constraint may already hold overlapping live
+# bookings of a table, which ADD CONSTRAINT would reject. The migration then
+# stops, rolled back, listing the conflicting reservation ids; operators
+# cancel or move one reservation of each pair (e.g. in the admin) and run
+# migrate again. Which guest keeps the table is a call for staff to make,
+# so conflicts are not resolved automatically.
+ADD_COLUMN_SQL = [
+    'CREATE EXTENSION IF NOT EXISTS btree_gist',
+    """
+    ALTER TABLE booking_system_reservation
+    ADD COLUMN period tsrange GENERATED ALWAYS AS (
+        tsrange(
+            date + COALESCE(start_time, time),
+            CASE
+                WHEN COALESCE(end_time, COALESCE(start_time, time) + interval '2 hours')
+                     > COALESCE(start_time, time)
+                THEN date + COALESCE(end_time, COALESCE(start_time, time) + interval '2 hours')
+                ELSE date + 1 + COALESCE(end_time, COALESCE(start_time, time) + interval '2 hours')
+            END,
+            '[)'
+        )
+    ) STORED
+    """,
+]
+
+FIND_CONFLICTS_SQL = """
+    SELECT earlier.id, later.id
+    FROM booking_system_reservation earlier
+    JOIN booking_system_reservation later
+        ON later.table_id = earlier.table_id
+        AND later.period && earlier.period
+        AND (later.period, later.id) > (earlier.period, earlier.id)
+    WHERE earlier.status IN ('pending', 'confirmed', 'seated')
+        AND later.status IN ('pending', 'confirmed', 'seated')
+    ORDER BY earlier.period, earlier.id
+    LIMIT %s
+"""
+# Conflicting pairs listed in the error
+MAX_LISTED_CONFLICTS = 50
+
+ADD_CONSTRAINT_SQL = [
+    """
+    ALTER TABLE booking_system_reservation
+    ADD CONSTRAINT reservation_table_no_overlap
+    EXCLUDE USING gist (table_id WITH =, period WITH &&)
+    WHERE (status IN ('pending', 'confirmed', 'seated'))
+    """,
+]
+
+DROP_PERIOD_SQL = [
+    'ALTER TABLE booking_system_reservation DROP CONSTRAINT IF EXISTS reservation_table_no_overlap',
+    'ALTER TABLE booking_system_reservation DROP COLUMN IF EXISTS period',
+]
+
+
+def check_overlapping_bookings(schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(FIND_CONFLICTS_SQL, [MAX_LISTED_CONFLICTS + 1])
+        conflicts = cursor.fetchall()
+    if not conflicts:
+        return
+
+    listed = '\n'.join(
+        f'  {earlier} overlaps {later}' for earlier, later in conflicts[:MAX_LISTED_CONFLICTS]
+    )
+    more = ' (and more)' if len(conflicts) > MAX_LISTED_CONFLICTS else ''
+    raise RuntimeError(
+        'Cannot add reservation_table_no_overlap: these pending/confirmed/seated '
+        f'reservations share a table at overlapping times{more}:\n{listed}\n'
+        'Cancel or move one reservation of each pair, then run migrate again.'
+    )
+
+
+def add_period_exclusion(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for statement in ADD_COLUMN_SQL:
+        schema_editor.execute(statement)
+    check_overlapping_bookings(schema_editor)
+    for statement in ADD_CONSTRAINT_SQL:
+        schema_editor.execute(statement)
+
+
+def remove_period_exclusion(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for statement in DROP_PERIOD_SQL:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking_system', '0002_auto_20250718_1236'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_period_exclusion, remove_period_exclusion),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.6 on 2026-10-18 10:01
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_review_aggregates(apps, schema_editor):
+    Restaurant = apps.get_model('booking_system', 'Restaurant')
+    Review = apps.get_model('booking_system', 'Review')
+
+    reviews = Review.objects.filter(restaurant=OuterRef('pk')).order_by().values('restaurant')
+    Restaurant.objects.update(
+        review_count=Coalesce(Subquery(reviews.annotate(total=Count('id')).values('total')), 0),
+        review_sum=Coalesce(Subquery(reviews.annotate(total=Sum('rating')).values('total')), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking_system', '0003_reservation_period_exclusion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='restaurant',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='restaurant',
+            name='review_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_review_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 5.0.6 on 2026-10-18 10:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import ExtractHour
+
+
+def backfill_daily_stats(apps, schema_editor):
+    Reservation = apps.get_model('booking_system', 'Reservation')
+    DailyReservationStats = apps.get_model('booking_system', 'DailyReservationStats')
+
+    # Revenue is filled in by the rebuild_reservation_stats command
+    grouped = Reservation.objects.annotate(
+        hour=ExtractHour('time')
+    ).order_by().values(
+        'restaurant_id', 'date', 'hour', 'status'
+    ).annotate(
+        bookings=Count('id'),
+        guests=Sum('number_of_guests')
+    )
+    DailyReservationStats.objects.bulk_create(
+        (DailyReservationStats(**row) for row in grouped.iterator()),
+        batch_size=1000
+    )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking_system', '0004_restaurant_review_aggregates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyReservationStats',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                ('date', models.DateField()),
+                ('hour', models.PositiveSmallIntegerField()),
+                (
+                    'status',
+                    models.CharField(
+                        choices=[
+                            ('pending', 'Pending'),
+                            ('confirmed', 'Confirmed'),
+                            ('seated', 'Seated'),
+                            ('completed', 'Completed'),
+                            ('cancelled', 'Cancelled'),
+                            ('no_show', 'No Show'),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ('bookings', models.PositiveIntegerField(default=0)),
+                ('guests', models.PositiveIntegerField(default=0)),
+                (
+                    'revenue',
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                (
+                    'restaurant',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='daily_stats',
+                        to='booking_system.restaurant',
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name_plural': 'daily reservation stats',
+                'ordering': ['date', 'hour'],
+                'indexes': [
+                    models.Index(
+                        fields=['date', 'status'], name='booking_sys_date_c082cb_idx'
+                    )
+                ],
+                'unique_together': {('restaurant', 'date', 'hour', 'status')},
+            },
+        ),
+        migrations.RunPython(backfill_daily_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.0.6 on 2026-10-18 10:16
+
+import django.db.models.functions.datetime
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking_system', '0005_daily_reservation_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dailyreservationstats',
+            index=models.Index(
+                models.F('restaurant'),
+                django.db.models.functions.datetime.ExtractWeekDay('date'),
+                name='daily_stats_weekday_idx',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(
+                models.F('restaurant'),
+                django.db.models.functions.datetime.ExtractHour('time'),
+                name='reservation_rest_hour_idx',
+            ),
+        ),
+    ]
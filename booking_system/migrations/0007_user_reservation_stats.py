@@ -0,0 +1,65 @@
+# Generated by Django 5.0.6 on 2026-10-18 10:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.utils import timezone
+
+
+def backfill_user_stats(apps, schema_editor):
+    Reservation = apps.get_model('booking_system', 'Reservation')
+    UserReservationStats = apps.get_model('booking_system', 'UserReservationStats')
+
+    today = timezone.now().date()
+    grouped = Reservation.objects.order_by().values('user_id').annotate(
+        total=Count('id'),
+        completed=Count('id', filter=Q(status='completed')),
+        cancelled=Count('id', filter=Q(status='cancelled')),
+        upcoming=Count('id', filter=Q(date__gte=today, status__in=['pending', 'confirmed']))
+    )
+    UserReservationStats.objects.bulk_create(
+        (UserReservationStats(upcoming_as_of=today, **row) for row in grouped.iterator()),
+        batch_size=1000
+    )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_remove_customuser_profile_picture_customuser_role_and_more'),
+        ('booking_system', '0006_analytics_functional_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserReservationStats',
+            fields=[
+                (
+                    'user',
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name='reservation_stats',
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('completed', models.PositiveIntegerField(default=0)),
+                ('cancelled', models.PositiveIntegerField(default=0)),
+                ('upcoming', models.PositiveIntegerField(default=0)),
+                ('upcoming_as_of', models.DateField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'user reservation stats',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(
+                fields=['user', 'date'], name='booking_sys_user_id_450317_idx'
+            ),
+        ),
+        migrations.RunPython(backfill_user_stats, migrations.RunPython.noop),
+    ]
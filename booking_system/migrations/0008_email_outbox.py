@@ -0,0 +1,84 @@
+# Generated by Django 5.0.6 on 2026-10-18 10:46
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking_system', '0007_user_reservation_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailOutbox',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                ('idempotency_key', models.CharField(max_length=100, unique=True)),
+                (
+                    'kind',
+                    models.CharField(
+                        choices=[
+                            ('confirmation', 'Reservation confirmation'),
+                            ('cancellation', 'Reservation cancellation'),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    'status',
+                    models.CharField(
+                        choices=[
+                            ('pending', 'Pending'),
+                            ('sending', 'Sending'),
+                            ('sent', 'Sent'),
+                            ('failed', 'Failed'),
+                        ],
+                        default='pending',
+                        max_length=20,
+                    ),
+                ),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                (
+                    'next_attempt_at',
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                ('claim_token', models.CharField(blank=True, max_length=32)),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                (
+                    'reservation',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='emails',
+                        to='booking_system.reservation',
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name_plural': 'email outbox',
+                'ordering': ['created_at'],
+                'indexes': [
+                    models.Index(
+                        fields=['status', 'next_attempt_at'],
+                        name='booking_sys_status_eff788_idx',
+                    ),
+                    models.Index(
+                        fields=['claim_token'], name='booking_sys_claim_t_b0dd5e_idx'
+                    ),
+                ],
+            },
+        ),
+    ]
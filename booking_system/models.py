@@ -1,5 +1,7 @@
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.functions import Cast, ExtractHour, ExtractWeekDay
 from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
@@ -57,6 +59,10 @@ class Restaurant(TimeStampedModel):
     opening_time = models.TimeField(default=time(9, 0))
     closing_time = models.TimeField(default=time(22, 0))
     
+    # Review aggregates, kept up to date by the Review signal handlers
+    review_count = models.PositiveIntegerField(default=0, editable=False)
+    review_sum = models.PositiveIntegerField(default=0, editable=False)
+    
     class Meta:
         ordering = ['-rating', 'name']
         indexes = [
@@ -73,10 +79,18 @@ class Restaurant(TimeStampedModel):
     
     @property
     def average_rating(self):
-        reviews = self.reviews.all()
-        if reviews:
-            return sum(review.rating for review in reviews) / len(reviews)
+        if self.review_count:
+            return self.review_sum / self.review_count
         return 0
+    
+    @staticmethod
+    def average_rating_expression():
+        """SQL expression for the average rating, computed from the stored aggregates"""
+        return models.Case(
+            models.When(review_count=0, then=models.Value(0.0)),
+            default=Cast('review_sum', models.FloatField()) / models.F('review_count'),
+            output_field=models.FloatField()
+        )
 
 class Table(TimeStampedModel):
     STATUS_CHOICES = [
@@ -108,18 +122,11 @@ class Table(TimeStampedModel):
         """Check if table is available for given date, time and duration"""
         if not self.is_active or self.status != 'available':
             return False
-            
-        start_datetime = timezone.datetime.combine(date, time)
-        end_datetime = start_datetime + duration
         
-        conflicting_reservations = self.reservations.filter(
-            date=date,
-            status__in=['confirmed', 'seated'],
-            start_time__lt=end_datetime.time(),
-            end_time__gt=start_datetime.time()
-        )
+        from .availability import get_occupancy, booking_interval
         
-        return not conflicting_reservations.exists()
+        start, end = booking_interval(date, time, duration)
+        return get_occupancy(self.restaurant_id, date).is_free(self.id, start, end)
 
 class Reservation(TimeStampedModel):
     STATUS_CHOICES = [
@@ -170,6 +177,10 @@ class Reservation(TimeStampedModel):
         indexes = [
             models.Index(fields=['date', 'status']),
             models.Index(fields=['restaurant', 'date']),
+            # Recounting a user's upcoming reservations
+            models.Index(fields=['user', 'date']),
+            # Hour-of-day bucketing in analytics
+            models.Index(F('restaurant'), ExtractHour('time'), name='reservation_rest_hour_idx'),
         ]
     
     def __str__(self):
@@ -193,7 +204,9 @@ class Reservation(TimeStampedModel):
             self.end_time = end_datetime.time()
         
         self.full_clean()
-        super().save(*args, **kwargs)
+        # The daily stats rollup is updated by signals in the same transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
     
     @property
     def is_past(self):
@@ -208,6 +221,100 @@ class Reservation(TimeStampedModel):
             timezone.now() < reservation_datetime - timedelta(hours=2)
         )
 
+class DailyReservationStats(models.Model):
+    """Reservations rolled up per restaurant, date, starting hour and status"""
+    restaurant = models.ForeignKey(
+        Restaurant,
+        on_delete=models.CASCADE,
+        related_name='daily_stats'
+    )
+    date = models.DateField()
+    hour = models.PositiveSmallIntegerField()
+    status = models.CharField(max_length=20, choices=Reservation.STATUS_CHOICES)
+    bookings = models.PositiveIntegerField(default=0)
+    guests = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    
+    class Meta:
+        unique_together = ['restaurant', 'date', 'hour', 'status']
+        ordering = ['date', 'hour']
+        indexes = [
+            models.Index(fields=['date', 'status']),
+            # Day-of-week bucketing in analytics
+            models.Index(F('restaurant'), ExtractWeekDay('date'), name='daily_stats_weekday_idx'),
+        ]
+        verbose_name_plural = 'daily reservation stats'
+    
+    def __str__(self):
+        return f"{self.restaurant_id} {self.date} {self.hour}:00 {self.status}: {self.bookings}"
+
+class UserReservationStats(models.Model):
+    """Per-user reservation counters behind the user dashboard"""
+    # Reservations still ahead of the guest
+    UPCOMING_STATUSES = ['pending', 'confirmed']
+    
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='reservation_stats'
+    )
+    total = models.PositiveIntegerField(default=0)
+    completed = models.PositiveIntegerField(default=0)
+    cancelled = models.PositiveIntegerField(default=0)
+    # Counts bookings dated on or after upcoming_as_of; recounted once the day moves on
+    upcoming = models.PositiveIntegerField(default=0)
+    upcoming_as_of = models.DateField(null=True, blank=True)
+    
+    class Meta:
+        verbose_name_plural = 'user reservation stats'
+    
+    def __str__(self):
+        return f"{self.user_id}: {self.total} reservations"
+
+class EmailOutbox(models.Model):
+    """Transactional email waiting to be sent by the drain_email_outbox worker"""
+    KIND_CHOICES = [
+        ('confirmation', 'Reservation confirmation'),
+        ('cancellation', 'Reservation cancellation'),
+    ]
+    
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    
+    # One email per reservation and kind, however often it is queued
+    idempotency_key = models.CharField(max_length=100, unique=True)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    reservation = models.ForeignKey(
+        Reservation,
+        on_delete=models.CASCADE,
+        related_name='emails'
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    # Set by the worker that claimed the email; stale claims are taken over
+    claim_token = models.CharField(max_length=32, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+            models.Index(fields=['claim_token']),
+        ]
+        verbose_name_plural = 'email outbox'
+    
+    def __str__(self):
+        return f"{self.kind} for {self.reservation_id}: {self.status}"
+
 class Review(TimeStampedModel):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -238,3 +345,9 @@ class Review(TimeStampedModel):
     
     def __str__(self):
         return f"{self.user.username} - {self.restaurant.name} ({self.rating}/5)"
+    
+    def save(self, *args, **kwargs):
+        # Restaurant review aggregates are updated by signals in the same
+        # transaction (deletes already run inside one)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
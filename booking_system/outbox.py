@@ -0,0 +1,144 @@
+"""
+Transactional email outbox.
+
+Confirmation and cancellation emails are not sent inside the request.
+Instead an EmailOutbox row is written in the same transaction as the
+reservation change, so the email exists exactly when the change does, and
+the drain_email_outbox worker sends it later. Each row carries an
+idempotency key, so queueing the same email twice is harmless, and is
+claimed by one worker at a time; failures are retried with exponential
+backoff until MAX_ATTEMPTS.
+"""
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.mail import get_connection
+from django.core.mail.utils import DNS_NAME
+from django.db import connection, connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .emails import render_email
+from .models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = 50
+MAX_ATTEMPTS = 6
+# Seconds before the first retry, doubled after each further failure
+RETRY_DELAY = 30
+MAX_RETRY_DELAY = 60 * 60
+# A worker that died mid-batch loses its claim after this long
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+def queue_reservation_email(reservation, kind):
+    """Add an email to the outbox, in the caller's transaction; repeats are ignored"""
+    EmailOutbox.objects.bulk_create(
+        [EmailOutbox(
+            idempotency_key=f'{kind}:{reservation.pk}',
+            kind=kind,
+            reservation=reservation
+        )],
+        ignore_conflicts=True
+    )
+
+def claim_batch(batch_size=OUTBOX_BATCH_SIZE):
+    """Claim up to `batch_size` due emails for this worker, returning the claim token"""
+    now = timezone.now()
+    due = EmailOutbox.objects.filter(
+        Q(status='pending', next_attempt_at__lte=now) |
+        Q(status='sending', claimed_at__lt=now - CLAIM_TIMEOUT)
+    )
+    token = uuid.uuid4().hex
+
+    with transaction.atomic():
+        candidates = due.order_by('next_attempt_at')
+        if connection.features.has_select_for_update_skip_locked:
+            # Concurrent workers skip each other's rows instead of waiting
+            candidates = candidates.select_for_update(skip_locked=True)
+        ids = list(candidates.values_list('id', flat=True)[:batch_size])
+        # Re-checking `due` makes the claim safe where rows cannot be locked
+        claimed = due.filter(id__in=ids).update(
+            status='sending',
+            claim_token=token,
+            claimed_at=now
+        )
+
+    return token if claimed else None
+
+def _retry_delay(attempts):
+    return timedelta(seconds=min(RETRY_DELAY * 2 ** (attempts - 1), MAX_RETRY_DELAY))
+
+def _record_failure(email, error):
+    attempts = email.attempts + 1
+    gave_up = attempts >= MAX_ATTEMPTS
+    EmailOutbox.objects.filter(pk=email.pk, claim_token=email.claim_token).update(
+        status='failed' if gave_up else 'pending',
+        attempts=attempts,
+        next_attempt_at=timezone.now() + _retry_delay(attempts),
+        claim_token='',
+        last_error=str(error)
+    )
+    if gave_up:
+        logger.error(f"Giving up on {email.kind} email for reservation {email.reservation_id}: {error}")
+    else:
+        logger.warning(f"Failed to send {email.kind} email for reservation {email.reservation_id}: {error}")
+
+def deliver_batch(token):
+    """Send the emails claimed under `token` over one connection, returning (sent, failed)"""
+    emails = list(
+        EmailOutbox.objects.filter(claim_token=token, status='sending')
+        .select_related('reservation__user', 'reservation__restaurant')
+    )
+    sent_ids = []
+    failed = 0
+    mail_connection = get_connection()
+    try:
+        for email in emails:
+            try:
+                message = render_email(email.reservation, email.kind)
+                # A stable Message-ID lets mail servers drop a resend after a crash
+                message.extra_headers['Message-ID'] = (
+                    f"<{email.idempotency_key.replace(':', '.')}@{DNS_NAME}>"
+                )
+                # A no-op while the connection is already open
+                mail_connection.open()
+                mail_connection.send_messages([message])
+                sent_ids.append(email.pk)
+            except Exception as e:
+                _record_failure(email, e)
+                failed += 1
+                # Start the next message on a fresh connection
+                mail_connection.close()
+    finally:
+        mail_connection.close()
+
+    EmailOutbox.objects.filter(pk__in=sent_ids, claim_token=token).update(
+        status='sent',
+        sent_at=timezone.now(),
+        claim_token=''
+    )
+    return len(sent_ids), failed
+
+def _drain(batch_size, close_connections=False):
+    sent = failed = 0
+    try:
+        while token := claim_batch(batch_size):
+            batch_sent, batch_failed = deliver_batch(token)
+            sent += batch_sent
+            failed += batch_failed
+    finally:
+        if close_connections:
+            connections.close_all()
+    return sent, failed
+
+def drain_outbox(batch_size=OUTBOX_BATCH_SIZE, workers=1):
+    """Send every due email, with `workers` threads claiming batches in parallel"""
+    if workers <= 1:
+        return _drain(batch_size)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(_drain, [batch_size] * workers, [True] * workers))
+    return sum(sent for sent, _ in results), sum(failed for _, failed in results)
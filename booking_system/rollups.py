@@ -0,0 +1,200 @@
+"""
+Reservation rollup maintenance.
+
+DailyReservationStats keeps one row per restaurant, date, starting hour and
+status, so analytics can aggregate a few rows per day instead of scanning
+every reservation. UserReservationStats keeps each user's dashboard
+counters. Model signals apply each reservation change as a delta; bulk
+changes that bypass signals, payment revenue and the initial backfill are
+handled by rebuilding the affected rows from the reservations table.
+"""
+from django.db import transaction
+from django.db.models import Case, Count, F, Q, Sum, Value, When
+from django.db.models.functions import ExtractHour, Greatest
+from django.utils import timezone
+
+from .analytics import completed_revenue
+from .models import DailyReservationStats, Reservation, UserReservationStats
+
+REBUILD_BATCH_SIZE = 1000
+
+def stats_key(restaurant_id, date, time, status):
+    """Identify the rollup row a reservation counts towards"""
+    return {
+        'restaurant_id': restaurant_id,
+        'date': date,
+        'hour': time.hour,
+        'status': status,
+    }
+
+def adjust_daily_stats(key, bookings, guests):
+    """Add (or with negative deltas remove) bookings to one rollup row"""
+    rows = DailyReservationStats.objects.filter(**key)
+    changes = {
+        'bookings': F('bookings') + bookings,
+        'guests': F('guests') + guests,
+    }
+    
+    if rows.update(**changes):
+        if bookings < 0:
+            # Buckets without bookings are dropped, as a rebuild would
+            rows.filter(bookings=0).delete()
+        return
+    
+    if bookings < 0:
+        # Nothing to remove from, e.g. the restaurant's rows were already
+        # deleted by the cascade that is now deleting its reservations
+        return
+    
+    # First booking in this bucket; a concurrent writer may be creating it too
+    DailyReservationStats.objects.bulk_create(
+        [DailyReservationStats(**key)], ignore_conflicts=True
+    )
+    rows.update(**changes)
+
+def rebuild_daily_stats(restaurant_ids=None, dates=None):
+    """Recompute rollup rows from the reservations table, returning how many were written"""
+    reservations = Reservation.objects.all()
+    stats = DailyReservationStats.objects.all()
+    if restaurant_ids is not None:
+        reservations = reservations.filter(restaurant_id__in=restaurant_ids)
+        stats = stats.filter(restaurant_id__in=restaurant_ids)
+    if dates is not None:
+        reservations = reservations.filter(date__in=dates)
+        stats = stats.filter(date__in=dates)
+    
+    grouped = reservations.annotate(
+        hour=ExtractHour('time')
+    ).order_by().values(
+        'restaurant_id', 'date', 'hour', 'status'
+    ).annotate(
+        bookings=Count('id'),
+        guests=Sum('number_of_guests'),
+        revenue=completed_revenue()
+    )
+    
+    written = 0
+    with transaction.atomic():
+        stats.delete()
+        
+        batch = []
+        for row in grouped.iterator(chunk_size=REBUILD_BATCH_SIZE):
+            batch.append(DailyReservationStats(**row))
+            if len(batch) >= REBUILD_BATCH_SIZE:
+                DailyReservationStats.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        
+        DailyReservationStats.objects.bulk_create(batch)
+        written += len(batch)
+    
+    return written
+
+def user_stats_state(reservation):
+    """What a reservation contributes to its user's counters"""
+    return (reservation.user_id, reservation.date, reservation.status)
+
+def adjust_user_stats(user_id, date, status, delta):
+    """Add (or with a negative delta remove) one reservation; False if the user has no row yet"""
+    changes = {'total': F('total') + delta}
+    if status == 'completed':
+        changes['completed'] = F('completed') + delta
+    elif status == 'cancelled':
+        changes['cancelled'] = F('cancelled') + delta
+    if status in UserReservationStats.UPCOMING_STATUSES:
+        # Only counts if the booking is still ahead as of the row's upcoming date
+        changes['upcoming'] = F('upcoming') + Case(
+            When(upcoming_as_of__lte=date, then=Value(delta)),
+            default=Value(0)
+        )
+    # Counters that drifted to zero (e.g. after a manual fix) must not fail
+    # the user's reservation change on the CHECK constraint
+    changes = {field: Greatest(change, 0) for field, change in changes.items()}
+    return bool(UserReservationStats.objects.filter(user_id=user_id).update(**changes))
+
+def apply_user_stats_change(previous, current):
+    """
+    Move a reservation between user counters; `previous` and `current` are
+    user_stats_state() tuples, or None when it was created or deleted.
+    """
+    if previous == current:
+        return
+    
+    rebuilt = set()
+    for state, delta in ((previous, -1), (current, 1)):
+        if state is None or state[0] in rebuilt:
+            continue
+        if not adjust_user_stats(*state, delta):
+            # No counters yet: count from the table, which already has this change
+            rebuild_user_stats(user_ids=[state[0]])
+            rebuilt.add(state[0])
+
+def rebuild_user_stats(user_ids=None, as_of=None):
+    """Recount user counters from the reservations table, returning how many rows were written"""
+    as_of = as_of or timezone.now().date()
+    reservations = Reservation.objects.all()
+    stats = UserReservationStats.objects.all()
+    if user_ids is not None:
+        reservations = reservations.filter(user_id__in=user_ids)
+        stats = stats.filter(user_id__in=user_ids)
+    
+    grouped = reservations.order_by().values('user_id').annotate(
+        total=Count('id'),
+        completed=Count('id', filter=Q(status='completed')),
+        cancelled=Count('id', filter=Q(status='cancelled')),
+        upcoming=Count('id', filter=Q(
+            date__gte=as_of, status__in=UserReservationStats.UPCOMING_STATUSES
+        ))
+    )
+    
+    written = 0
+    with transaction.atomic():
+        # Users left without reservations keep a row of zeros
+        stats.update(total=0, completed=0, cancelled=0, upcoming=0, upcoming_as_of=as_of)
+        
+        batch = []
+        for row in grouped.iterator(chunk_size=REBUILD_BATCH_SIZE):
+            batch.append(UserReservationStats(upcoming_as_of=as_of, **row))
+            if len(batch) >= REBUILD_BATCH_SIZE:
+                written += _upsert_user_stats(batch)
+                batch = []
+        written += _upsert_user_stats(batch)
+    
+    return written
+
+def _upsert_user_stats(batch):
+    UserReservationStats.objects.bulk_create(
+        batch,
+        update_conflicts=True,
+        unique_fields=['user'],
+        update_fields=['total', 'completed', 'cancelled', 'upcoming', 'upcoming_as_of']
+    )
+    return len(batch)
+
+def get_user_stats(user_id, as_of=None):
+    """A user's reservation counters, recounting upcoming bookings once per day"""
+    as_of = as_of or timezone.now().date()
+    stats = UserReservationStats.objects.filter(user_id=user_id).first()
+    if stats is None:
+        rebuild_user_stats(user_ids=[user_id], as_of=as_of)
+        # Users without any reservations get a row of zeros
+        stats, _ = UserReservationStats.objects.get_or_create(
+            user_id=user_id, defaults={'upcoming_as_of': as_of}
+        )
+    
+    if stats.upcoming_as_of != as_of:
+        # Bookings dated before today have dropped out of "upcoming"
+        stats.upcoming = Reservation.objects.filter(
+            user_id=user_id,
+            date__gte=as_of,
+            status__in=UserReservationStats.UPCOMING_STATUSES
+        ).count()
+        stats.upcoming_as_of = as_of
+        stats.save(update_fields=['upcoming', 'upcoming_as_of'])
+    
+    return {
+        'total_reservations': stats.total,
+        'upcoming_reservations': stats.upcoming,
+        'completed_reservations': stats.completed,
+        'cancelled_reservations': stats.cancelled,
+    }
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from accounts.models import CustomUser
 from .models import Restaurant, Table, Reservation, Review
+from .availability import busy_table_ids
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -9,7 +10,7 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 class RestaurantSerializer(serializers.ModelSerializer):
-    average_rating = serializers.ReadOnlyField()
+    average_rating = serializers.SerializerMethodField()
     total_reviews = serializers.SerializerMethodField()
     is_open_now = serializers.SerializerMethodField()
     
@@ -22,8 +23,14 @@ class RestaurantSerializer(serializers.ModelSerializer):
             'is_active', 'is_open_now', 'created_at'
         ]
     
+    def get_average_rating(self, obj):
+        # Prefer the avg_rating annotation when the queryset provides it
+        if hasattr(obj, 'avg_rating'):
+            return obj.avg_rating
+        return obj.average_rating
+    
     def get_total_reviews(self, obj):
-        return obj.reviews.count()
+        return obj.review_count
     
     def get_is_open_now(self, obj):
         from django.utils import timezone
@@ -38,14 +45,13 @@ class TableSerializer(serializers.ModelSerializer):
         fields = ['id', 'table_number', 'capacity', 'status', 'is_active', 'is_available']
     
     def get_is_available(self, obj):
-        # Check if table is available for current time
-        from django.utils import timezone
-        now = timezone.now()
-        return not obj.reservations.filter(
-            date=now.date(),
-            time__lte=now.time(),
-            status__in=['confirmed', 'pending']
-        ).exists()
+        # Check if table is free right now. When serializing many tables,
+        # pass the busy set in context (see busy_table_ids) to avoid a
+        # query per table.
+        busy = self.context.get('busy_table_ids')
+        if busy is None:
+            busy = busy_table_ids([obj.id])
+        return obj.id not in busy
 
 class ReservationSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
@@ -68,7 +74,9 @@ class ReservationSerializer(serializers.ModelSerializer):
         from django.utils import timezone
         from datetime import timedelta
         
-        reservation_datetime = timezone.datetime.combine(obj.date, obj.time)
+        reservation_datetime = timezone.make_aware(
+            timezone.datetime.combine(obj.date, obj.time)
+        )
         return (
             obj.status in ['confirmed', 'pending'] and
             timezone.now() < reservation_datetime - timedelta(hours=24)
@@ -77,7 +85,9 @@ class ReservationSerializer(serializers.ModelSerializer):
     def get_time_until_reservation(self, obj):
         from django.utils import timezone
         
-        reservation_datetime = timezone.datetime.combine(obj.date, obj.time)
+        reservation_datetime = timezone.make_aware(
+            timezone.datetime.combine(obj.date, obj.time)
+        )
         if timezone.now() < reservation_datetime:
             delta = reservation_datetime - timezone.now()
             return {
@@ -107,6 +117,43 @@ class ReservationSerializer(serializers.ModelSerializer):
         
         return data
 
+class RestaurantSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Restaurant
+        fields = ['id', 'name', 'cuisine', 'location']
+
+class ReservationTableSerializer(TableSerializer):
+    class Meta(TableSerializer.Meta):
+        fields = ['id', 'table_number', 'capacity', 'is_available']
+
+class ReservationBatchListSerializer(serializers.ListSerializer):
+    """Works out which tables are busy for a whole page of reservations in one query"""
+    
+    def to_representation(self, data):
+        reservations = list(data.all() if hasattr(data, 'all') else data)
+        self._context['busy_table_ids'] = busy_table_ids(
+            {reservation.table_id for reservation in reservations}
+        )
+        return super().to_representation(reservations)
+
+class ReservationListSerializer(ReservationSerializer):
+    """
+    Lightweight reservation representation for list endpoints.
+    
+    Expects user, restaurant and table to be select_related, so a page
+    costs a fixed number of queries.
+    """
+    restaurant = RestaurantSummarySerializer(read_only=True)
+    table = ReservationTableSerializer(read_only=True)
+    
+    class Meta(ReservationSerializer.Meta):
+        fields = [
+            'id', 'user', 'restaurant', 'table', 'date', 'time',
+            'number_of_guests', 'status', 'special_requests', 'can_cancel',
+            'time_until_reservation', 'created_at', 'updated_at'
+        ]
+        list_serializer_class = ReservationBatchListSerializer
+
 class ReviewSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     restaurant = RestaurantSerializer(read_only=True)
@@ -168,10 +215,22 @@ class AvailabilitySerializer(serializers.Serializer):
 
 class DashboardStatsSerializer(serializers.Serializer):
     total_reservations = serializers.IntegerField()
-    upcoming_reservations = serializers.IntegerField()
-    completed_reservations = serializers.IntegerField()
-    favorite_restaurants = serializers.ListField()
+    # User dashboard
+    upcoming_reservations = serializers.IntegerField(required=False)
+    completed_reservations = serializers.IntegerField(required=False)
+    cancelled_reservations = serializers.IntegerField(required=False)
+    favorite_restaurants = serializers.ListField(required=False)
+    recent_reservations = serializers.ListField(required=False)
+    # Staff dashboard
+    total_restaurants = serializers.IntegerField(required=False)
+    today_reservations = serializers.IntegerField(required=False)
+    pending_reservations = serializers.IntegerField(required=False)
+    total_users = serializers.IntegerField(required=False)
+    popular_cuisines = serializers.ListField(required=False)
+    recent_reviews = serializers.ListField(required=False)
     live_stats = serializers.DictField(required=False)
     booking_trends = serializers.DictField(required=False)
     customer_insights = serializers.DictField(required=False)
     revenue_analytics = serializers.DictField(required=False)
+    restaurant_insights = serializers.ListField(required=False)
+    cache_stats = serializers.DictField(required=False)
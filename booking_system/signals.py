@@ -0,0 +1,134 @@
+from django.db.models import F
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Restaurant, Reservation, Review, Table
+from .availability import invalidate_occupancy_on_commit
+from .cache_utils import invalidate_namespaces_for
+from .outbox import queue_reservation_email
+from .rollups import (
+    adjust_daily_stats, apply_user_stats_change, stats_key, user_stats_state
+)
+
+@receiver([post_save, post_delete], sender=Reservation)
+def reservation_changed(sender, instance, **kwargs):
+    """Keep the slot occupancy index in step with bookings and cancellations"""
+    invalidate_occupancy_on_commit(instance.restaurant_id)
+
+@receiver(pre_save, sender=Reservation)
+def remember_previous_reservation(sender, instance, raw=False, **kwargs):
+    """Note which rollup row an edited reservation counted towards"""
+    instance._previous_reservation = None
+    if not raw and not instance._state.adding:
+        instance._previous_reservation = Reservation.objects.filter(pk=instance.pk).values_list(
+            'restaurant_id', 'date', 'time', 'status', 'number_of_guests', 'user_id'
+        ).first()
+
+@receiver(post_save, sender=Reservation)
+def reservation_stats_saved(sender, instance, raw=False, **kwargs):
+    """Move the reservation between DailyReservationStats rows as it changes"""
+    if raw:
+        return
+    
+    key = stats_key(instance.restaurant_id, instance.date, instance.time, instance.status)
+    previous = getattr(instance, '_previous_reservation', None)
+    if previous is not None:
+        *previous_key, previous_guests, _ = previous
+        previous_key = stats_key(*previous_key)
+        if previous_key == key:
+            adjust_daily_stats(key, 0, instance.number_of_guests - previous_guests)
+            return
+        adjust_daily_stats(previous_key, -1, -previous_guests)
+    
+    adjust_daily_stats(key, 1, instance.number_of_guests)
+
+@receiver(post_delete, sender=Reservation)
+def reservation_stats_deleted(sender, instance, **kwargs):
+    key = stats_key(instance.restaurant_id, instance.date, instance.time, instance.status)
+    adjust_daily_stats(key, -1, -instance.number_of_guests)
+
+@receiver(post_save, sender=Reservation)
+def user_stats_saved(sender, instance, raw=False, **kwargs):
+    """Keep the guest's dashboard counters in step with status transitions"""
+    if raw:
+        return
+    
+    previous = getattr(instance, '_previous_reservation', None)
+    if previous is not None:
+        _, date, _, status, _, user_id = previous
+        previous = (user_id, date, status)
+    apply_user_stats_change(previous, user_stats_state(instance))
+
+@receiver(post_delete, sender=Reservation)
+def user_stats_deleted(sender, instance, **kwargs):
+    apply_user_stats_change(user_stats_state(instance), None)
+
+@receiver(post_save, sender=Reservation)
+def queue_reservation_emails(sender, instance, created, raw=False, **kwargs):
+    """Queue the confirmation or cancellation email in the reservation's own transaction"""
+    if raw:
+        return
+    
+    previous = getattr(instance, '_previous_reservation', None)
+    if created:
+        queue_reservation_email(instance, 'confirmation')
+    elif instance.status == 'cancelled' and previous and previous[3] != 'cancelled':
+        queue_reservation_email(instance, 'cancellation')
+
+@receiver([post_save, post_delete], sender=Reservation)
+@receiver([post_save, post_delete], sender=Review)
+@receiver([post_save, post_delete], sender=Restaurant)
+def cached_data_changed(sender, instance, **kwargs):
+    """Drop cached stats, listings and dashboards that show the changed object"""
+    invalidate_namespaces_for(instance)
+
+@receiver([post_save, post_delete], sender=Table)
+def table_changed(sender, instance, **kwargs):
+    """Tables being added, retired or put under maintenance change availability too"""
+    invalidate_occupancy_on_commit(instance.restaurant_id)
+
+def _adjust_review_aggregates(review, restaurant_id, count_delta, sum_delta):
+    if not count_delta and not sum_delta:
+        return
+    
+    Restaurant.objects.filter(pk=restaurant_id).update(
+        review_count=F('review_count') + count_delta,
+        review_sum=F('review_sum') + sum_delta
+    )
+    
+    # Keep an already loaded restaurant in step with the database
+    if Review.restaurant.is_cached(review) and review.restaurant.pk == restaurant_id:
+        review.restaurant.refresh_from_db(fields=['review_count', 'review_sum'])
+
+@receiver(pre_save, sender=Review)
+def remember_previous_review(sender, instance, raw=False, **kwargs):
+    """Note what an edited review counted for before, so the change can be applied as a delta"""
+    instance._previous_review = None
+    if not raw and not instance._state.adding:
+        instance._previous_review = Review.objects.filter(pk=instance.pk).values_list(
+            'restaurant_id', 'rating'
+        ).first()
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, raw=False, **kwargs):
+    """Maintain the restaurant's review_count/review_sum"""
+    if raw:
+        return
+    
+    previous = getattr(instance, '_previous_review', None)
+    if previous is None:
+        _adjust_review_aggregates(instance, instance.restaurant_id, 1, instance.rating)
+        return
+    
+    previous_restaurant_id, previous_rating = previous
+    if previous_restaurant_id == instance.restaurant_id:
+        _adjust_review_aggregates(
+            instance, instance.restaurant_id, 0, instance.rating - previous_rating
+        )
+    else:
+        _adjust_review_aggregates(instance, previous_restaurant_id, -1, -previous_rating)
+        _adjust_review_aggregates(instance, instance.restaurant_id, 1, instance.rating)
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    _adjust_review_aggregates(instance, instance.restaurant_id, -1, -instance.rating)
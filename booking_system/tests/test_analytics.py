@@ -0,0 +1,173 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils import timezone
+from datetime import time, timedelta
+from io import StringIO
+from booking_system.models import Restaurant, Table, Reservation
+from booking_system.analytics import AnalyticsEngine
+from booking_system.rollups import rebuild_daily_stats
+
+User = get_user_model()
+
+class TableUtilizationTest(TestCase):
+    def setUp(self):
+        owner = User.objects.create_user(username='owner', password='testpass123')
+        self.customer = User.objects.create_user(username='customer', password='testpass123')
+
+        # Open 9:00 to 22:00, i.e. 780 bookable minutes a day
+        self.restaurant = Restaurant.objects.create(
+            name='Test Restaurant',
+            location='Test City',
+            cuisine='italian',
+            rating=4.5,
+            user=owner
+        )
+
+        self.tables = [
+            Table.objects.create(
+                restaurant=self.restaurant,
+                table_number=f'T{number:02d}',
+                capacity=4
+            )
+            for number in range(50)
+        ]
+
+    def book(self, table, start, end, status='confirmed'):
+        today = timezone.now().date()
+        # bulk_create skips the model's "not in the past" validation
+        Reservation.objects.bulk_create([
+            Reservation(
+                user=self.customer,
+                restaurant=self.restaurant,
+                table=table,
+                date=today,
+                time=start,
+                start_time=start,
+                end_time=end,
+                number_of_guests=2,
+                status=status
+            )
+        ])
+
+    def test_utilization_is_one_query(self):
+        """Test utilization for 50 tables is computed with a single query"""
+        self.book(self.tables[0], time(12, 0), time(14, 0))
+
+        with self.assertNumQueries(1):
+            data = AnalyticsEngine(self.restaurant).get_table_utilization()
+
+        self.assertEqual(len(data['table_utilization']), 50)
+
+    def test_utilization_uses_booked_minutes(self):
+        """Test utilization compares booked minutes with opening hours"""
+        self.book(self.tables[0], time(12, 0), time(14, 0))
+        self.book(self.tables[0], time(18, 0), time(19, 30))
+        self.book(self.tables[0], time(20, 0), time(22, 0), status='cancelled')
+
+        data = AnalyticsEngine(self.restaurant).get_table_utilization(days=1)
+        first, second = data['table_utilization'][:2]
+
+        self.assertEqual(first['total_bookings'], 2)
+        self.assertEqual(first['booked_minutes'], 210)
+        # Two days (yesterday and today) of 780 minutes each
+        self.assertAlmostEqual(first['utilization_rate'], 210 / 1560 * 100)
+        self.assertEqual(second['total_bookings'], 0)
+        self.assertEqual(second['utilization_rate'], 0)
+
+class PredictiveInsightsTest(TestCase):
+    """The insights report must cost a fixed number of queries"""
+
+    def setUp(self):
+        owner = User.objects.create_user(username='owner', password='testpass123')
+        self.customer = User.objects.create_user(username='customer', password='testpass123')
+
+        self.restaurant = Restaurant.objects.create(
+            name='Test Restaurant',
+            location='Test City',
+            cuisine='italian',
+            rating=4.5,
+            user=owner
+        )
+
+        self.table = Table.objects.create(
+            restaurant=self.restaurant,
+            table_number='T1',
+            capacity=4
+        )
+
+    def create_history(self, days):
+        today = timezone.now().date()
+        statuses = ['completed', 'completed', 'cancelled', 'no_show']
+        Reservation.objects.bulk_create([
+            Reservation(
+                user=self.customer,
+                restaurant=self.restaurant,
+                table=self.table,
+                date=today - timedelta(days=day),
+                time=time(19, 0) if day % 2 else time(12, 30),
+                start_time=time(19, 0),
+                end_time=time(21, 0),
+                number_of_guests=2,
+                status=statuses[day % 4]
+            )
+            for day in range(1, days + 1)
+        ])
+        # bulk_create skips the signals that maintain the rollup
+        rebuild_daily_stats()
+
+    def test_insights_query_count_is_constant(self):
+        """Test the report reads the reservation history once however long it is"""
+        self.create_history(10)
+        with self.assertNumQueries(2):
+            AnalyticsEngine(self.restaurant).get_predictive_insights()
+
+        self.create_history(120)
+        with self.assertNumQueries(2):
+            AnalyticsEngine(self.restaurant).get_predictive_insights()
+
+    def test_insights_are_derived_from_history(self):
+        """Test sub-reports reflect the reservations in the snapshot"""
+        self.create_history(8)
+
+        insights = AnalyticsEngine(self.restaurant).get_predictive_insights()
+
+        peak_hours = insights['peak_times']['peak_hours']
+        self.assertEqual(peak_hours[0]['count'], 4)
+        self.assertEqual({row['hour'] for row in peak_hours}, {12, 19})
+
+        suggestions = {s['category']: s for s in insights['optimization_suggestions']}
+        self.assertEqual(suggestions['operations']['no_show_rate'], 25)
+        self.assertEqual(suggestions['policy']['cancellation_rate'], 25)
+        self.assertEqual(insights['revenue_forecast']['confidence'], 'low')
+
+    def test_cancellation_lead_time_is_bucketed(self):
+        """Test cancellation lead times aggregate without database-specific SQL"""
+        today = timezone.now().date()
+        for days_ahead in [1, 3, 30]:
+            Reservation.objects.create(
+                user=self.customer,
+                restaurant=self.restaurant,
+                table=self.table,
+                date=today + timedelta(days=days_ahead),
+                time=time(19, 0),
+                number_of_guests=2,
+                status='cancelled'
+            )
+
+        patterns = AnalyticsEngine(self.restaurant).analyze_cancellation_patterns()
+
+        self.assertEqual(patterns['total_cancelled'], 3)
+        self.assertEqual(patterns['timing_patterns'], [
+            {'booked_ahead': 'day_before', 'count': 1},
+            {'booked_ahead': 'earlier', 'count': 1},
+            {'booked_ahead': 'within_week', 'count': 1},
+        ])
+
+    def test_benchmark_command_leaves_no_data(self):
+        """Test the analytics benchmark runs and rolls back its dataset"""
+        out = StringIO()
+        call_command('benchmark_analytics', rows=200, batch_size=50, repeat=1, explain=True, stdout=out)
+
+        self.assertIn('hourly (ExtractHour)', out.getvalue())
+        self.assertFalse(Restaurant.objects.filter(name='Analytics Benchmark').exists())
@@ -0,0 +1,184 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from datetime import time, timedelta
+from booking_system.models import Restaurant, Review, Table, Reservation
+from booking_system.api_views import RestaurantViewSet
+from booking_system.availability import busy_table_ids
+from booking_system.serializers import RestaurantSerializer, TableSerializer
+
+User = get_user_model()
+
+class RestaurantListQueryCountTest(TestCase):
+    """Listing restaurants must cost the same number of queries however many there are"""
+
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            username='owner',
+            email='owner@test.com',
+            password='testpass123'
+        )
+        self.reviewers = [
+            User.objects.create_user(username=f'reviewer{i}', password='testpass123')
+            for i in range(3)
+        ]
+
+    def create_restaurants(self, count):
+        for number in range(count):
+            restaurant = Restaurant.objects.create(
+                name=f'Restaurant {number}',
+                location='Test City',
+                cuisine='italian',
+                rating=4.0,
+                user=self.owner
+            )
+            for reviewer in self.reviewers:
+                Review.objects.create(
+                    user=reviewer,
+                    restaurant=restaurant,
+                    rating=4,
+                    comment='Good food'
+                )
+
+    def count_list_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('restaurant-list'))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_list_endpoint_query_count_is_constant(self):
+        """Test the list endpoint does not issue per-restaurant queries"""
+        self.create_restaurants(2)
+        small = self.count_list_queries()
+
+        self.create_restaurants(100)
+        large = self.count_list_queries()
+
+        self.assertEqual(small, large)
+
+    def test_serializing_100_restaurants_is_one_query(self):
+        """Test a page of 100 annotated restaurants serializes from a single query"""
+        self.create_restaurants(100)
+        queryset = RestaurantViewSet().get_queryset()[:100]
+
+        with self.assertNumQueries(1):
+            data = RestaurantSerializer(queryset, many=True).data
+
+        self.assertEqual(len(data), 100)
+        self.assertEqual(data[0]['average_rating'], 4.0)
+        self.assertEqual(data[0]['total_reviews'], 3)
+
+class ReservationListQueryCountTest(TestCase):
+    """A page of reservations must cost a fixed handful of queries"""
+
+    def setUp(self):
+        self.staff = User.objects.create_user(
+            username='staff',
+            password='testpass123',
+            is_staff=True
+        )
+        self.restaurant = Restaurant.objects.create(
+            name='Test Restaurant',
+            location='Test City',
+            cuisine='italian',
+            rating=4.0,
+            user=self.staff
+        )
+        self.date = timezone.now().date() + timedelta(days=1)
+        self.client.login(username='staff', password='testpass123')
+
+    def create_reservations(self, count):
+        start = Reservation.objects.count()
+        for number in range(start, start + count):
+            customer = User.objects.create_user(username=f'customer{number}', password='testpass123')
+            table = Table.objects.create(
+                restaurant=self.restaurant,
+                table_number=f'T{number}',
+                capacity=4
+            )
+            Reservation.objects.create(
+                user=customer,
+                restaurant=self.restaurant,
+                table=table,
+                date=self.date,
+                time=time(19, 0),
+                number_of_guests=2,
+                status='confirmed'
+            )
+
+    def count_list_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('reservation-list'))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_list_endpoint_query_count_is_constant(self):
+        """Test nested users, restaurants and table availability are batched"""
+        self.create_reservations(2)
+        small = self.count_list_queries()
+
+        self.create_reservations(15)
+        large = self.count_list_queries()
+
+        self.assertEqual(small, large)
+
+class TableSerializerQueryCountTest(TestCase):
+    """Serializing a list of tables must not query once per table"""
+
+    def setUp(self):
+        owner = User.objects.create_user(username='owner', password='testpass123')
+        self.customer = User.objects.create_user(username='customer', password='testpass123')
+        self.restaurant = Restaurant.objects.create(
+            name='Test Restaurant',
+            location='Test City',
+            cuisine='italian',
+            rating=4.0,
+            user=owner
+        )
+        self.tables = [
+            Table.objects.create(
+                restaurant=self.restaurant,
+                table_number=f'T{number}',
+                capacity=4
+            )
+            for number in range(40)
+        ]
+
+    def test_precomputed_busy_set_replaces_per_table_queries(self):
+        """Test 40 tables serialize with the single busy_table_ids query"""
+        with self.assertNumQueries(1):
+            busy = busy_table_ids([table.id for table in self.tables])
+            data = TableSerializer(
+                self.tables, many=True, context={'busy_table_ids': busy}
+            ).data
+
+        self.assertTrue(all(row['is_available'] for row in data))
+
+    def test_table_in_use_is_reported_busy(self):
+        """Test a booking in progress marks its table unavailable, with or without context"""
+        now = timezone.localtime()
+        if now.time() < time(2, 0) or now.time() > time(21, 0):
+            self.skipTest('Needs a booking window that does not cross midnight')
+
+        reservation = Reservation(
+            user=self.customer,
+            restaurant=self.restaurant,
+            table=self.tables[0],
+            date=now.date(),
+            time=(now - timedelta(hours=1)).time(),
+            number_of_guests=2,
+            status='seated'
+        )
+        # Skip full_clean's "not in the past" rule for a booking already underway
+        Reservation.objects.bulk_create([reservation])
+        Reservation.objects.filter(pk=reservation.pk).update(
+            start_time=reservation.time,
+            end_time=(now + timedelta(hours=1)).time()
+        )
+
+        busy = busy_table_ids([table.id for table in self.tables])
+        self.assertEqual(busy, {self.tables[0].id})
+        self.assertFalse(TableSerializer(self.tables[0]).data['is_available'])
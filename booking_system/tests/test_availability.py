@@ -0,0 +1,175 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
+from datetime import time, timedelta
+from booking_system.models import Restaurant, Table, Reservation
+from booking_system.availability import SLOT_TIMES, get_occupancy, assign_table, find_available_tables
+
+User = get_user_model()
+
+class OccupancyIndexTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(
+            username='owner',
+            email='owner@test.com',
+            password='testpass123'
+        )
+
+        self.customer = User.objects.create_user(
+            username='customer',
+            email='customer@test.com',
+            password='testpass123'
+        )
+
+        self.restaurant = Restaurant.objects.create(
+            name='Test Restaurant',
+            location='Test City',
+            cuisine='italian',
+            rating=4.5,
+            user=self.owner
+        )
+
+        self.table = Table.objects.create(
+            restaurant=self.restaurant,
+            table_number='T1',
+            capacity=4
+        )
+        Table.objects.create(
+            restaurant=self.restaurant,
+            table_number='T2',
+            capacity=2
+        )
+
+        self.date = timezone.now().date() + timedelta(days=1)
+
+    def book(self, start, end, status='confirmed'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Reservation.objects.create(
+                user=self.customer,
+                restaurant=self.restaurant,
+                table=self.table,
+                date=self.date,
+                time=start,
+                start_time=start,
+                end_time=end,
+                number_of_guests=2,
+                status=status
+            )
+
+    def slot(self, occupancy, value):
+        return occupancy.slots()[SLOT_TIMES.index(value)]
+
+    def test_reservation_blocks_every_overlapping_slot(self):
+        """Test a booking occupies all slots its interval overlaps"""
+        self.book(time(19, 0), time(21, 0))
+
+        occupancy = get_occupancy(self.restaurant.id, self.date)
+
+        self.assertEqual(occupancy.total_tables, 2)
+        self.assertEqual(self.slot(occupancy, time(18, 30))['available_tables'], 2)
+        self.assertEqual(self.slot(occupancy, time(19, 0))['booked_tables'], 1)
+        self.assertEqual(self.slot(occupancy, time(20, 30))['booked_tables'], 1)
+        self.assertEqual(self.slot(occupancy, time(21, 0))['available_tables'], 2)
+
+    def test_cached_index_needs_no_queries(self):
+        """Test repeated lookups are served from the cache"""
+        get_occupancy(self.restaurant.id, self.date)
+
+        with self.assertNumQueries(0):
+            get_occupancy(self.restaurant.id, self.date)
+
+    def test_cancellation_refreshes_index(self):
+        """Test cancelling a booking frees its slots again"""
+        reservation = self.book(time(19, 0), time(21, 0))
+        self.assertEqual(
+            self.slot(get_occupancy(self.restaurant.id, self.date), time(19, 0))['booked_tables'], 1
+        )
+
+        reservation.status = 'cancelled'
+        with self.captureOnCommitCallbacks(execute=True):
+            reservation.save()
+
+        self.assertEqual(
+            self.slot(get_occupancy(self.restaurant.id, self.date), time(19, 0))['booked_tables'], 0
+        )
+
+class TableAssignmentTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(
+            username='owner',
+            email='owner@test.com',
+            password='testpass123'
+        )
+
+        self.customer = User.objects.create_user(
+            username='customer',
+            email='customer@test.com',
+            password='testpass123'
+        )
+
+        self.restaurant = Restaurant.objects.create(
+            name='Test Restaurant',
+            location='Test City',
+            cuisine='italian',
+            rating=4.5,
+            user=self.owner
+        )
+
+        self.large_table = Table.objects.create(
+            restaurant=self.restaurant,
+            table_number='T1',
+            capacity=8
+        )
+        self.small_table = Table.objects.create(
+            restaurant=self.restaurant,
+            table_number='T2',
+            capacity=2
+        )
+        self.medium_table = Table.objects.create(
+            restaurant=self.restaurant,
+            table_number='T3',
+            capacity=4
+        )
+
+        self.date = timezone.now().date() + timedelta(days=1)
+
+    def test_best_fit_table_is_assigned(self):
+        """Test the smallest table that seats the party is chosen"""
+        table_id = assign_table(self.restaurant.id, self.date, time(19, 0), 3)
+        self.assertEqual(table_id, self.medium_table.id)
+
+        table_ids = find_available_tables(self.restaurant.id, self.date, time(19, 0), 2)
+        self.assertEqual(
+            table_ids,
+            [self.small_table.id, self.medium_table.id, self.large_table.id]
+        )
+
+    def test_overlapping_booking_blocks_table(self):
+        """Test a booking starting at a different time still blocks an overlapping one"""
+        Reservation.objects.create(
+            user=self.customer,
+            restaurant=self.restaurant,
+            table=self.medium_table,
+            date=self.date,
+            time=time(19, 0),
+            number_of_guests=3,
+            status='confirmed'
+        )
+
+        # 20:00 overlaps the 19:00-21:00 booking, 21:00 does not
+        self.assertEqual(
+            assign_table(self.restaurant.id, self.date, time(20, 0), 3),
+            self.large_table.id
+        )
+        self.assertEqual(
+            assign_table(self.restaurant.id, self.date, time(21, 0), 3),
+            self.medium_table.id
+        )
+        self.assertFalse(self.medium_table.is_available(self.date, time(20, 0)))
+
+    def test_no_table_for_oversized_party(self):
+        """Test None is returned when no table seats the party"""
+        self.assertIsNone(assign_table(self.restaurant.id, self.date, time(19, 0), 10))
@@ -0,0 +1,177 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock, skipUnless
+from django.test import TestCase, TransactionTestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count
+from django.urls import reverse
+from django.utils import timezone
+from datetime import time, timedelta
+from booking_system.models import Restaurant, Table, Reservation
+from booking_system.booking import book_reservation, NoTableAvailable, BookingLockTimeout
+
+User = get_user_model()
+
+class BookReservationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(
+            username='owner',
+            email='owner@test.com',
+            password='testpass123'
+        )
+
+        self.customer = User.objects.create_user(
+            username='customer',
+            email='customer@test.com',
+            password='testpass123'
+        )
+
+        self.restaurant = Restaurant.objects.create(
+            name='Test Restaurant',
+            location='Test City',
+            cuisine='italian',
+            rating=4.5,
+            user=self.owner
+        )
+
+        self.table = Table.objects.create(
+            restaurant=self.restaurant,
+            table_number='T1',
+            capacity=4
+        )
+
+        self.date = timezone.now().date() + timedelta(days=1)
+
+    def new_reservation(self, start):
+        return Reservation(
+            user=self.customer,
+            restaurant=self.restaurant,
+            date=self.date,
+            time=start,
+            number_of_guests=2
+        )
+
+    def test_table_is_assigned_and_saved(self):
+        """Test a booking gets a table and is persisted"""
+        reservation = book_reservation(self.new_reservation(time(19, 0)))
+
+        self.assertEqual(reservation.table, self.table)
+        self.assertTrue(Reservation.objects.filter(id=reservation.id).exists())
+
+    def test_overlapping_booking_is_rejected(self):
+        """Test a second overlapping booking finds no table"""
+        book_reservation(self.new_reservation(time(19, 0)))
+
+        with self.assertRaises(NoTableAvailable):
+            book_reservation(self.new_reservation(time(20, 0)))
+
+    def post_booking(self, start):
+        return self.client.post(
+            reverse('reservation-list'),
+            {
+                'restaurant_id': str(self.restaurant.id),
+                'date': self.date.isoformat(),
+                'time': start.strftime('%H:%M'),
+                'number_of_guests': 2,
+            },
+            content_type='application/json'
+        )
+
+    def test_api_full_slot_is_a_bad_request(self):
+        """Test booking a full slot through the API returns 400, not 500"""
+        self.client.login(username='customer', password='testpass123')
+        self.assertEqual(self.post_booking(time(19, 0)).status_code, 201)
+
+        response = self.post_booking(time(20, 0))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['message'], 'No tables available for the selected time')
+
+    def test_api_lock_timeout_is_service_unavailable(self):
+        """Test a contended booking lock returns 503 through the API"""
+        self.client.login(username='customer', password='testpass123')
+        with mock.patch(
+            'booking_system.api_views.book_reservation',
+            side_effect=BookingLockTimeout()
+        ):
+            response = self.post_booking(time(19, 0))
+
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(Reservation.objects.exists())
+
+    @skipUnless(connection.vendor == 'postgresql', 'Exclusion constraint is PostgreSQL only')
+    def test_database_rejects_overlapping_insert(self):
+        """Test the exclusion constraint blocks overlaps even without the booking service"""
+        book_reservation(self.new_reservation(time(19, 0)))
+
+        overlapping = self.new_reservation(time(20, 0))
+        overlapping.table = self.table
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            overlapping.save()
+
+class ConcurrentBookingLoadTest(TransactionTestCase):
+    """Fire many bookings for the same slot at once and check none overlap"""
+
+    BOOKINGS = 200
+    WORKERS = 16
+    TABLES = 10
+
+    def setUp(self):
+        cache.clear()
+        owner = User.objects.create_user(username='owner', password='testpass123')
+        self.customer = User.objects.create_user(username='customer', password='testpass123')
+
+        self.restaurant = Restaurant.objects.create(
+            name='Busy Restaurant',
+            location='Test City',
+            cuisine='italian',
+            rating=4.5,
+            user=owner
+        )
+
+        for number in range(self.TABLES):
+            Table.objects.create(
+                restaurant=self.restaurant,
+                table_number=f'T{number}',
+                capacity=4
+            )
+
+        self.date = timezone.now().date() + timedelta(days=1)
+
+    def attempt_booking(self, _):
+        try:
+            book_reservation(
+                Reservation(
+                    user=self.customer,
+                    restaurant=self.restaurant,
+                    date=self.date,
+                    time=time(19, 0),
+                    number_of_guests=2
+                ),
+                timeout=60
+            )
+            return 'booked'
+        except NoTableAvailable:
+            return 'full'
+        except BookingLockTimeout:
+            return 'timeout'
+        finally:
+            connection.close()
+
+    def test_concurrent_bookings_never_overlap(self):
+        """Test hundreds of simultaneous bookings fill each table exactly once"""
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as executor:
+            outcomes = list(executor.map(self.attempt_booking, range(self.BOOKINGS)))
+
+        self.assertEqual(outcomes.count('booked'), self.TABLES)
+        self.assertEqual(outcomes.count('full'), self.BOOKINGS - self.TABLES)
+
+        bookings_per_table = Reservation.objects.filter(
+            restaurant=self.restaurant,
+            date=self.date
+        ).values('table').annotate(count=Count('id'))
+
+        self.assertEqual(len(bookings_per_table), self.TABLES)
+        self.assertTrue(all(row['count'] == 1 for row in bookings_per_table))
@@ -0,0 +1,249 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from datetime import time, timedelta
+from unittest import mock
+from booking_system import cache_utils
+from booking_system.models import Restaurant, Review, Table, Reservation
+from booking_system.cache_utils import (
+    cached, get_cache_key, bump_version, get_version_key, local_cache, LocalCache,
+    get_cuisines, get_restaurant_stats, get_popular_restaurants, get_cuisine_stats,
+    get_user_reservation_stats, invalidate_restaurant_cache
+)
+
+User = get_user_model()
+
+class NamespacedCacheTest(TestCase):
+    """Cached stats must be rebuilt as soon as the data behind them changes"""
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.owner = User.objects.create_user(
+            username='owner',
+            email='owner@test.com',
+            password='testpass123'
+        )
+        self.customer = User.objects.create_user(username='customer', password='testpass123')
+
+        self.restaurant = Restaurant.objects.create(
+            name='Test Restaurant',
+            location='Test City',
+            cuisine='italian',
+            rating=4.5,
+            user=self.owner
+        )
+        self.table = Table.objects.create(
+            restaurant=self.restaurant,
+            table_number='T1',
+            capacity=4
+        )
+
+    def tearDown(self):
+        cache.clear()
+        local_cache.clear()
+
+    def book(self):
+        return Reservation.objects.create(
+            user=self.customer,
+            restaurant=self.restaurant,
+            table=self.table,
+            date=timezone.now().date() + timedelta(days=1),
+            time=time(19, 0),
+            number_of_guests=2,
+            status='confirmed'
+        )
+
+    def test_cached_entries_are_served_without_queries(self):
+        """Test a warm cache answers every getter without touching the database"""
+        get_restaurant_stats(self.restaurant.id)
+        get_popular_restaurants()
+        get_cuisine_stats()
+
+        with self.assertNumQueries(0):
+            get_restaurant_stats(self.restaurant.id)
+            get_popular_restaurants()
+            get_cuisine_stats()
+
+    def test_reservation_invalidates_restaurant_and_user_stats(self):
+        """Test a new booking refreshes the restaurant's and the guest's stats"""
+        self.assertEqual(get_restaurant_stats(self.restaurant.id)['total_reservations'], 0)
+        self.assertEqual(get_user_reservation_stats(self.customer.id)['total_reservations'], 0)
+
+        self.book()
+
+        self.assertEqual(get_restaurant_stats(self.restaurant.id)['total_reservations'], 1)
+        stats = get_user_reservation_stats(self.customer.id)
+        self.assertEqual(stats['total_reservations'], 1)
+        self.assertEqual(stats['upcoming_reservations'], 1)
+
+    def test_review_invalidates_listings(self):
+        """Test a review refreshes restaurant stats, popular restaurants and cuisines"""
+        get_restaurant_stats(self.restaurant.id)
+        get_popular_restaurants()
+        get_cuisine_stats()
+
+        Review.objects.create(
+            user=self.customer,
+            restaurant=self.restaurant,
+            rating=2,
+            comment='Cold food'
+        )
+
+        self.assertEqual(get_restaurant_stats(self.restaurant.id)['review_count'], 1)
+        self.assertEqual(get_popular_restaurants()[0]['avg_rating'], 2.0)
+        self.assertEqual(get_cuisine_stats()[0]['avg_rating'], 2.0)
+
+    def test_restaurant_change_invalidates_listings(self):
+        """Test editing a restaurant refreshes the shared listings"""
+        self.assertEqual(get_cuisine_stats()[0]['cuisine'], 'italian')
+
+        self.restaurant.cuisine = 'french'
+        self.restaurant.save()
+
+        self.assertEqual(get_cuisine_stats()[0]['cuisine'], 'french')
+        self.assertEqual(get_popular_restaurants()[0]['cuisine'], 'french')
+
+    def test_invalidate_restaurant_cache(self):
+        """Test explicit invalidation drops entries even after bulk updates"""
+        get_restaurant_stats(self.restaurant.id)
+        get_popular_restaurants()
+
+        # Queryset updates skip signals
+        Restaurant.objects.filter(pk=self.restaurant.pk).update(name='Renamed')
+        self.assertEqual(get_popular_restaurants()[0]['name'], 'Test Restaurant')
+
+        invalidate_restaurant_cache(self.restaurant.id)
+        self.assertEqual(get_popular_restaurants()[0]['name'], 'Renamed')
+
+class StampedeProtectionTest(TestCase):
+    """Expired entries must be rebuilt by one worker while the rest keep serving"""
+
+    def setUp(self):
+        cache.clear()
+        self.builds = []
+        self.lock_key = get_cache_key('cache_rebuild_lock', 'stats')
+
+    def tearDown(self):
+        cache.clear()
+
+    def build(self):
+        self.builds.append(1)
+        return len(self.builds)
+
+    def get(self, **kwargs):
+        return cached('stats', self.build, 60, version_key=get_version_key('stats'), **kwargs)
+
+    def test_rebuild_in_progress_serves_stale_value(self):
+        """Test an invalidated entry is served while another worker holds the rebuild lock"""
+        self.assertEqual(self.get(), 1)
+        bump_version('stats')
+
+        cache.add(self.lock_key, 1)
+        self.assertEqual(self.get(), 1)
+        self.assertEqual(len(self.builds), 1)
+
+        cache.delete(self.lock_key)
+        self.assertEqual(self.get(), 2)
+
+    def test_expired_entry_is_rebuilt_once(self):
+        """Test only the lock holder rebuilds an entry past its TTL"""
+        self.get()
+        with mock.patch('booking_system.cache_utils.time.time', return_value=cache_utils.time.time() + 90):
+            cache.add(self.lock_key, 1)
+            self.assertEqual(self.get(), 1)
+
+            cache.delete(self.lock_key)
+            self.assertEqual(self.get(), 2)
+        self.assertEqual(len(self.builds), 2)
+
+    def test_waits_instead_of_serving_stale_when_asked(self):
+        """Test serve_stale=False falls back to building once the wait runs out"""
+        self.get()
+        bump_version('stats')
+        cache.add(self.lock_key, 1)
+
+        with mock.patch.object(cache_utils, 'REBUILD_WAIT', 0):
+            self.assertEqual(self.get(serve_stale=False), 2)
+        # The lock still belongs to the worker that is rebuilding
+        self.assertIsNotNone(cache.get(self.lock_key))
+
+    def test_slow_builds_refresh_early(self):
+        """Test entries that are slow to build get refreshed before they expire"""
+        self.get()
+        # Pretend the entry took 30s to build and the random draw came up early
+        entry = cache.get('stats')
+        cache.set('stats', entry[:3] + (30,), 120)
+
+        with mock.patch('booking_system.cache_utils.random.random', return_value=0.99):
+            self.assertEqual(self.get(), 2)
+        with mock.patch('booking_system.cache_utils.random.random', return_value=0.0):
+            self.assertEqual(self.get(), 2)
+
+class LocalCacheTest(TestCase):
+    """Hot reference data must be served from the worker's own memory"""
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        owner = User.objects.create_user(username='owner', password='testpass123')
+        self.restaurant = Restaurant.objects.create(
+            name='Test Restaurant',
+            location='Test City',
+            cuisine='italian',
+            rating=4.5,
+            user=owner
+        )
+
+    def tearDown(self):
+        cache.clear()
+        local_cache.clear()
+
+    def test_warm_reads_skip_the_shared_cache(self):
+        """Test repeated reads touch neither the database nor the shared cache"""
+        self.assertEqual(get_cuisines(), ['italian'])
+
+        with self.assertNumQueries(0), \
+                mock.patch.object(cache_utils.cache, 'get', side_effect=AssertionError), \
+                mock.patch.object(cache_utils.cache, 'get_many', side_effect=AssertionError):
+            self.assertEqual(get_cuisines(), ['italian'])
+
+    def test_local_change_is_seen_at_once(self):
+        """Test a change made by this worker invalidates its local copies immediately"""
+        get_cuisines()
+        self.restaurant.cuisine = 'french'
+        self.restaurant.save()
+
+        self.assertEqual(get_cuisines(), ['french'])
+
+    def test_other_workers_changes_are_picked_up(self):
+        """Test a generation bumped elsewhere is noticed after the check interval"""
+        get_cuisines()
+        # Another worker renames the cuisine and bumps the shared generation
+        Restaurant.objects.filter(pk=self.restaurant.pk).update(cuisine='french')
+        cache.incr(get_version_key('restaurants'))
+        self.assertEqual(get_cuisines(), ['italian'])
+
+        later = cache_utils.time.monotonic() + cache_utils.LOCAL_VERSION_CHECK_INTERVAL + 1
+        with mock.patch('booking_system.cache_utils.time.monotonic', return_value=later):
+            self.assertEqual(get_cuisines(), ['french'])
+
+    def test_entries_are_bounded(self):
+        """Test the least recently used entries are evicted past the size limit"""
+        lru = LocalCache(max_entries=2)
+        lru.set('a', 1, 60)
+        lru.set('b', 2, 60)
+        lru.get('a')
+        lru.set('c', 3, 60)
+
+        self.assertEqual(lru.get('a'), 1)
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(lru.get('c'), 3)
+
+    def test_cuisines_endpoint(self):
+        """Test the cuisines action serves the cached list"""
+        response = self.client.get(reverse('restaurant-cuisines'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'cuisines': ['italian']})
@@ -0,0 +1,116 @@
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from datetime import time, timedelta
+from unittest import mock
+from booking_system.models import Restaurant, Table, Reservation
+
+User = get_user_model()
+
+class DashboardCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.staff = User.objects.create_user(
+            username='staff',
+            password='testpass123',
+            is_staff=True
+        )
+        self.customer = User.objects.create_user(username='customer', password='testpass123')
+
+        self.restaurant = Restaurant.objects.create(
+            name='Test Restaurant',
+            location='Test City',
+            cuisine='italian',
+            rating=4.5,
+            user=self.staff
+        )
+
+        self.table = Table.objects.create(
+            restaurant=self.restaurant,
+            table_number='T1',
+            capacity=4
+        )
+
+    def reserve(self, start):
+        return Reservation.objects.create(
+            user=self.customer,
+            restaurant=self.restaurant,
+            table=self.table,
+            date=timezone.now().date() + timedelta(days=1),
+            time=start,
+            number_of_guests=2
+        )
+
+    def get_dashboard(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('dashboard_stats'))
+        self.assertEqual(response.status_code, 200)
+        return response.data, len(queries)
+
+    def test_repeated_staff_polling_skips_the_database(self):
+        """Test a second staff dashboard request is served from the cache"""
+        self.client.login(username='staff', password='testpass123')
+
+        _, cold_queries = self.get_dashboard()
+        with mock.patch.object(cache, 'incr', wraps=cache.incr) as incr:
+            data, warm_queries = self.get_dashboard()
+
+        # Only the session user lookup remains
+        self.assertEqual(warm_queries, 1)
+        self.assertLess(warm_queries, cold_queries)
+        # Hit counting is off by default, so a hit writes nothing
+        incr.assert_not_called()
+        self.assertNotIn('cache_stats', data)
+
+    @override_settings(CACHE_ACCESS_COUNTERS=True)
+    def test_hit_counters_when_enabled(self):
+        """Test staff see dashboard hit and miss counts when counting is on"""
+        self.client.login(username='staff', password='testpass123')
+
+        self.get_dashboard()
+        data, _ = self.get_dashboard()
+
+        self.assertEqual(data['cache_stats']['hits'], 1)
+        self.assertEqual(data['cache_stats']['misses'], 1)
+
+    def test_time_dependent_fields_refresh_each_slot(self):
+        """Test a cached dashboard is rebuilt once the booking slot changes"""
+        self.reserve(time(19, 0))
+        self.client.login(username='customer', password='testpass123')
+        now = timezone.now().replace(minute=10)
+
+        with mock.patch('booking_system.api_views.timezone.now', return_value=now):
+            self.get_dashboard()
+            _, same_slot_queries = self.get_dashboard()
+        with mock.patch(
+            'booking_system.api_views.timezone.now',
+            return_value=now + timedelta(minutes=30)
+        ):
+            _, next_slot_queries = self.get_dashboard()
+
+        self.assertEqual(same_slot_queries, 1)
+        self.assertGreater(next_slot_queries, 1)
+
+    def test_reservation_changes_invalidate_dashboards(self):
+        """Test staff and customer dashboards refresh after a booking changes"""
+        self.client.login(username='customer', password='testpass123')
+        data, _ = self.get_dashboard()
+        self.assertEqual(data['total_reservations'], 0)
+
+        reservation = self.reserve(time(19, 0))
+        data, _ = self.get_dashboard()
+        self.assertEqual(data['total_reservations'], 1)
+        self.assertEqual(data['upcoming_reservations'], 1)
+
+        reservation.status = 'cancelled'
+        reservation.save()
+        data, _ = self.get_dashboard()
+        self.assertEqual(data['upcoming_reservations'], 0)
+
+        self.client.login(username='staff', password='testpass123')
+        data, _ = self.get_dashboard()
+        self.assertEqual(data['total_reservations'], 1)
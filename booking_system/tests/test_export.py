@@ -0,0 +1,101 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from datetime import time, timedelta
+from io import StringIO
+import csv
+import json
+from booking_system.models import Restaurant, Table, Reservation
+
+User = get_user_model()
+
+class ReservationExportTest(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(
+            username='staff',
+            password='testpass123',
+            is_staff=True
+        )
+        self.customer = User.objects.create_user(username='customer', password='testpass123')
+
+        self.restaurants = []
+        for number in range(2):
+            restaurant = Restaurant.objects.create(
+                name=f'Restaurant {number}',
+                location='Test City',
+                cuisine='italian',
+                rating=4.5,
+                user=self.staff
+            )
+            table = Table.objects.create(restaurant=restaurant, table_number='T1', capacity=4)
+            self.restaurants.append(restaurant)
+
+            for day in range(1, 4):
+                Reservation.objects.create(
+                    user=self.customer,
+                    restaurant=restaurant,
+                    table=table,
+                    date=timezone.now().date() + timedelta(days=day),
+                    time=time(19, 0),
+                    number_of_guests=day,
+                    status='cancelled' if day == 3 else 'confirmed'
+                )
+
+    def export(self, **params):
+        response = self.client.get(reverse('reservation-export'), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_export_is_filtered(self):
+        """Test the CSV export streams a header and only the matching reservations"""
+        self.client.login(username='staff', password='testpass123')
+
+        rows = list(csv.DictReader(StringIO(self.export(
+            restaurant=self.restaurants[0].id, status='confirmed'
+        ))))
+
+        self.assertEqual(len(rows), 2)
+        self.assertEqual({row['restaurant'] for row in rows}, {'Restaurant 0'})
+        self.assertEqual([row['guests'] for row in rows], ['1', '2'])
+        self.assertEqual(rows[0]['username'], 'customer')
+
+    def test_ndjson_export(self):
+        """Test the NDJSON export writes one object per line"""
+        self.client.login(username='staff', password='testpass123')
+        date_to = (timezone.now().date() + timedelta(days=1)).isoformat()
+
+        lines = self.export(output='ndjson', date_to=date_to).splitlines()
+
+        self.assertEqual(len(lines), 2)
+        record = json.loads(lines[0])
+        self.assertEqual(record['date'], date_to)
+        self.assertEqual(record['time'], '19:00:00')
+
+    def test_export_is_staff_only(self):
+        """Test customers cannot export reservations"""
+        self.client.login(username='customer', password='testpass123')
+        response = self.client.get(reverse('reservation-export'))
+        self.assertEqual(response.status_code, 403)
+
+    def test_invalid_parameters_are_rejected(self):
+        """Test unknown formats and invalid filters return 400"""
+        self.client.login(username='staff', password='testpass123')
+        url = reverse('reservation-export')
+
+        self.assertEqual(self.client.get(url, {'output': 'xml'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'date_from': 'soon'}).status_code, 400)
+
+    def test_command_exports(self):
+        """Test the management command exports with the same filters"""
+        out = StringIO()
+        call_command(
+            'export_reservations', '--status', 'cancelled',
+            stdout=out, stderr=StringIO()
+        )
+
+        rows = list(csv.DictReader(StringIO(out.getvalue())))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual({row['status'] for row in rows}, {'cancelled'})
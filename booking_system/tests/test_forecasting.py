@@ -0,0 +1,73 @@
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from datetime import date, timedelta
+from booking_system.models import Restaurant, DailyReservationStats
+from booking_system.forecasting import fit, forecast_restaurants
+
+User = get_user_model()
+
+class FitTest(SimpleTestCase):
+    # A Monday, so column i falls on weekday i % 7
+    start = date(2025, 1, 6)
+
+    def test_linear_trend_is_extrapolated(self):
+        """Test a straight-line series is continued exactly"""
+        values = np.array([np.arange(28, dtype=float) * 2 + 10])
+
+        forecast = fit(values, self.start, horizon=3)
+
+        np.testing.assert_allclose(forecast.daily[0], [66, 68, 70])
+        self.assertAlmostEqual(forecast.sigma[0], 0)
+
+    def test_weekday_pattern_and_batch_rows(self):
+        """Test weekday seasonality is learnt independently for each row"""
+        weekly = np.array([5, 5, 5, 5, 20, 30, 10], dtype=float)
+        values = np.vstack([np.tile(weekly, 8), np.tile(weekly * 2, 8)])
+
+        forecast = fit(values, self.start, horizon=7)
+
+        np.testing.assert_allclose(forecast.daily[0], weekly, atol=1e-9)
+        np.testing.assert_allclose(forecast.daily[1], weekly * 2, atol=1e-9)
+        np.testing.assert_allclose(forecast.weekly_change, [0, 0], atol=1e-9)
+
+class ForecastRestaurantsTest(TestCase):
+    def setUp(self):
+        owner = User.objects.create_user(username='owner', password='testpass123')
+        self.restaurants = [
+            Restaurant.objects.create(
+                name=f'Restaurant {number}',
+                location='Test City',
+                cuisine='italian',
+                rating=4.5,
+                user=owner
+            )
+            for number in range(3)
+        ]
+
+        today = timezone.now().date()
+        DailyReservationStats.objects.bulk_create([
+            DailyReservationStats(
+                restaurant=restaurant,
+                date=today - timedelta(days=day),
+                hour=19,
+                status='completed',
+                bookings=number + 1,
+                guests=2 * (number + 1),
+                revenue=100 * (number + 1)
+            )
+            for number, restaurant in enumerate(self.restaurants)
+            for day in range(60)
+        ])
+
+    def test_all_restaurants_are_forecast_in_one_query(self):
+        """Test the batch forecast loads every restaurant's series with one query"""
+        with self.assertNumQueries(1):
+            forecasts = forecast_restaurants(horizon=10, days=60)
+
+        self.assertEqual(len(forecasts), 3)
+        for number, restaurant in enumerate(self.restaurants):
+            bookings = forecasts[restaurant.id]['bookings']
+            self.assertAlmostEqual(bookings['daily_average'], number + 1, places=6)
+            self.assertEqual(forecasts[restaurant.id]['revenue']['confidence'], 'high')
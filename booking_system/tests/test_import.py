@@ -0,0 +1,114 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from datetime import date, time
+from io import StringIO
+import csv
+import os
+import tempfile
+from booking_system.imports import ReservationImporter
+from booking_system.models import (
+    DailyReservationStats, Restaurant, Reservation, Table, UserReservationStats
+)
+
+User = get_user_model()
+
+class ReservationImportTest(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner', password='testpass123')
+        self.customer = User.objects.create_user(username='customer', password='testpass123')
+        self.restaurant = Restaurant.objects.create(
+            name='Test Restaurant',
+            location='Test City',
+            cuisine='italian',
+            rating=4.5,
+            user=self.owner
+        )
+        self.table = Table.objects.create(
+            restaurant=self.restaurant,
+            table_number='T1',
+            capacity=4
+        )
+
+    def row(self, **overrides):
+        row = {
+            'restaurant_id': str(self.restaurant.id),
+            'table': 'T1',
+            'username': 'customer',
+            'date': '2024-03-01',
+            'time': '19:00',
+            'guests': '2',
+            'status': 'completed',
+        }
+        row.update(overrides)
+        return row
+
+    def write_csv(self, rows):
+        handle, path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(handle, 'w', newline='') as output:
+            writer = csv.DictWriter(output, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_imports_valid_rows(self):
+        """Test that valid rows are bulk inserted, past dates included"""
+        rows = [self.row(time=f'{hour}:00') for hour in range(12, 18)]
+        with self.assertNumQueries(2):
+            # One lookup for the tables and one for the users, not one per row
+            report = ReservationImporter(dry_run=True).run(rows)
+        self.assertEqual(report.imported, 6)
+
+        report = ReservationImporter(batch_size=4).run(rows)
+        self.assertEqual((report.read, report.imported, report.error_count), (6, 6, 0))
+
+        reservation = Reservation.objects.get(time=time(12, 0))
+        self.assertEqual(reservation.date, date(2024, 3, 1))
+        self.assertEqual(reservation.table, self.table)
+        self.assertEqual(reservation.user, self.customer)
+        self.assertEqual(reservation.end_time, time(14, 0))
+
+    def test_reports_invalid_rows(self):
+        """Test that invalid rows are skipped and reported with their line"""
+        rows = [
+            self.row(),
+            self.row(guests='5'),
+            self.row(table='T9'),
+            self.row(username='nobody'),
+            self.row(date='01/03/2024'),
+            self.row(status='lost'),
+            self.row(restaurant_id='not-a-uuid'),
+        ]
+        report = ReservationImporter().run(rows)
+
+        self.assertEqual(report.imported, 1)
+        self.assertEqual(report.error_count, 6)
+        self.assertEqual([line for line, _ in report.errors], [3, 4, 5, 6, 7, 8])
+        self.assertIn('capacity', report.errors[0][1])
+        self.assertEqual(Reservation.objects.count(), 1)
+
+    def test_dry_run_writes_nothing(self):
+        """Test that a dry run validates without inserting"""
+        path = self.write_csv([self.row(), self.row(guests='0')])
+        output = StringIO()
+        call_command('import_reservations', path, '--dry-run', stdout=output, stderr=StringIO())
+
+        self.assertIn('Validated 1 of 2 rows (1 rejected)', output.getvalue())
+        self.assertFalse(Reservation.objects.exists())
+
+    def test_command_updates_stats(self):
+        """Test that the rollups are rebuilt after an import"""
+        path = self.write_csv([self.row(), self.row(time='21:00', guests='3')])
+        output = StringIO()
+        call_command('import_reservations', path, stdout=output)
+
+        self.assertIn('Imported 2 of 2 rows', output.getvalue())
+        stats = UserReservationStats.objects.get(user=self.customer)
+        self.assertEqual((stats.total, stats.completed), (2, 2))
+        self.assertEqual(
+            sum(DailyReservationStats.objects.filter(
+                restaurant=self.restaurant
+            ).values_list('guests', flat=True)),
+            5
+        )
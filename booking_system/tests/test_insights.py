@@ -0,0 +1,86 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from datetime import time, timedelta
+from io import StringIO
+from booking_system.models import Restaurant, Table, Reservation
+from booking_system.analytics import AnalyticsEngine, build_insights_snapshots, load_insights_inputs
+from booking_system.cache_utils import get_insights_snapshots
+from booking_system.rollups import rebuild_daily_stats
+
+User = get_user_model()
+
+class InsightsSnapshotTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username='owner', password='testpass123')
+        customer = User.objects.create_user(username='customer', password='testpass123')
+
+        today = timezone.now().date()
+        self.restaurants = []
+        for number in range(5):
+            restaurant = Restaurant.objects.create(
+                name=f'Restaurant {number}',
+                location='Test City',
+                cuisine='italian',
+                rating=4.5,
+                user=self.owner
+            )
+            tables = [
+                Table.objects.create(restaurant=restaurant, table_number=f'T{t}', capacity=4)
+                for t in range(3)
+            ]
+            # bulk_create skips the "not in the past" validation
+            Reservation.objects.bulk_create([
+                Reservation(
+                    user=customer,
+                    restaurant=restaurant,
+                    table=tables[day % 3],
+                    date=today - timedelta(days=day),
+                    time=time(19, 0),
+                    start_time=time(19, 0),
+                    end_time=time(21, 0),
+                    number_of_guests=2,
+                    status=['completed', 'cancelled', 'no_show', 'confirmed'][day % 4]
+                )
+                for day in range(1, 11 + number)
+            ])
+            self.restaurants.append(restaurant)
+        rebuild_daily_stats()
+
+    def test_inputs_for_all_restaurants_use_fixed_queries(self):
+        """Test loading inputs costs the same queries for any number of restaurants"""
+        with self.assertNumQueries(4):
+            payloads = load_insights_inputs()
+
+        self.assertEqual(len(payloads), 5)
+
+    def test_snapshots_match_per_restaurant_analytics(self):
+        """Test batch snapshots agree with the on-demand AnalyticsEngine"""
+        snapshots = build_insights_snapshots(load_insights_inputs())
+
+        for restaurant, snapshot in zip(self.restaurants, snapshots):
+            engine = AnalyticsEngine(restaurant)
+            self.assertEqual(snapshot['restaurant_id'], str(restaurant.id))
+            self.assertAlmostEqual(snapshot['no_show_rate'], engine.calculate_no_show_rate())
+            self.assertAlmostEqual(
+                snapshot['cancellation_rate'],
+                engine.analyze_cancellation_patterns()['rate']
+            )
+            self.assertEqual(snapshot['table_utilization'], engine.get_table_utilization())
+
+    def test_command_caches_snapshots_for_dashboard(self):
+        """Test the command stores snapshots that owners see on their dashboard"""
+        call_command('compute_insights', workers=2, chunk_size=2, stdout=StringIO())
+
+        ids = [restaurant.id for restaurant in self.restaurants]
+        self.assertEqual(len(get_insights_snapshots(ids)), 5)
+
+        self.client.login(username='owner', password='testpass123')
+        response = self.client.get(reverse('dashboard_stats'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['restaurant_insights']), 5)
@@ -0,0 +1,189 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.template import loader
+from django.utils import timezone
+from datetime import time, timedelta
+from io import StringIO
+from smtplib import SMTPRecipientsRefused
+from unittest import mock
+from booking_system.models import Restaurant, Table, Reservation
+from booking_system.mailer import build_message, send_batch
+from booking_system.emails import clear_email_templates, render_email, render_many
+
+User = get_user_model()
+
+class FlakyBackend(EmailBackend):
+    """Drops the connection on the next `failures` sends"""
+    failures = 0
+
+    def send_messages(self, messages):
+        if FlakyBackend.failures:
+            FlakyBackend.failures -= 1
+            raise ConnectionError('Connection dropped')
+        return super().send_messages(messages)
+
+class RefusingBackend(EmailBackend):
+    """Refuses messages to bad@test.com, like an SMTP server rejecting the recipient"""
+
+    def send_messages(self, messages):
+        for message in messages:
+            if 'bad@test.com' in message.to:
+                raise SMTPRecipientsRefused({'bad@test.com': (550, b'No such user')})
+        return super().send_messages(messages)
+
+class ReminderEmailTest(TestCase):
+    def setUp(self):
+        owner = User.objects.create_user(username='owner', password='testpass123')
+        self.restaurant = Restaurant.objects.create(
+            name='Test Restaurant',
+            location='Test City',
+            cuisine='italian',
+            rating=4.5,
+            user=owner
+        )
+        self.table = Table.objects.create(
+            restaurant=self.restaurant,
+            table_number='T1',
+            capacity=4
+        )
+        self.tomorrow = timezone.now().date() + timedelta(days=1)
+
+    def reserve(self, number, status='confirmed', date=None):
+        customer = User.objects.create_user(
+            username=f'customer{number}',
+            email=f'customer{number}@test.com',
+            password='testpass123'
+        )
+        return Reservation.objects.create(
+            user=customer,
+            restaurant=self.restaurant,
+            table=self.table,
+            date=date or self.tomorrow,
+            time=time(9 + number % 12, 0),
+            number_of_guests=2,
+            status=status
+        )
+
+    def test_reminders_go_to_tomorrows_bookings_only(self):
+        """Test each live booking tomorrow gets one reminder with both variants"""
+        for number in range(5):
+            self.reserve(number)
+        self.reserve(5, status='cancelled')
+        self.reserve(6, date=self.tomorrow + timedelta(days=1))
+
+        out = StringIO()
+        call_command('send_reminder_emails', '--batch-size', '2', stdout=out)
+
+        self.assertIn('Sent 5 reminder emails (0 failed)', out.getvalue())
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            [f'customer{number}@test.com' for number in range(5)]
+        )
+        message = mail.outbox[0]
+        self.assertIn('Test Restaurant', message.subject)
+        self.assertEqual(message.alternatives[0][1], 'text/html')
+
+    def test_failed_batch_resends_only_unsent_messages(self):
+        """Test a retry after a dropped connection does not duplicate emails"""
+        messages = [
+            build_message('Hello', 'Text', '<p>HTML</p>', f'guest{number}@test.com')
+            for number in range(3)
+        ]
+        FlakyBackend.failures = 1
+
+        with mock.patch(
+            'booking_system.mailer.get_connection',
+            side_effect=lambda: FlakyBackend()
+        ):
+            sent, failed = send_batch(messages, retry_delay=0)
+
+        self.assertEqual((sent, failed), (3, 0))
+        self.assertEqual(len(mail.outbox), 3)
+
+    def test_refused_recipient_does_not_block_batch(self):
+        """Test a rejected message is counted as failed and the rest are still sent"""
+        recipients = ['guest0@test.com', 'bad@test.com', 'guest2@test.com']
+        messages = [
+            build_message('Hello', 'Text', '<p>HTML</p>', recipient)
+            for recipient in recipients
+        ]
+
+        with mock.patch(
+            'booking_system.mailer.get_connection',
+            side_effect=lambda: RefusingBackend()
+        ) as get_connection:
+            sent, failed = send_batch(messages, retry_delay=0)
+
+        self.assertEqual((sent, failed), (2, 1))
+        self.assertEqual(
+            [message.to[0] for message in mail.outbox],
+            ['guest0@test.com', 'guest2@test.com']
+        )
+        # Not treated as a connection failure
+        self.assertEqual(get_connection.call_count, 1)
+
+    def test_gives_up_after_retries(self):
+        """Test a batch that keeps failing is reported instead of raising"""
+        FlakyBackend.failures = 10
+        with mock.patch(
+            'booking_system.mailer.get_connection',
+            side_effect=lambda: FlakyBackend()
+        ):
+            sent, failed = send_batch(
+                [build_message('Hello', 'Text', '<p>HTML</p>', 'guest@test.com')],
+                retries=2,
+                retry_delay=0
+            )
+        FlakyBackend.failures = 0
+
+        self.assertEqual((sent, failed), (0, 1))
+        self.assertEqual(mail.outbox, [])
+
+class EmailRenderingTest(TestCase):
+    def setUp(self):
+        clear_email_templates()
+        owner = User(username='owner')
+        self.restaurant = Restaurant(name='Fish & Chips', location='Harbour 1', user=owner)
+
+    def reservation(self, number):
+        return Reservation(
+            user=User(username=f'guest{number}', email=f'guest{number}@test.com'),
+            restaurant=self.restaurant,
+            date=timezone.now().date() + timedelta(days=1),
+            time=time(19, 30),
+            number_of_guests=number + 1,
+            special_requests='<b>Window</b> seat' if number == 0 else ''
+        )
+
+    def test_render_many_builds_both_variants(self):
+        """Test each reservation gets its own text and HTML bodies"""
+        messages = list(render_many([self.reservation(0), self.reservation(1)], 'reminder'))
+
+        self.assertEqual([message.to for message in messages], [['guest0@test.com'], ['guest1@test.com']])
+        self.assertIn('Guests: 1', messages[0].body)
+        self.assertIn('Guests: 2', messages[1].body)
+        self.assertIn('7:30 PM', messages[1].body)
+        # Values from the first reservation do not leak into the second
+        self.assertNotIn('Window', messages[1].body)
+
+    def test_only_html_is_escaped(self):
+        """Test the plain-text variant is not HTML-escaped"""
+        message = render_email(self.reservation(0), 'confirmation')
+
+        self.assertEqual(message.subject, 'Reservation Confirmation - Fish & Chips')
+        self.assertIn('Special requests: <b>Window</b> seat', message.body)
+        html = message.alternatives[0][0]
+        self.assertIn('&lt;b&gt;Window&lt;/b&gt; seat', html)
+
+    def test_templates_are_compiled_once(self):
+        """Test rendering many emails looks each template up only once"""
+        with mock.patch(
+            'booking_system.emails.get_template', wraps=loader.get_template
+        ) as get_template:
+            list(render_many([self.reservation(number) for number in range(5)], 'reminder'))
+            render_email(self.reservation(0), 'reminder')
+
+        self.assertEqual(get_template.call_count, 2)
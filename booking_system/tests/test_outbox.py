@@ -0,0 +1,132 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.utils import timezone
+from datetime import time, timedelta
+from io import StringIO
+from unittest import mock
+from booking_system.models import Restaurant, Table, Reservation, EmailOutbox
+from booking_system.outbox import MAX_ATTEMPTS, claim_batch, drain_outbox
+from booking_system.utils import send_reservation_confirmation
+
+User = get_user_model()
+
+class EmailOutboxTest(TestCase):
+    def setUp(self):
+        owner = User.objects.create_user(username='owner', password='testpass123')
+        self.customer = User.objects.create_user(
+            username='customer',
+            email='customer@test.com',
+            password='testpass123'
+        )
+        self.restaurant = Restaurant.objects.create(
+            name='Test Restaurant',
+            location='Test City',
+            cuisine='italian',
+            rating=4.5,
+            user=owner
+        )
+        self.table = Table.objects.create(
+            restaurant=self.restaurant,
+            table_number='T1',
+            capacity=4
+        )
+
+    def reserve(self):
+        return Reservation.objects.create(
+            user=self.customer,
+            restaurant=self.restaurant,
+            table=self.table,
+            date=timezone.now().date() + timedelta(days=3),
+            time=time(19, 0),
+            number_of_guests=2,
+            status='confirmed'
+        )
+
+    def test_booking_queues_instead_of_sending(self):
+        """Test a booking writes an outbox row and sends nothing in the request"""
+        reservation = self.reserve()
+
+        self.assertEqual(mail.outbox, [])
+        email = EmailOutbox.objects.get()
+        self.assertEqual((email.kind, email.status), ('confirmation', 'pending'))
+        self.assertEqual(email.reservation, reservation)
+
+    def test_drain_sends_confirmation_and_cancellation(self):
+        """Test the worker sends each queued email once and marks it sent"""
+        reservation = self.reserve()
+        reservation.status = 'cancelled'
+        reservation.save()
+        # Saving again, or queueing by hand, does not duplicate the email
+        reservation.save()
+        send_reservation_confirmation(reservation)
+
+        out = StringIO()
+        call_command('drain_email_outbox', '--workers', '1', stdout=out)
+
+        self.assertIn('Sent 2 emails (0 failed)', out.getvalue())
+        self.assertEqual(
+            sorted(message.subject for message in mail.outbox),
+            ['Reservation Cancelled - Test Restaurant', 'Reservation Confirmation - Test Restaurant']
+        )
+        self.assertEqual(mail.outbox[0].to, ['customer@test.com'])
+        self.assertFalse(EmailOutbox.objects.exclude(status='sent').exists())
+
+        self.assertEqual(drain_outbox(), (0, 0))
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_failures_back_off_then_give_up(self):
+        """Test a failing email is retried later and eventually marked failed"""
+        self.reserve()
+
+        with mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.send_messages',
+            side_effect=ConnectionError('SMTP down')
+        ):
+            self.assertEqual(drain_outbox(), (0, 1))
+
+        email = EmailOutbox.objects.get()
+        self.assertEqual((email.status, email.attempts), ('pending', 1))
+        self.assertGreater(email.next_attempt_at, timezone.now())
+        self.assertIn('SMTP down', email.last_error)
+        # Not due again yet
+        self.assertIsNone(claim_batch())
+
+        EmailOutbox.objects.update(attempts=MAX_ATTEMPTS - 1, next_attempt_at=timezone.now())
+        with mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.send_messages',
+            side_effect=ConnectionError('SMTP down')
+        ):
+            drain_outbox()
+        self.assertEqual(EmailOutbox.objects.get().status, 'failed')
+
+    def test_watch_survives_a_failed_poll(self):
+        """Test an error in one --watch iteration is logged and polling continues"""
+        class StopWatching(Exception):
+            pass
+
+        command = 'booking_system.management.commands.drain_email_outbox'
+        out = StringIO()
+        with mock.patch(
+            f'{command}.drain_outbox',
+            side_effect=[ConnectionError('database went away'), (1, 0)]
+        ) as drain, mock.patch(
+            f'{command}.time.sleep', side_effect=[None, StopWatching]
+        ), mock.patch(f'{command}.close_old_connections') as close_old_connections, \
+                self.assertLogs(command, 'ERROR'), self.assertRaises(StopWatching):
+            call_command('drain_email_outbox', '--watch', stdout=out)
+
+        self.assertEqual(drain.call_count, 2)
+        close_old_connections.assert_called_once()
+        self.assertIn('Sent 1 emails', out.getvalue())
+
+    def test_stale_claims_are_taken_over(self):
+        """Test emails claimed by a worker that died are sent by the next one"""
+        self.reserve()
+        self.assertIsNotNone(claim_batch())
+        self.assertIsNone(claim_batch())
+
+        EmailOutbox.objects.update(claimed_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(drain_outbox(), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
@@ -0,0 +1,108 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils import timezone
+from datetime import time, timedelta
+from io import StringIO
+from booking_system.models import Restaurant, Table, Reservation, DailyReservationStats
+from booking_system.analytics import AnalyticsEngine
+
+User = get_user_model()
+
+class DailyReservationStatsTest(TestCase):
+    def setUp(self):
+        owner = User.objects.create_user(username='owner', password='testpass123')
+        self.customer = User.objects.create_user(username='customer', password='testpass123')
+
+        self.restaurant = Restaurant.objects.create(
+            name='Test Restaurant',
+            location='Test City',
+            cuisine='italian',
+            rating=4.5,
+            user=owner
+        )
+
+        self.table = Table.objects.create(
+            restaurant=self.restaurant,
+            table_number='T1',
+            capacity=6
+        )
+
+        self.date = timezone.now().date() + timedelta(days=1)
+
+    def reserve(self, start, guests=2):
+        return Reservation.objects.create(
+            user=self.customer,
+            restaurant=self.restaurant,
+            table=self.table,
+            date=self.date,
+            time=start,
+            number_of_guests=guests
+        )
+
+    def stats(self):
+        return {
+            (row.hour, row.status): (row.bookings, row.guests)
+            for row in DailyReservationStats.objects.filter(bookings__gt=0)
+        }
+
+    def test_rollup_follows_reservation_changes(self):
+        """Test creating, editing and deleting reservations keeps the rollup right"""
+        first = self.reserve(time(12, 0), guests=2)
+        self.reserve(time(19, 0), guests=4)
+        self.assertEqual(self.stats(), {(12, 'pending'): (1, 2), (19, 'pending'): (1, 4)})
+
+        first.status = 'confirmed'
+        first.number_of_guests = 3
+        first.save()
+        self.assertEqual(self.stats(), {(12, 'confirmed'): (1, 3), (19, 'pending'): (1, 4)})
+
+        first.delete()
+        self.assertEqual(self.stats(), {(19, 'pending'): (1, 4)})
+
+    def test_deleting_restaurant_with_reservations(self):
+        """Test deleting a restaurant cascades through its reservations and rollup"""
+        self.reserve(time(12, 0))
+        self.reserve(time(19, 0), guests=4)
+
+        self.restaurant.delete()
+
+        self.assertFalse(Reservation.objects.exists())
+        self.assertFalse(DailyReservationStats.objects.exists())
+
+    def test_deleting_table_leaves_no_empty_rows(self):
+        """Test rollup rows emptied by deletions are removed"""
+        self.reserve(time(12, 0))
+
+        self.table.delete()
+
+        self.assertFalse(DailyReservationStats.objects.exists())
+
+    def test_rebuild_command_repairs_drift(self):
+        """Test the rebuild command recomputes the rollup from reservations"""
+        self.reserve(time(12, 0))
+        self.reserve(time(19, 0), guests=4)
+        expected = self.stats()
+        DailyReservationStats.objects.all().delete()
+
+        call_command('rebuild_reservation_stats', stdout=StringIO())
+
+        self.assertEqual(self.stats(), expected)
+
+    def test_trends_are_read_from_rollup(self):
+        """Test booking trends come from the rollup rather than raw reservations"""
+        # No reservations exist, only their rolled up counts
+        DailyReservationStats.objects.create(
+            restaurant=self.restaurant,
+            date=timezone.now().date(),
+            hour=19,
+            status='confirmed',
+            bookings=5,
+            guests=15
+        )
+
+        trends = AnalyticsEngine(self.restaurant).get_booking_trends()
+
+        self.assertEqual(trends['total_bookings'], 5)
+        self.assertEqual(trends['hourly_patterns'][0]['avg_guests'], 3)
+        self.assertEqual(trends['daily_bookings'][0]['confirmed'], 5)
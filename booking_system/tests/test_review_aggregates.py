@@ -0,0 +1,73 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from io import StringIO
+from booking_system.models import Restaurant, Review
+
+User = get_user_model()
+
+class ReviewAggregatesTest(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            username='owner',
+            email='owner@test.com',
+            password='testpass123'
+        )
+
+        self.restaurant = Restaurant.objects.create(
+            name='Test Restaurant',
+            location='Test City',
+            cuisine='italian',
+            rating=4.5,
+            user=self.owner
+        )
+
+        self.reviewers = [
+            User.objects.create_user(username=f'reviewer{i}', password='testpass123')
+            for i in range(3)
+        ]
+
+    def review(self, reviewer, rating):
+        return Review.objects.create(
+            user=reviewer,
+            restaurant=self.restaurant,
+            rating=rating,
+            comment='Good food'
+        )
+
+    def assertAggregates(self, count, total):
+        self.restaurant.refresh_from_db()
+        self.assertEqual(self.restaurant.review_count, count)
+        self.assertEqual(self.restaurant.review_sum, total)
+
+    def test_aggregates_follow_review_changes(self):
+        """Test creating, editing and deleting reviews keeps the counters right"""
+        first = self.review(self.reviewers[0], 5)
+        self.review(self.reviewers[1], 3)
+        self.assertAggregates(2, 8)
+        self.assertEqual(self.restaurant.average_rating, 4.0)
+
+        first.rating = 1
+        first.save()
+        self.assertAggregates(2, 4)
+
+        first.delete()
+        self.assertAggregates(1, 3)
+
+    def test_reading_average_needs_no_queries(self):
+        """Test the average rating is served from the stored columns"""
+        self.review(self.reviewers[0], 4)
+        restaurant = Restaurant.objects.get(pk=self.restaurant.pk)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(restaurant.average_rating, 4.0)
+
+    def test_rebuild_command_repairs_drift(self):
+        """Test the rebuild command recomputes aggregates from the reviews"""
+        self.review(self.reviewers[0], 5)
+        self.review(self.reviewers[1], 2)
+        Restaurant.objects.update(review_count=0, review_sum=0)
+
+        call_command('rebuild_review_aggregates', stdout=StringIO())
+
+        self.assertAggregates(2, 7)
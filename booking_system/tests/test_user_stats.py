@@ -0,0 +1,119 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils import timezone
+from datetime import time, timedelta
+from io import StringIO
+from booking_system.models import Restaurant, Table, Reservation, UserReservationStats
+from booking_system.rollups import get_user_stats
+
+User = get_user_model()
+
+class UserReservationStatsTest(TestCase):
+    def setUp(self):
+        owner = User.objects.create_user(username='owner', password='testpass123')
+        self.customer = User.objects.create_user(username='customer', password='testpass123')
+
+        self.restaurant = Restaurant.objects.create(
+            name='Test Restaurant',
+            location='Test City',
+            cuisine='italian',
+            rating=4.5,
+            user=owner
+        )
+
+        self.table = Table.objects.create(
+            restaurant=self.restaurant,
+            table_number='T1',
+            capacity=6
+        )
+
+        self.today = timezone.now().date()
+
+    def reserve(self, days_ahead, start=time(19, 0), status='confirmed'):
+        return Reservation.objects.create(
+            user=self.customer,
+            restaurant=self.restaurant,
+            table=self.table,
+            date=self.today + timedelta(days=days_ahead),
+            time=start,
+            number_of_guests=2,
+            status=status
+        )
+
+    def counts(self, as_of=None):
+        stats = get_user_stats(self.customer.id, as_of=as_of)
+        return (
+            stats['total_reservations'],
+            stats['upcoming_reservations'],
+            stats['completed_reservations'],
+            stats['cancelled_reservations'],
+        )
+
+    def test_counters_follow_status_transitions(self):
+        """Test bookings, cancellations, completions and deletes move the counters"""
+        self.assertEqual(self.counts(), (0, 0, 0, 0))
+
+        first = self.reserve(1)
+        second = self.reserve(2)
+        self.assertEqual(self.counts(), (2, 2, 0, 0))
+
+        first.status = 'cancelled'
+        first.save()
+        self.assertEqual(self.counts(), (2, 1, 0, 1))
+
+        second.status = 'completed'
+        second.save()
+        self.assertEqual(self.counts(), (2, 0, 1, 1))
+
+        first.delete()
+        self.assertEqual(self.counts(), (1, 0, 1, 0))
+
+    def test_drifted_counters_do_not_block_changes(self):
+        """Test a decrement below zero is clamped instead of failing the save"""
+        reservation = self.reserve(1)
+        UserReservationStats.objects.update(total=0, upcoming=0)
+
+        reservation.status = 'cancelled'
+        reservation.save()
+        reservation.delete()
+
+        self.assertEqual(self.counts(), (0, 0, 0, 0))
+        self.assertFalse(Reservation.objects.exists())
+
+    def test_deleting_user_with_reservations(self):
+        """Test deleting a user cascades through their reservations and counters"""
+        self.reserve(1)
+        self.reserve(2, status='completed')
+
+        self.customer.delete()
+
+        self.assertFalse(Reservation.objects.exists())
+        self.assertFalse(UserReservationStats.objects.exists())
+
+    def test_reading_counters_is_one_query(self):
+        """Test a user with many bookings gets their stats from a single row"""
+        for day in range(1, 21):
+            self.reserve(day)
+        get_user_stats(self.customer.id)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.counts(), (20, 20, 0, 0))
+
+    def test_upcoming_is_recounted_on_a_new_day(self):
+        """Test bookings drop out of "upcoming" once their date has passed"""
+        self.reserve(1)
+        self.reserve(3)
+        self.assertEqual(self.counts(), (2, 2, 0, 0))
+
+        self.assertEqual(self.counts(as_of=self.today + timedelta(days=2)), (2, 1, 0, 0))
+
+    def test_reconcile_command_repairs_drift(self):
+        """Test the reconcile command recounts the counters from the reservations"""
+        self.reserve(1)
+        self.reserve(2, status='cancelled')
+        UserReservationStats.objects.update(total=7, cancelled=0, upcoming=0)
+
+        call_command('reconcile_user_stats', stdout=StringIO())
+
+        self.assertEqual(self.counts(), (2, 1, 0, 1))
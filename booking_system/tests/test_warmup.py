@@ -0,0 +1,107 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+from io import StringIO
+import threading
+import time
+from unittest import mock
+from booking_system.models import Restaurant, Table
+from booking_system.availability import get_occupancy
+from booking_system.cache_utils import (
+    local_cache, get_cuisine_stats, get_popular_restaurants, get_restaurant_stats,
+    popular_restaurants
+)
+from booking_system.warmup import warm_caches
+
+User = get_user_model()
+
+class WarmCachesTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        owner = User.objects.create_user(username='owner', password='testpass123')
+        self.restaurants = []
+        for number in range(3):
+            restaurant = Restaurant.objects.create(
+                name=f'Restaurant {number}',
+                location='Test City',
+                cuisine='italian',
+                rating=4.5,
+                user=owner
+            )
+            Table.objects.create(restaurant=restaurant, table_number='T1', capacity=4)
+            self.restaurants.append(restaurant)
+
+    def tearDown(self):
+        cache.clear()
+        local_cache.clear()
+
+    def test_warmed_entries_need_no_queries(self):
+        """Test every warmed entry is then served straight from the cache"""
+        report = warm_caches(top=2, workers=1)
+
+        self.assertEqual(report['failed'], 0)
+        self.assertEqual(report['skipped'], 0)
+        # Listings plus stats and occupancy for the top two restaurants
+        self.assertEqual(report['warmed'], 3 + 2 * 2)
+
+        today = timezone.now().date()
+        top_ids = list(popular_restaurants().values_list('id', flat=True)[:2])
+        with self.assertNumQueries(0):
+            # The default key readers use, not one sized by --top
+            get_popular_restaurants()
+            get_cuisine_stats()
+            for restaurant_id in top_ids:
+                get_restaurant_stats(restaurant_id)
+                get_occupancy(restaurant_id, today)
+
+    def test_budget_stops_warming(self):
+        """Test nothing is built once the budget is spent"""
+        report = warm_caches(top=10, budget=0, workers=1)
+
+        self.assertEqual(report['warmed'], 0)
+        self.assertEqual(report['skipped'], 3 + 2 * len(self.restaurants))
+
+    def test_failed_popular_list_does_not_abort(self):
+        """Test a failure loading the popular list is reported, not raised"""
+        with mock.patch(
+            'booking_system.warmup.get_popular_restaurants',
+            side_effect=ConnectionError('cache down')
+        ), self.assertLogs('booking_system.warmup', 'ERROR'):
+            report = warm_caches(top=10, workers=1)
+
+        # Everything else is still warmed
+        self.assertEqual(report['warmed'], 2 + 2 * len(self.restaurants))
+        self.assertEqual(report['failed'], 1)
+        self.assertEqual(report['skipped'], 0)
+
+    def test_budget_with_workers_leaves_no_running_tasks(self):
+        """Test tasks still running when the budget runs out finish before warm_caches returns"""
+        running = []
+        finished = []
+
+        def slow_build(*args):
+            running.append(threading.get_ident())
+            time.sleep(0.2)
+            finished.append(threading.get_ident())
+
+        with mock.patch('booking_system.warmup.get_popular_restaurants', slow_build), \
+                mock.patch('booking_system.warmup.get_cuisine_stats', slow_build), \
+                mock.patch('booking_system.warmup.get_cuisines', slow_build), \
+                mock.patch('booking_system.warmup.get_restaurant_stats', slow_build), \
+                mock.patch('booking_system.warmup.get_occupancy', slow_build), \
+                mock.patch('booking_system.warmup.connections'):
+            report = warm_caches(top=10, budget=0.05, workers=2)
+
+        self.assertEqual(len(finished), len(running))
+        self.assertEqual(report['warmed'], len(finished))
+        self.assertEqual(report['skipped'], 3 + 2 * len(self.restaurants) - len(finished))
+        self.assertGreater(report['skipped'], 0)
+
+    def test_command_reports_progress(self):
+        """Test the management command prints a summary"""
+        out = StringIO()
+        call_command('warm_caches', '--workers', '1', stdout=out)
+        self.assertIn('Warmed 9 cache entries', out.getvalue())
@@ -1,71 +1,23 @@
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
-from django.conf import settings
 from django.utils import timezone
 from .models import Reservation
+from .emails import render_many
+from .mailer import MAIL_BATCH_SIZE, MAIL_WORKERS, send_in_batches
+from .outbox import queue_reservation_email
 import logging
 
 logger = logging.getLogger(__name__)
 
 def send_reservation_confirmation(reservation):
-    """Send reservation confirmation email"""
-    try:
-        subject = f'Reservation Confirmation - {reservation.restaurant.name}'
-        
-        context = {
-            'reservation': reservation,
-            'user': reservation.user,
-            'restaurant': reservation.restaurant,
-        }
-        
-        html_message = render_to_string('emails/reservation_confirmation.html', context)
-        plain_message = render_to_string('emails/reservation_confirmation.txt', context)
-        
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[reservation.contact_email or reservation.user.email],
-            html_message=html_message,
-            fail_silently=False,
-        )
-        
-        logger.info(f"Confirmation email sent for reservation {reservation.id}")
-        
-    except Exception as e:
-        logger.error(f"Failed to send confirmation email for reservation {reservation.id}: {str(e)}")
-        raise
+    """Queue the reservation confirmation email for the outbox worker"""
+    queue_reservation_email(reservation, 'confirmation')
+    logger.info(f"Confirmation email queued for reservation {reservation.id}")
 
 def send_cancellation_email(reservation):
-    """Send reservation cancellation email"""
-    try:
-        subject = f'Reservation Cancelled - {reservation.restaurant.name}'
-        
-        context = {
-            'reservation': reservation,
-            'user': reservation.user,
-            'restaurant': reservation.restaurant,
-        }
-        
-        html_message = render_to_string('emails/reservation_cancellation.html', context)
-        plain_message = render_to_string('emails/reservation_cancellation.txt', context)
-        
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[reservation.contact_email or reservation.user.email],
-            html_message=html_message,
-            fail_silently=False,
-        )
-        
-        logger.info(f"Cancellation email sent for reservation {reservation.id}")
-        
-    except Exception as e:
-        logger.error(f"Failed to send cancellation email for reservation {reservation.id}: {str(e)}")
-        raise
+    """Queue the reservation cancellation email for the outbox worker"""
+    queue_reservation_email(reservation, 'cancellation')
+    logger.info(f"Cancellation email queued for reservation {reservation.id}")
 
-def send_reminder_emails():
+def send_reminder_emails(batch_size=MAIL_BATCH_SIZE, workers=MAIL_WORKERS):
     """Send reminder emails for upcoming reservations (to be run as a cron job)"""
     try:
         tomorrow = timezone.now().date() + timezone.timedelta(days=1)
@@ -73,37 +25,16 @@ def send_reminder_emails():
         upcoming_reservations = Reservation.objects.filter(
             date=tomorrow,
             status__in=['confirmed', 'pending']
-        ).select_related('user', 'restaurant')
+        ).select_related('user', 'restaurant').order_by('pk')
+        
+        messages = render_many(
+            upcoming_reservations.iterator(chunk_size=batch_size), 'reminder'
+        )
         
-        for reservation in upcoming_reservations:
-            try:
-                subject = f'Reminder: Your reservation at {reservation.restaurant.name}'
-                
-                context = {
-                    'reservation': reservation,
-                    'user': reservation.user,
-                    'restaurant': reservation.restaurant,
-                }
-                
-                html_message = render_to_string('emails/reservation_reminder.html', context)
-                plain_message = render_to_string('emails/reservation_reminder.txt', context)
-                
-                send_mail(
-                    subject=subject,
-                    message=plain_message,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[reservation.contact_email or reservation.user.email],
-                    html_message=html_message,
-                    fail_silently=False,
-                )
-                
-                logger.info(f"Reminder email sent for reservation {reservation.id}")
-                
-            except Exception as e:
-                logger.error(f"Failed to send reminder email for reservation {reservation.id}: {str(e)}")
-                continue
+        sent, failed = send_in_batches(messages, batch_size=batch_size, workers=workers)
         
-        logger.info(f"Processed {upcoming_reservations.count()} reminder emails")
+        logger.info(f"Sent {sent} reminder emails, {failed} failed")
+        return sent, failed
         
     except Exception as e:
         logger.error(f"Error in send_reminder_emails: {str(e)}")
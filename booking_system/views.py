@@ -4,12 +4,14 @@ from django.contrib import messages
 from django.http import JsonResponse
 from django.views.decorators.cache import cache_page
 from django.core.paginator import Paginator
-from django.db.models import Q, Count, Avg
+from django.db.models import Q
 from django.utils import timezone
 from datetime import datetime, timedelta
 
-from .models import Restaurant, Reservation, Review, Table
+from .models import Restaurant, Reservation, Review
 from .forms import ReservationForm, ReviewForm
+from .availability import find_available_tables
+from .booking import book_reservation, NoTableAvailable, BookingLockTimeout
 
 @cache_page(60 * 15)  # Cache for 15 minutes
 def home(request):
@@ -25,19 +27,18 @@ def restaurant_detail(request, restaurant_id):
     restaurant = get_object_or_404(Restaurant, id=restaurant_id, is_active=True)
     
     # Get reviews with pagination
-    reviews = restaurant.reviews.all().order_by('-created_at')
+    reviews = restaurant.reviews.select_related('user').order_by('-created_at')
     paginator = Paginator(reviews, 10)
+    # The stored review count saves the paginator a COUNT(*) over all reviews
+    paginator.count = restaurant.review_count
     page_number = request.GET.get('page')
     page_reviews = paginator.get_page(page_number)
     
-    # Calculate average rating
-    avg_rating = reviews.aggregate(Avg('rating'))['rating__avg'] or 0
-    
     context = {
         'restaurant': restaurant,
         'reviews': page_reviews,
-        'avg_rating': round(avg_rating, 1),
-        'total_reviews': reviews.count(),
+        'avg_rating': round(restaurant.average_rating, 1),
+        'total_reviews': restaurant.review_count,
     }
     
     return render(request, 'booking_system/restaurant_detail.html', context)
@@ -55,24 +56,20 @@ def book_table(request, restaurant_id=None):
             reservation = form.save(commit=False)
             reservation.user = request.user
             
-            # Find available table
-            available_tables = Table.objects.filter(
-                restaurant=reservation.restaurant,
-                capacity__gte=reservation.number_of_guests,
-                is_active=True
-            ).exclude(
-                reservations__date=reservation.date,
-                reservations__time=reservation.time,
-                reservations__status__in=['confirmed', 'pending']
+            reservation.restaurant_id = (
+                restaurant.id if restaurant else reservation.table.restaurant_id
             )
             
-            if available_tables.exists():
-                reservation.table = available_tables.first()
-                reservation.save()
+            # Assign the best-fitting free table under the booking lock
+            try:
+                book_reservation(reservation)
+            except NoTableAvailable:
+                messages.error(request, 'No tables available for the selected time.')
+            except BookingLockTimeout:
+                messages.error(request, 'We are handling a lot of bookings right now, please try again.')
+            else:
                 messages.success(request, 'Your reservation has been confirmed!')
                 return redirect('my_reservations')
-            else:
-                messages.error(request, 'No tables available for the selected time.')
     else:
         initial_data = {}
         if restaurant:
@@ -190,20 +187,12 @@ def check_availability_view(request):
             return JsonResponse({'error': 'Invalid parameters'}, status=400)
         
         # Check availability
-        available_tables = Table.objects.filter(
-            restaurant=restaurant,
-            capacity__gte=guests,
-            is_active=True
-        ).exclude(
-            reservations__date=date,
-            reservations__time=time,
-            reservations__status__in=['confirmed', 'pending']
-        )
+        table_ids = find_available_tables(restaurant.id, date, time, guests)
         
         return JsonResponse({
-            'available': available_tables.exists(),
-            'count': available_tables.count(),
-            'message': f"{'Available' if available_tables.exists() else 'Not available'} for {guests} guests"
+            'available': bool(table_ids),
+            'count': len(table_ids),
+            'message': f"{'Available' if table_ids else 'Not available'} for {guests} guests"
         })
     
     return JsonResponse({'error': 'Method not allowed'}, status=405)
@@ -229,10 +218,9 @@ def search_restaurants(request):
     if location:
         restaurants = restaurants.filter(location__icontains=location)
     
-    # Add rating and review count
+    # Add rating from the stored review aggregates
     restaurants = restaurants.annotate(
-        review_count=Count('reviews'),
-        avg_rating=Avg('reviews__rating')
+        avg_rating=Restaurant.average_rating_expression()
     ).order_by('-avg_rating', '-review_count')
     
     # Pagination
@@ -0,0 +1,101 @@
+"""
+Cache warming after a deploy.
+
+A restart leaves every cache cold, and the first minutes of traffic would
+otherwise all fall through to the database. warm_caches() precomputes the
+shared listings, then per-restaurant stats and today's occupancy for the
+most popular restaurants, on a small thread pool and within a time budget
+(tasks already running when it runs out are waited for, not abandoned).
+It is run by the warm_caches command and, optionally, by gunicorn's
+when_ready hook before the workers are forked.
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.db import connections
+from django.utils import timezone
+
+from .availability import get_occupancy
+from .cache_utils import (
+    get_cuisine_stats, get_cuisines, get_popular_restaurants, get_restaurant_stats,
+    popular_restaurants
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOP_RESTAURANTS = 50
+DEFAULT_BUDGET_SECONDS = 30
+DEFAULT_WORKERS = 4
+
+def _run(task, in_thread=False):
+    name, function, args = task
+    try:
+        function(*args)
+        return True
+    except Exception:
+        logger.exception('Warming %s failed', name)
+        return False
+    finally:
+        if in_thread:
+            # Pool threads open their own connections; don't leave them behind
+            connections.close_all()
+
+def get_top_restaurant_ids(top=DEFAULT_TOP_RESTAURANTS):
+    """IDs of the `top` most popular restaurants, or [] if they can't be loaded"""
+    try:
+        return list(popular_restaurants().values_list('id', flat=True)[:top])
+    except Exception:
+        logger.exception('Loading the top %s restaurants failed', top)
+        return []
+
+def get_warmup_tasks(restaurant_ids):
+    """The cache entries to precompute, as (name, function, args) tuples"""
+    today = timezone.now().date()
+    tasks = [
+        # The list readers ask for, under its default limit
+        ('popular_restaurants', get_popular_restaurants, ()),
+        ('cuisine_stats', get_cuisine_stats, ()),
+        ('cuisines', get_cuisines, ()),
+    ]
+    for restaurant_id in restaurant_ids:
+        tasks += [
+            ('restaurant_stats', get_restaurant_stats, (restaurant_id,)),
+            ('occupancy', get_occupancy, (restaurant_id, today)),
+        ]
+    return tasks
+
+def warm_caches(top=DEFAULT_TOP_RESTAURANTS, budget=DEFAULT_BUDGET_SECONDS,
+                workers=DEFAULT_WORKERS):
+    """
+    Precompute the hot cache entries, giving up on whatever is left once
+    `budget` seconds have passed. Returns counts of warmed, failed and
+    skipped entries and the elapsed time.
+    """
+    started = time.monotonic()
+    deadline = started + budget
+    tasks = get_warmup_tasks(get_top_restaurant_ids(top))
+    results = []
+
+    if workers > 1:
+        executor = ThreadPoolExecutor(max_workers=workers)
+        futures = [executor.submit(_run, task, True) for task in tasks]
+        wait(futures, timeout=max(deadline - time.monotonic(), 0))
+        # Drop queued tasks and let the running ones finish: no pool thread
+        # may outlive this call, or it would still hold a database connection
+        # or a cache lock when gunicorn forks its workers
+        executor.shutdown(wait=True, cancel_futures=True)
+        results += [future.result() for future in futures if not future.cancelled()]
+    else:
+        for task in tasks:
+            if time.monotonic() >= deadline:
+                break
+            results.append(_run(task))
+
+    warmed = sum(results)
+    return {
+        'warmed': warmed,
+        'failed': len(results) - warmed,
+        'skipped': len(tasks) - len(results),
+        'elapsed': time.monotonic() - started,
+    }
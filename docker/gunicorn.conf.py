@@ -46,6 +46,26 @@ raw_env = [
 
 # Hooks for better container integration
 def when_ready(server):
+    # Optionally fill the caches before the workers take traffic. With
+    # preload_app the workers also inherit the master's process-local cache.
+    if os.environ.get("WARM_CACHES_ON_START", "").lower() in ("1", "true", "yes"):
+        from django.db import connections
+        from booking_system.warmup import warm_caches
+
+        try:
+            report = warm_caches(
+                top=int(os.environ.get("WARM_CACHES_TOP", 50)),
+                budget=float(os.environ.get("WARM_CACHES_BUDGET", 30)),
+            )
+            server.log.info(
+                "Warmed %s cache entries in %.2fs (%s failed, %s skipped)",
+                report["warmed"], report["elapsed"], report["failed"], report["skipped"],
+            )
+        except Exception:
+            server.log.exception("Cache warmup failed")
+        finally:
+            # Forked workers must not share the master's database connections
+            connections.close_all()
     server.log.info("Server is ready. Spawning workers")
 
 def worker_int(worker):